@@ -0,0 +1,134 @@
+import gencle
+import os, sys, argparse
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pyclesperanto_auto_update
+import clesperantoj_auto_update
+import clesperanto_auto_update
+
+TARGETS = {
+    "pyclesperanto": pyclesperanto_auto_update,
+    "clesperantoj": clesperantoj_auto_update,
+    "clesperanto": clesperanto_auto_update,
+}
+
+
+def update_tag(
+    output_root: str, target: str, src_repo: str, tag: str, archive: bool, executor=None
+) -> str:
+    """
+    Generate the code of a single tag into its own folder (or archive) of the OUTPUT_ROOT.
+
+    Parameters
+    ----------
+    output_root : str
+        Path to the folder receiving one sub-folder per tag.
+    target : str
+        Name of the generated package ('pyclesperanto', 'clesperantoj' or 'clesperanto').
+    src_repo : str
+        Repository to read the tier files from.
+    tag : str
+        Version tag to generate.
+    archive : bool
+        If True, write the generated files into a zip archive instead of a folder.
+    executor : Executor, optional
+        Process pool used to check the generated code.
+
+    Returns
+    -------
+    str
+        Path to the generated folder or archive.
+    """
+    tag_folder = os.path.join(output_root, tag)
+    if archive:
+        path = tag_folder + ".zip"
+        sink = gencle.ArchiveSink(path)
+    else:
+        path = tag_folder
+        sink = gencle.FileSystemSink(tag_folder)
+    with sink:
+        TARGETS[target].update_tier_code(tag_folder, src_repo, tag, executor=executor, sink=sink)
+    return path
+
+
+def update_tags(
+    output_root: str,
+    target: str,
+    src_repo: str,
+    tags: list,
+    jobs: int = 4,
+    archive: bool = False,
+) -> dict:
+    """
+    Generate the code of several tags in one process.
+
+    Notes: all tags share the fetch and parse caches of gencle, which are bounded in size,
+    as well as the process pool checking the generated code, and are processed in
+    parallel by a pool of `jobs` threads.
+
+    Parameters
+    ----------
+    output_root : str
+        Path to the folder receiving one sub-folder per tag.
+    target : str
+        Name of the generated package ('pyclesperanto', 'clesperantoj' or 'clesperanto').
+    src_repo : str
+        Repository to read the tier files from.
+    tags : list
+        Version tags to generate.
+    jobs : int, optional
+        Number of tags processed in parallel, by default 4.
+    archive : bool, optional
+        If True, write each tag into a zip archive instead of a folder, by default False.
+
+    Returns
+    -------
+    dict
+        Tag to generated path, or to the error raised while generating it.
+    """
+
+    with ProcessPoolExecutor() as checker, ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+
+        def _run(tag):
+            try:
+                return tag, update_tag(output_root, target, src_repo, tag, archive, checker)
+            except Exception as error:
+                return tag, error
+
+        return dict(executor.map(_run, tags))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Generate the code of several CLIc tags in one process, one folder per tag."
+    )
+    parser.add_argument("output_path", help="folder receiving one sub-folder per tag")
+    parser.add_argument("tags", nargs="+", help="tags or tag ranges written as first..last")
+    parser.add_argument("--target", choices=sorted(TARGETS), default="pyclesperanto")
+    parser.add_argument("--jobs", type=int, default=4, help="number of tags processed in parallel")
+    parser.add_argument("--archive", action="store_true", help="write one zip archive per tag")
+    args = parser.parse_args()
+
+    source_repo = "clEsperanto/CLIc"
+    tags = gencle.resolve_tags(args.tags, repo=source_repo)
+
+    print(f"gencle: Generating {args.target} code for {len(tags)} tags ...")
+    print(f"gencle: Reading from {source_repo}")
+    print(f"gencle: Writing to {args.output_path}")
+    results = update_tags(
+        args.output_path, args.target, source_repo, tags, args.jobs, args.archive
+    )
+    failed = False
+    for tag, result in results.items():
+        if isinstance(result, Exception):
+            failed = True
+            print(f"gencle: Fail generating {tag}: {result}")
+        else:
+            print(f"gencle: {tag} -> {result}")
+    print("gencle: Done!")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
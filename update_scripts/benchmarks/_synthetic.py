@@ -0,0 +1,56 @@
+# Synthetic CLIc tier files used by the benchmarks, shaped like the real tier headers.
+
+import random
+
+_PARAMETERS = [
+    ("src1", "const Array::Pointer &", "", "Second input image."),
+    ("scalar", "float", " ( = 1 )", "Constant value."),
+    ("radius_x", "int", " ( = 1 )", "Radius along the x axis."),
+    ("radius_y", "int", " ( = 1 )", "Radius along the y axis."),
+    ("connectivity", "std::string", ' ( = "box" )', "Element shape, \"box\" or \"sphere\"."),
+    ("binary", "bool", " ( = False )", "Use binary mode."),
+    ("values", "std::vector<float>", " ( = [1, 2, 3] )", "List of values."),
+]
+
+_RETURNS = ["Array::Pointer"] * 8 + ["float", "std::vector<float>", "StatisticsMap"]
+
+_CATEGORIES = ["'filter', 'in assistant'", "'combine'", "'label processing', 'in assistant'", ""]
+
+
+def synthetic_block(name: str, rng: random.Random) -> str:
+    """Return the doxygen block and declaration of a synthetic kernel."""
+    return_type = rng.choice(_RETURNS)
+    extras = rng.sample(_PARAMETERS, rng.randint(0, 4))
+    parameters = [
+        ("device", "const Device::Pointer &", "", "Device to perform the operation on."),
+        ("src", "const Array::Pointer &", "", "The input image to be processed."),
+    ]
+    # inputs come first, then the output, then the parameters with default values
+    parameters += [p for p in extras if not p[2]]
+    if return_type == "Array::Pointer":
+        parameters.append(("dst", "Array::Pointer", " ( = None )", "The output image."))
+    parameters += [p for p in extras if p[2]]
+
+    lines = ["/**", f" * @name {name}", f" * @brief Computes the {name.replace('_', ' ')} of an image.", " *"]
+    lines += [f" * @param {n} {d} [{t}{v}]" for n, t, v, d in parameters]
+    lines.append(f" * @return {return_type}")
+    category = rng.choice(_CATEGORIES)
+    if category:
+        lines.append(f" * @note {category}")
+    if rng.random() < 0.1:
+        lines.append(f" * @deprecated This function is deprecated. Consider using another one instead.")
+    lines.append(f" * @see https://clij.github.io/clij2-docs/reference_{name}")
+    lines.append(" */")
+    signature = ", ".join(f"{t} {n}" for n, t, _, _ in parameters)
+    lines.append(f"auto\n{name}_func({signature}) -> {return_type};\n")
+    return "\n".join(lines)
+
+
+def synthetic_tier(tier: int, kernels: int, seed: int = 0) -> str:
+    """Return the content of a synthetic tier header with the given number of kernels."""
+    rng = random.Random(seed)
+    blocks = [synthetic_block(f"kernel_{tier}_{i}", rng) for i in range(kernels)]
+    return (
+        f"#pragma once\n\n/**\n * @namespace cle::tier{tier}\n * @brief Tier {tier} functions\n */\n"
+        f"namespace cle::tier{tier}\n{{\n\n" + "\n".join(blocks) + f"\n}} // namespace cle::tier{tier}\n"
+    )
@@ -0,0 +1,138 @@
+# Generation time and call overhead of the header-only C++ API on a synthetic catalog.
+#
+# usage: python benchmarks/bench_cpp_api.py [kernels_per_tier]
+#
+# The C++ API of 8 synthetic tiers is generated, then, if a C++ compiler is found, built
+# against a stub CLIc whose kernels are defined in another translation unit. The cost of
+# a call through `cle::api` is compared with a direct call of `cle::tierN::*_func`.
+
+import os, sys, time, shutil, subprocess, tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import gencle
+from _synthetic import synthetic_tier
+
+TIERS = range(1, 9)
+CALLS = 20_000_000
+
+_STUB_TIER0 = """#pragma once
+#include <memory>
+#include <string>
+#include <unordered_map>
+#include <vector>
+namespace cle
+{
+struct Device { using Pointer = std::shared_ptr<Device>; };
+struct Array { using Pointer = std::shared_ptr<Array>; };
+using StatisticsMap = std::unordered_map<std::string, std::vector<float>>;
+}
+"""
+
+# kernel timed by the benchmark, added to the synthetic tier 1
+_BENCH_KERNEL = """
+/**
+ * @name bench_kernel
+ * @brief Kernel timed by the benchmark.
+ *
+ * @param device Device to perform the operation on. [const Device::Pointer &]
+ * @param src The input image. [const Array::Pointer &]
+ * @param dst The output image. [Array::Pointer ( = None )]
+ * @param scalar Constant value. [float ( = 1 )]
+ * @return Array::Pointer
+ */
+auto
+bench_kernel_func(const Device::Pointer & device, const Array::Pointer & src, Array::Pointer dst, float scalar) -> Array::Pointer;
+"""
+
+_MAIN = """#include "cle_api.hpp"
+#include <chrono>
+#include <cstdio>
+
+template <typename Call>
+double time_calls(long calls, Call && call)
+{
+    auto start = std::chrono::steady_clock::now();
+    long sink = 0;
+    for (long i = 0; i < calls; ++i)
+    {
+        sink += call() != nullptr;
+    }
+    std::chrono::duration<double, std::nano> elapsed = std::chrono::steady_clock::now() - start;
+    return sink == -1 ? 0.0 : elapsed.count() / calls;
+}
+
+int main()
+{
+    const long calls = CALLS;
+    auto device = std::make_shared<cle::Device>();
+    auto src = std::make_shared<cle::Array>();
+    cle::api::set_default_device(device);
+    for (int repeat = 0; repeat < 2; ++repeat)
+    {
+        double direct = time_calls(calls, [&] { return cle::tier1::bench_kernel_func(device, src, nullptr, 2.0f); });
+        double api = time_calls(calls, [&] { return cle::api::bench_kernel(device, src, nullptr, 2.0f); });
+        double api_default = time_calls(calls, [&] { return cle::api::bench_kernel(src, nullptr, 2.0f); });
+        std::printf("direct %6.2f ns/call   cle::api %6.2f ns/call   cle::api (default device) %6.2f ns/call\\n",
+                    direct, api, api_default);
+    }
+    return 0;
+}
+"""
+
+
+def _definitions(tier: int, function_list: list) -> str:
+    lines = [f'#include "tier{tier}.hpp"']
+    for f in function_list:
+        signature = ", ".join(f"{p['type']} {p['name']}" for p in f["parameters"])
+        body = "return dst;" if f["name"] == "bench_kernel" else "return {};"
+        lines.append(f"auto cle::tier{tier}::{f['name']}_func({signature}) -> {f['return']} {{ {body} }}")
+    return "\n".join(lines) + "\n"
+
+
+def bench(kernels: int) -> None:
+    codes = {}
+    for tier in TIERS:
+        code = synthetic_tier(tier, kernels, tier)
+        if tier == 1:
+            code = code.replace("} // namespace cle::tier1", _BENCH_KERNEL + "\n} // namespace cle::tier1")
+        codes[tier] = '#include "tier0.hpp"\n' + code
+    function_lists = {tier: gencle.parse_doxygen_to_json(code) for tier, code in codes.items()}
+
+    start = time.perf_counter()
+    headers = {f"cle_api_tier{t}.hpp": gencle.generate_cpp_tier_header(t, f) for t, f in function_lists.items()}
+    headers["cle_api_device.hpp"] = gencle.generate_cpp_device_header()
+    headers["cle_api.hpp"] = gencle.generate_cpp_api_header(list(TIERS))
+    elapsed = time.perf_counter() - start
+    total = sum(len(f) for f in function_lists.values())
+    print(f"generated the C++ API of {total} kernels in {elapsed * 1000:.1f} ms "
+          f"({elapsed * 1e6 / total:.1f} us/kernel, {sum(map(len, headers.values())) / 1e6:.1f} MB)")
+
+    compiler = os.environ.get("CXX") or shutil.which("c++") or shutil.which("g++") or shutil.which("clang++")
+    if compiler is None:
+        print("no C++ compiler found, skipping the call overhead benchmark")
+        return
+    with tempfile.TemporaryDirectory() as folder:
+        files = dict(headers)
+        files["tier0.hpp"] = _STUB_TIER0
+        files.update({f"tier{t}.hpp": code for t, code in codes.items()})
+        files["kernels.cpp"] = "".join(_definitions(t, f) for t, f in function_lists.items())
+        files["main.cpp"] = _MAIN.replace("CALLS", str(CALLS))
+        for name, content in files.items():
+            with open(os.path.join(folder, name), "w") as file:
+                file.write(content)
+        start = time.perf_counter()
+        build = subprocess.run(
+            [compiler, "-std=c++17", "-O2", "-Wall", "-o", "bench", "main.cpp", "kernels.cpp"],
+            cwd=folder, capture_output=True, text=True,
+        )
+        if build.returncode != 0:
+            print(build.stderr[-4000:])
+            sys.exit(1)
+        print(f"compiled with {compiler} in {time.perf_counter() - start:.1f} s")
+        print(subprocess.run([os.path.join(folder, "bench")], capture_output=True, text=True).stdout, end="")
+
+
+if __name__ == "__main__":
+    bench(int(sys.argv[1]) if len(sys.argv) > 1 else 250)
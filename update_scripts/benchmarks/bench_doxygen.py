@@ -0,0 +1,122 @@
+# Parsing time of the doxygen tier files on adversarial inputs.
+#
+# usage: python benchmarks/bench_doxygen.py [largest_size_in_bytes]
+#
+# Each pathological input is parsed at growing sizes, the cost per byte of the parser
+# must stay stable. A fuzzing pass then checks that the parser never raises on mutated
+# blocks, and parses well-formed synthetic tiers into one function per kernel.
+
+import os, sys, random, time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from gencle._doxygen import _parse_doxygen_blocks
+from _synthetic import synthetic_block, synthetic_tier
+
+
+def _long_brief(size: int) -> str:
+    return "/**\n * @name long_brief\n * @brief " + "word " * (size // 5) + "\n */"
+
+
+def _missing_tags(size: int) -> str:
+    return "/**\n * @brief no parameters\n */\n" * (size // 32)
+
+
+def _repeated_briefs(size: int) -> str:
+    return "/**\n * @name briefs\n" + " * @brief b\n" * (size // 12) + " */"
+
+
+def _nested_defaults(size: int) -> str:
+    depth = size // 2
+    return "/**\n * @name nested\n * @brief b\n * @param x [int ( = " + "(" * depth + ")" * depth + " )]\n */"
+
+
+def _unterminated_blocks(size: int) -> str:
+    return "/** @brief unterminated " * (size // 24)
+
+
+def _open_parenthesis(size: int) -> str:
+    return "/**\n * @name spaces\n * @brief b\n * @param x [int " + "(     " * (size // 6) + "]\n */"
+
+
+INPUTS = {
+    "long brief": _long_brief,
+    "missing tags": _missing_tags,
+    "repeated briefs": _repeated_briefs,
+    "nested defaults": _nested_defaults,
+    "unterminated blocks": _unterminated_blocks,
+    "open parenthesis": _open_parenthesis,
+}
+
+
+def _time(code: str) -> float:
+    """Best of three parses."""
+    best = None
+    for _ in range(3):
+        start = time.perf_counter()
+        _parse_doxygen_blocks(code)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def bench(largest: int) -> bool:
+    sizes = [largest // 16, largest // 4, largest]
+    print(f"{'input':<22}{'size':>10}{'ns/B':>10}")
+    bounded = True
+    for label, make in INPUTS.items():
+        costs = []
+        for size in sizes:
+            code = make(size)
+            cost = _time(code) * 1e9 / len(code)
+            costs.append(cost)
+            print(f"{label:<22}{len(code):>10}{cost:>10.1f}")
+        # a linear parse keeps the cost per byte within a constant factor
+        if max(costs) > 8 * min(costs):
+            print(f"  ! cost per byte of '{label}' grows with the size")
+            bounded = False
+    return bounded
+
+
+def _mutate(block: str, rng: random.Random) -> str:
+    chars = list(block)
+    for _ in range(rng.randint(1, 8)):
+        position = rng.randrange(len(chars))
+        action = rng.random()
+        if action < 0.4:
+            del chars[position]
+        elif action < 0.8:
+            chars.insert(position, rng.choice("@/*[]()= \n\tx"))
+        else:
+            chars[position : position + 10] = []
+    return "".join(chars)
+
+
+def fuzz(iterations: int = 2000, seed: int = 0) -> bool:
+    rng = random.Random(seed)
+    for i in range(iterations):
+        code = _mutate(synthetic_block(f"kernel_{i}", rng), rng)
+        try:
+            functions = _parse_doxygen_blocks(code)
+        except Exception as error:
+            print(f"  ! parser raised {error!r} on:\n{code}")
+            return False
+        if not all(isinstance(f["brief"], str) for f in functions):
+            print(f"  ! parser gave a brief which is not text on:\n{code}")
+            return False
+    for seed in range(10):
+        code = synthetic_tier(1 + seed % 8, 100, seed)
+        names = [f["name"] for f in _parse_doxygen_blocks(code)]
+        if names != [f"kernel_{1 + seed % 8}_{i}" for i in range(100)]:
+            print(f"  ! synthetic tier {seed} is not parsed into its 100 kernels")
+            return False
+    print(f"fuzz: {iterations} mutated blocks parsed, synthetic tiers parsed")
+    return True
+
+
+if __name__ == "__main__":
+    largest = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    ok = bench(largest)
+    ok = fuzz() and ok
+    sys.exit(0 if ok else 1)
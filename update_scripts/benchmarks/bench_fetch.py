@@ -0,0 +1,82 @@
+# Tail latency of the tier downloads against deliberately slow local servers.
+#
+# usage: python benchmarks/bench_fetch.py [number_of_files]
+#
+# Two local mirrors serve the files: most answers take a few milliseconds, a few stall
+# for seconds. The same files are fetched without hedging (a single attempt without
+# timeout, as a plain urlopen) and with the gencle fetcher (timeout, hedged requests to
+# the second mirror), and the latency percentiles are compared.
+
+import os, sys, time, random, threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gencle._fetch import Fetcher, FetchError
+
+FAST_DELAY = 0.005
+STALL_DELAY = 3.0
+STALL_RATE = 0.05
+
+
+def _start_server(seed: int) -> ThreadingHTTPServer:
+    rng = random.Random(seed)
+    lock = threading.Lock()
+
+    class _SlowHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            with lock:
+                stall = rng.random() < STALL_RATE
+            time.sleep(STALL_DELAY if stall else FAST_DELAY)
+            body = f"// {self.path}\n".encode("utf-8")
+            try:
+                self.send_response(200)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            except OSError:
+                pass
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _SlowHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _percentiles(latencies: list) -> str:
+    latencies = sorted(latencies)
+    pick = lambda p: latencies[int(round(p * (len(latencies) - 1)))] * 1000
+    return f"p50 {pick(0.5):8.1f} ms   p99 {pick(0.99):8.1f} ms   max {latencies[-1] * 1000:8.1f} ms"
+
+
+def _run(fetcher: Fetcher, files: int) -> list:
+    latencies = []
+    for i in range(files):
+        urls = fetcher.mirror_urls("clEsperanto/CLIc", "bench", f"tier{i}.hpp")
+        start = time.perf_counter()
+        try:
+            fetcher.fetch(urls)
+        except FetchError as error:
+            print(f"  ! {error}")
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def bench(files: int) -> None:
+    servers = [_start_server(seed) for seed in (1, 2)]
+    mirrors = [
+        f"http://127.0.0.1:{s.server_address[1]}/{{repo}}/{{branch}}/{{path}}" for s in servers
+    ]
+    plain = Fetcher(mirrors=mirrors[:1], timeout=60.0, max_attempts=1)
+    hedged = Fetcher(mirrors=mirrors, timeout=1.0, hedge_after=0.05, deadline=60.0)
+    print(f"{files} files, {STALL_RATE:.0%} of the answers stall for {STALL_DELAY}s")
+    print(f"{'no hedging':<12}{_percentiles(_run(plain, files))}")
+    print(f"{'hedged':<12}{_percentiles(_run(hedged, files))}")
+    print(f"hedge delay learned: {hedged.hedge_delay() * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    bench(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -0,0 +1,94 @@
+# Parsing time of one tier file, serial versus cut into chunks parsed by worker processes.
+#
+# usage: python benchmarks/bench_parallel_parse.py [kernels ...]
+#
+# Synthetic tiers are parsed serially, then with `parse_doxygen_to_json(code, executor=...)`
+# on a warm pool of 2, 4 and one worker per cpu, and the results must be identical. The
+# work left to the parent process (cutting the code, sending the chunks, receiving and
+# decoding the blocks) is also timed in-process, which gives the serial fraction of the
+# parallel parse and its speedup projected by Amdahl's law. On a single cpu only the
+# projection is meaningful, the measured times then include the cost of the pool alone.
+
+import os, sys, time, pickle, marshal
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from gencle._doxygen import (
+    _MIN_BLOCKS_PER_CHUNK,
+    _parse_doxygen_blocks,
+    _parse_doxygen_blocks_parallel,
+    _read_doxygen_chunk,
+    _split_doxygen_chunks,
+)
+from _synthetic import synthetic_tier
+
+PROJECTED_WORKERS = [2, 4, 8]
+
+
+def _best(function, repeat: int = 5) -> tuple:
+    """Best time of a few runs, with the result of the last one."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def _serial_and_parallel_parts(code: str, workers: int) -> tuple:
+    """Time spent by the parent and by the workers in a parallel parse, measured in-process."""
+    chunks_count = min(workers * 4, code.count("/**") // _MIN_BLOCKS_PER_CHUNK)
+    split_time, chunks = _best(lambda: _split_doxygen_chunks(code, chunks_count))
+    send_time, sent = _best(lambda: [pickle.dumps(c, pickle.HIGHEST_PROTOCOL) for c in chunks])
+    # the workers decode their chunk, parse it and encode the marshalled blocks
+    work_time, results = _best(
+        lambda: [
+            pickle.dumps(_read_doxygen_chunk(pickle.loads(c)), pickle.HIGHEST_PROTOCOL)
+            for c in sent
+        ]
+    )
+    receive_time, _ = _best(lambda: [marshal.loads(pickle.loads(r)) for r in results])
+    return split_time + send_time + receive_time, work_time
+
+
+def bench(kernels: int) -> bool:
+    code = synthetic_tier(1, kernels)
+    cpus = os.cpu_count() or 1
+    print(f"synthetic tier: {kernels} kernels, {len(code)} bytes, {cpus} cpu(s)")
+    serial_time, expected = _best(lambda: _parse_doxygen_blocks(code))
+    print(f"  serial parse: {serial_time * 1e3:.1f} ms")
+    if code.count("/**") // _MIN_BLOCKS_PER_CHUNK < 2:
+        print(f"  fewer than {2 * _MIN_BLOCKS_PER_CHUNK} blocks, always parsed in-process")
+        return True
+
+    serial_part, parallel_part = _serial_and_parallel_parts(code, max(PROJECTED_WORKERS))
+    fraction = serial_part / (serial_part + parallel_part)
+    projected = ", ".join(
+        f"{n}: {serial_time / (serial_part + parallel_part / n):.2f}x" for n in PROJECTED_WORKERS
+    )
+    print(f"  parent {serial_part * 1e3:.1f} ms, workers {parallel_part * 1e3:.1f} ms in total")
+    print(f"  serial fraction {fraction:.1%}, projected speedup per workers: {projected}")
+
+    identical = True
+    for workers in sorted({2, 4, cpus} - {1}):
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # the update scripts parse in the pool they already run the checks in
+            _parse_doxygen_blocks_parallel(code, workers, executor)
+            elapsed, result = _best(
+                lambda: _parse_doxygen_blocks_parallel(code, workers, executor)
+            )
+        note = " (more workers than cpus)" if workers > cpus else ""
+        print(f"  {workers} workers: {elapsed * 1e3:.1f} ms, measured speedup {serial_time / elapsed:.2f}x{note}")
+        if result != expected:
+            print(f"  ! the parse with {workers} workers differs from the serial one")
+            identical = False
+    return identical
+
+
+if __name__ == "__main__":
+    sizes = [int(k) for k in sys.argv[1:]] or [100, 1000, 5000]
+    results = [bench(kernels) for kernels in sizes]
+    sys.exit(0 if all(results) else 1)
@@ -0,0 +1,129 @@
+# Per-call overhead of the generated pyclesperanto functions, default versus fast mode.
+#
+# usage: python benchmarks/bench_python_wrappers.py [number_of_calls]
+#
+# The generated modules are imported in a stub package whose backend does nothing, so
+# the timings only measure the Python layer. The stub `plugin_function` does the work of
+# the pyclesperanto one: it binds the arguments to the signature, resolves the device and
+# pushes the image arguments, which is most of the overhead of a call. The fast functions
+# are not decorated, they resolve the device and push their images inline.
+
+import os, sys, tempfile, timeit, importlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import gencle
+from _synthetic import synthetic_tier
+
+_STUB_MODULES = {
+    "__init__.py": "",
+    "_array.py": (
+        "class Image:\n"
+        "    device = None\n"
+        "Array = Image\n"
+        "def is_image(value):\n"
+        "    return isinstance(value, (Image, list, tuple))\n"
+    ),
+    "_core.py": (
+        "class Device:\n"
+        "    pass\n"
+        "_DEVICE = Device()\n"
+        "def get_device():\n"
+        "    return _DEVICE\n"
+    ),
+    "_memory.py": "def push(array, dtype=None, mtype=None, device=None):\n    return array\n",
+    "_utils.py": "def deprecated(message):\n    return lambda function: function\n",
+    # pyclesperanto plugin_function, without the toolz curry
+    "_decorators.py": (
+        "import inspect\n"
+        "from functools import wraps\n"
+        "from typing import get_args\n"
+        "from ._array import Array, Image, is_image\n"
+        "from ._core import Device, get_device\n"
+        "from ._memory import push\n"
+        "def plugin_function(function=None, categories=None, priority=0):\n"
+        "    if function is None:\n"
+        "        return lambda f: plugin_function(f, categories, priority)\n"
+        "    sig = inspect.signature(function)\n"
+        "    @wraps(function)\n"
+        "    def worker_function(*args, **kwargs):\n"
+        "        bound = sig.bind(*args, **kwargs)\n"
+        "        bound.apply_defaults()\n"
+        "        input_device = None\n"
+        "        input_image = None\n"
+        "        for value in bound.arguments.values():\n"
+        "            if input_device is None and isinstance(value, Device):\n"
+        "                input_device = value\n"
+        "            if input_image is None and is_image(value):\n"
+        "                input_image = value\n"
+        "            if input_device is not None and input_image is not None:\n"
+        "                break\n"
+        "        input_image_device = getattr(input_image, 'device', None)\n"
+        "        if not isinstance(input_image_device, Device):\n"
+        "            input_image_device = None\n"
+        "        use_device = input_device or input_image_device or get_device()\n"
+        "        for key, value in bound.arguments.items():\n"
+        "            ann = sig.parameters[key].annotation\n"
+        "            if is_image(value) and (ann is Image or Array in get_args(ann)):\n"
+        "                bound.arguments[key] = push(value, device=use_device)\n"
+        "            elif value is None and (ann is Device or Device in get_args(ann)):\n"
+        "                bound.arguments[key] = use_device\n"
+        "        return function(*bound.args, **bound.kwargs)\n"
+        "    worker_function.categories = categories\n"
+        "    worker_function.priority = priority\n"
+        "    return worker_function\n"
+    ),
+    "_backend.py": (
+        "class _StubBackend:\n"
+        "    def __getattr__(self, name):\n"
+        "        function = lambda *args: None\n"
+        "        setattr(self, name, function)\n"
+        "        return function\n"
+        "_active_backend = None\n"
+        "def _get_backend():\n"
+        "    global _active_backend\n"
+        "    if _active_backend is None:\n"
+        "        _active_backend = _StubBackend()\n"
+        "    return _active_backend\n"
+    ),
+}
+
+
+def _make_package(folder: str, name: str, function_list: list, fast: bool) -> None:
+    package = os.path.join(folder, name)
+    os.makedirs(package)
+    for filename, content in _STUB_MODULES.items():
+        with open(os.path.join(package, filename), "w") as file:
+            file.write(content)
+    with open(os.path.join(package, "_tier1.py"), "w") as file:
+        file.write(gencle.generate_python_file(function_list, 1, fast=fast))
+
+
+def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    function_list = gencle.parse_doxygen_to_json(synthetic_tier(1, 50))
+    function = next(f for f in function_list if len(f["parameters"]) >= 5)
+    name = function["name"]
+
+    with tempfile.TemporaryDirectory() as folder:
+        sys.path.insert(0, folder)
+        _make_package(folder, "stub_default", function_list, fast=False)
+        _make_package(folder, "stub_fast", function_list, fast=True)
+        print(f"per-call overhead of {name}({len(function['parameters'])} parameters), {calls} calls")
+        timings = {}
+        for package in ["stub_default", "stub_fast"]:
+            module = importlib.import_module(f"{package}._tier1")
+            kernel = getattr(module, name)
+            image_type = importlib.import_module(f"{package}._array").Image
+            # the device is optional in python, every other parameter without default is required
+            required = [p for p in function["parameters"][1:] if not p["default_value"].strip()]
+            arguments = [image_type() for _ in required]
+            seconds = min(timeit.repeat(lambda: kernel(*arguments), number=calls, repeat=5))
+            timings[package] = seconds
+            print(f"  {package:>14}: {seconds / calls * 1e9:8.1f} ns/call")
+        print(f"  fast mode is {timings['stub_default'] / timings['stub_fast']:.1f}x faster per call")
+
+
+if __name__ == "__main__":
+    main()
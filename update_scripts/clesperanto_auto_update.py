@@ -0,0 +1,126 @@
+import gencle
+import sys, argparse
+from contextlib import ExitStack
+from concurrent.futures import ProcessPoolExecutor
+
+
+def update_tier_code(
+    dst_repo: str, src_repo: str, tag: str, executor=None, sink=None, tier_source=None
+):
+    """
+    Update the header-only C++ API in the OUTPUT_REPO by reading the tier files from the SOURCE_REPO
+
+    Notes: tiers go through a pipeline where tier N+1 is downloaded while tier N is parsed,
+    rendered and checked, and tier N-1 is written. Files are only published by the sink once
+    every tier was generated without error.
+
+    Parameters
+    ----------
+    dst_repo : str
+        Path to the OUTPUT_REPO folder.
+    src_repo : str
+        Path to the SOURCE_REPO folder.
+    tag : str
+        Version tag to be used in the OUTPUT_REPO.
+    executor : Executor, optional
+        Process pool used to parse the large tier files and check the generated code, a new
+        one is started if None.
+    sink : OutputSink, optional
+        Destination of the files, closed by the caller. By default the files are written
+        in the OUTPUT_REPO folder.
+    tier_source : iterable, optional
+        Tier numbers and codes, in tier order, by default read from SOURCE_REPO at tag.
+
+    Returns
+    -------
+        None
+    """
+
+    include_folder = "include"
+
+    tiers = []
+    # names defined in cle::api by the tiers rendered so far, tiers come in order
+    defined_names = set()
+
+    def _render(item):
+        tier, code = item
+        tiers.append(tier)
+        functions_list = gencle.parse_doxygen_to_json(code, executor=executor)
+        names = gencle.list_cpp_api_names(functions_list)
+        shadowed_names = tuple(n for n in names if n in defined_names)
+        defined_names.update(names)
+
+        def _render_tier():
+            files = {
+                f"{include_folder}/cle_api_tier{tier}.hpp": gencle.generate_cpp_tier_header(
+                    tier, functions_list, defined_names=shadowed_names
+                ),
+            }
+            # fail before writing anything if the generated code is malformed
+            gencle.validate_generated_files(files, executor=executor)
+            return files
+
+        # files rendered from the same tier code by the same gencle sources are reused
+        return gencle.cached_render(
+            ("clesperanto", tier, gencle.content_hash(code), shadowed_names), _render_tier
+        )
+
+    def _write(files):
+        for path, content in files.items():
+            sink.write(path, content)
+
+    with ExitStack() as stack:
+        if sink is None:
+            sink = stack.enter_context(gencle.FileSystemSink(dst_repo))
+        if executor is None:
+            executor = stack.enter_context(ProcessPoolExecutor())
+        if tier_source is None:
+            tier_source = gencle.iter_clic_tier_from_github(repo=src_repo, branch=tag)
+        gencle.run_pipeline(tier_source, [_render, _write])
+        # the main header includes all tiers, it can only be rendered once they are all read
+        files = {
+            f"{include_folder}/cle_api_device.hpp": gencle.generate_cpp_device_header(),
+            f"{include_folder}/cle_api.hpp": gencle.generate_cpp_api_header(tiers),
+        }
+        gencle.validate_generated_files(files, max_workers=0)
+        _write(files)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Update the clesperanto C++ API in the given path to a version of CLIc.",
+        epilog="Example: python clesperanto_auto_update.py /path/to/clesperanto 1.2.3",
+    )
+    parser.add_argument("output_path", help="path to the clesperanto repository")
+    parser.add_argument("version_tag", help="CLIc tag to update to")
+    parser.add_argument(
+        "--git-branch",
+        default=None,
+        help="commit the update on this new branch of the repository instead of writing its files",
+    )
+    args = parser.parse_args()
+
+    output_path = args.output_path
+    version_tag = args.version_tag
+    source_repo = "clEsperanto/CLIc"
+
+    print("gencle: Updating clesperanto repo ...")
+    print(f"gencle: Reading from {source_repo} at tag {version_tag}")
+    print(f"gencle: Writing to {output_path}")
+    if args.git_branch:
+        sink = gencle.GitFastImportSink(
+            output_path, args.git_branch, message=f"Update to CLIc {version_tag}"
+        )
+    else:
+        sink = gencle.FileSystemSink(output_path)
+    try:
+        with sink:
+            update_tier_code(output_path, source_repo, version_tag, sink=sink)
+    except (gencle.GeneratedCodeError, gencle.FetchError) as error:
+        print(f"gencle: Abort, nothing was written. {error}")
+        sys.exit(1)
+    print("gencle: Done!")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,26 @@
 import gencle
-import os, sys
-
-def update_tier_code(dst_repo: str, src_repo: str, tag: str):
+import sys, argparse
+from contextlib import ExitStack
+from concurrent.futures import ProcessPoolExecutor
+
+def update_tier_code(
+    dst_repo: str,
+    src_repo: str,
+    tag: str,
+    executor=None,
+    sink=None,
+    primitive_arrays=False,
+    timing=False,
+    benchmarks=False,
+    copy_free=False,
+):
     """
     Update the tier code in the OUTPUT_REPO by reading the tier files from the SOURCE_REPO
 
+    Notes: tiers go through a pipeline where tier N+1 is downloaded while tier N is parsed,
+    rendered and checked, and tier N-1 is written. Files are only published by the sink once
+    every tier was generated without error.
+
     Parameters
     ----------
     dst_repo : str
@@ -13,36 +29,92 @@ def update_tier_code(dst_repo: str, src_repo: str, tag: str):
         Path to the SOURCE_REPO folder.
     tag : str
         Version tag to be used in the OUTPUT_REPO.
+    executor : Executor, optional
+        Process pool used to parse the large tier files and check the generated code, a new
+        one is started if None.
+    sink : OutputSink, optional
+        Destination of the files, closed by the caller. By default the files are written
+        in the OUTPUT_REPO folder.
+    primitive_arrays : bool, optional
+        If True, also generate the primitive-array variants of the java functions, the
+        native functions they call, and the class they use for their conversions.
+    timing : bool, optional
+        If True, time the java functions when the JVM is started with
+        `-Dnet.clesperanto.kernelTiming=true`, and generate the class holding the timings.
+    benchmarks : bool, optional
+        If True, also generate one JMH class per tier, timing its kernels.
+    copy_free : bool, optional
+        If True, the native functions take their vectors and strings by const reference
+        and move the vectors of arrays they return, instead of copying them.
 
     Returns
     -------
         None
     """
 
-    java_folder = os.path.join(dst_repo, "src/main/java/net/clesperanto/kernels")
-    source_folder = os.path.join(dst_repo, "native/clesperantoj/src")
-    header_folder = os.path.join(dst_repo, "native/clesperantoj/include")
+    java_folder = "src/main/java/net/clesperanto/kernels"
+    source_folder = "native/clesperantoj/src"
+    header_folder = "native/clesperantoj/include"
+    benchmark_folder = "src/test/java/net/clesperanto/benchmarks"
 
-    code_list, tier_list = gencle.read_clic_tier_from_github(repo=src_repo, branch=tag)
     header_file = []
-    for tier, code in zip(tier_list, code_list):
-        functions_list = gencle.parse_doxygen_to_json(code)
-        header, code = gencle.generate_native_tier_code(tier, functions_list)
-        source_filepath = os.path.join(source_folder, f"tier{tier}j.cpp")
-        gencle.write_file(source_filepath, code, overwrite=True)
-        header_file.append(header)
-    header_filepath = os.path.join(header_folder, f"kernelj.hpp")
-    header_code = gencle.merger_classes_in_header(header_file)
-    gencle.write_file(header_filepath, header_code, overwrite=True)
-
-    for tier, code in zip(tier_list, code_list):
-        functions_list = gencle.parse_doxygen_to_json(code)
-        java_tier = gencle.generate_java_class(tier, functions_list)
-        java_filepath = os.path.join(java_folder, f"Tier{tier}.java")
-        gencle.write_file(java_filepath, java_tier, overwrite=True)
-
-
-def update_version_file(dst_repo: str, tag: str):
+
+    def _render(item):
+        tier, code = item
+
+        def _render_tier():
+            functions_list = gencle.parse_doxygen_to_json(code, executor=executor)
+            header, source = gencle.generate_native_tier_code(
+                tier, functions_list, copy_free=copy_free, primitive_arrays=primitive_arrays
+            )
+            files = {
+                f"{source_folder}/tier{tier}j.cpp": source,
+                f"{java_folder}/Tier{tier}.java": gencle.generate_java_class(
+                    tier, functions_list, primitive_arrays=primitive_arrays, timing=timing
+                ),
+            }
+            if benchmarks:
+                files[f"{benchmark_folder}/Tier{tier}Benchmark.java"] = gencle.generate_jmh_benchmark_class(
+                    functions_list, tier
+                )
+            # fail before writing anything if the generated code is malformed
+            gencle.validate_generated_files(files, executor=executor)
+            return {"header": header, "files": files}
+
+        # files rendered from the same tier code by the same gencle sources are reused
+        rendered = gencle.cached_render(
+            ("clesperantoj", tier, gencle.content_hash(code), primitive_arrays, timing, benchmarks, copy_free),
+            _render_tier,
+        )
+        header_file.append(rendered["header"])
+        return rendered["files"]
+
+    def _write(files):
+        for path, content in files.items():
+            sink.write(path, content)
+
+    with ExitStack() as stack:
+        if sink is None:
+            sink = stack.enter_context(gencle.FileSystemSink(dst_repo))
+        if executor is None:
+            executor = stack.enter_context(ProcessPoolExecutor())
+        gencle.run_pipeline(
+            gencle.iter_clic_tier_from_github(repo=src_repo, branch=tag),
+            [_render, _write],
+        )
+        # the header gathers all tiers, it can only be rendered once they are all parsed
+        header_path = f"{header_folder}/kernelj.hpp"
+        header_code = gencle.merger_classes_in_header(header_file, primitive_arrays=primitive_arrays)
+        files = {header_path: header_code}
+        if primitive_arrays:
+            files[f"{java_folder}/PrimitiveArrays.java"] = gencle.generate_java_primitive_arrays_class()
+        if timing:
+            files[f"{java_folder}/KernelTiming.java"] = gencle.generate_java_kernel_timing_class()
+        gencle.validate_generated_files(files, max_workers=0)
+        _write(files)
+
+
+def update_version_file(dst_repo: str, tag: str, sink=None):
     """
     Update the CLIc version tag.
 
@@ -52,50 +124,95 @@ def update_version_file(dst_repo: str, tag: str):
         Path to the OUTPUT_REPO folder.
     tag : str
         Version tag to be used in the OUTPUT_REPO.
+    sink : OutputSink, optional
+        Destination of the file, closed by the caller. By default the file is updated
+        in the OUTPUT_REPO folder.
 
     Returns
     -------
         None
     """
+    with ExitStack() as stack:
+        if sink is None:
+            sink = stack.enter_context(gencle.FileSystemSink(dst_repo))
+        xml_path = "pom.xml"
+        content = sink.read(xml_path)
 
-    xml_file = os.path.join(dst_repo, "pom.xml")
-
-    if not os.path.exists(xml_file):
-        print(f"gencle: Fail updating CLIc version. Could not find {xml_file}")
-        return
-
-    # read the file xml_file
-    with open(xml_file, "r") as file:
-        data = file.readlines()
-    for i, line in enumerate(data):
-        if "<clic.version>" in line:
-            data[i] = f"        <clic.version>{tag}</clic.version>\n"
-            break
-    
-    with open(xml_file, "w") as file:
-        file.writelines(data)
-
-
-
+        if content is None:
+            print(f"gencle: Fail updating CLIc version. Could not find {xml_path}")
+            return
 
+        data = content.splitlines(keepends=True)
+        for i, line in enumerate(data):
+            if "<clic.version>" in line:
+                data[i] = f"        <clic.version>{tag}</clic.version>\n"
+                break
+        sink.write(xml_path, "".join(data))
 
 
 def main():
-    if len(sys.argv) != 3:
-        print("Usage: python clesperantoj_auto_update.py <OUTPUT_PATH> <VERSION_TAG>")
-        print("Example: python clesperantoj_auto_update.py /path/to/clesperantoj 1.2.3")
-        print("This script will update the clesperantoj repository in the given path to version 1.2.3 of CLIc.")
-        sys.exit(1)
-
-    output_path = sys.argv[1]
-    version_tag = sys.argv[2]
+    parser = argparse.ArgumentParser(
+        description="Update the clesperantoj repository in the given path to a version of CLIc.",
+        epilog="Example: python clesperantoj_auto_update.py /path/to/clesperantoj 1.2.3",
+    )
+    parser.add_argument("output_path", help="path to the clesperantoj repository")
+    parser.add_argument("version_tag", help="CLIc tag to update to")
+    parser.add_argument(
+        "--git-branch",
+        default=None,
+        help="commit the update on this new branch of the repository instead of writing its files",
+    )
+    parser.add_argument(
+        "--primitive-arrays",
+        action="store_true",
+        help="also generate variants of the java functions taking and returning primitive arrays",
+    )
+    parser.add_argument(
+        "--timing",
+        action="store_true",
+        help="time the java functions when the JVM runs with -Dnet.clesperanto.kernelTiming=true",
+    )
+    parser.add_argument(
+        "--benchmarks",
+        action="store_true",
+        help="also generate JMH classes timing the kernels of each tier",
+    )
+    parser.add_argument(
+        "--copy-free",
+        action="store_true",
+        help="pass vectors and strings to the native functions by const reference instead of by copy",
+    )
+    args = parser.parse_args()
+
+    output_path = args.output_path
+    version_tag = args.version_tag
     source_repo = "clEsperanto/CLIc"
 
     print("gencle: Updating clesperantoj repo ...")
     print(f"gencle: Reading from {source_repo} at tag {version_tag}")
     print(f"gencle: Writing to {output_path}")
-    update_tier_code(output_path, source_repo, version_tag)
-    update_version_file(output_path, version_tag)
+    if args.git_branch:
+        sink = gencle.GitFastImportSink(
+            output_path, args.git_branch, message=f"Update to CLIc {version_tag}"
+        )
+    else:
+        sink = gencle.FileSystemSink(output_path)
+    try:
+        with sink:
+            update_tier_code(
+                output_path,
+                source_repo,
+                version_tag,
+                sink=sink,
+                primitive_arrays=args.primitive_arrays,
+                timing=args.timing,
+                benchmarks=args.benchmarks,
+                copy_free=args.copy_free,
+            )
+            update_version_file(output_path, version_tag, sink=sink)
+    except (gencle.GeneratedCodeError, gencle.FetchError) as error:
+        print(f"gencle: Abort, nothing was written. {error}")
+        sys.exit(1)
     print("gencle: Done!")
 
 
@@ -1,7 +1,8 @@
 import gencle
-import os, sys
+import sys, argparse
+from contextlib import ExitStack
 
-def generate_clij_code(source_repo: str, version_tag:str) -> str:
+def generate_clij_code(source_repo: str, version_tag:str, batch_push: bool = False) -> str:
     """
     Generate CLIJ code from the clesperantoj repo.
     
@@ -11,6 +12,8 @@ def generate_clij_code(source_repo: str, version_tag:str) -> str:
         Source repository to read from.
     version_tag : str
         Version tag to read from the source repository.
+    batch_push : bool, optional
+        If True, push the input images of a call with a single de-duplicating call.
     
     Returns
     -------
@@ -23,10 +26,10 @@ def generate_clij_code(source_repo: str, version_tag:str) -> str:
         repo=source_repo, branch=version_tag
     )
     # generate clij code from tier content
-    return gencle.generate_clij_code_per_tier(files, tiers)
+    return gencle.generate_clij_code_per_tier(files, tiers, batch_push=batch_push)
 
 
-def update_clij_code(code: str, output_path: str) -> bool:
+def update_clij_code(code: str, output_path: str, sink=None, batch_push: bool = False) -> bool:
     """
     Create (or replace) the CLIJ3Ops.java file in the OUTPUT_REPO with the new code.
     
@@ -36,6 +39,11 @@ def update_clij_code(code: str, output_path: str) -> bool:
         New code to be updated.
     output_path : str
         Path to the OUTPUT_REPO folder.
+    sink : OutputSink, optional
+        Destination of the file, closed by the caller. By default the file is written
+        in the OUTPUT_REPO folder.
+    batch_push : bool, optional
+        If True, add the push helpers used by code generated with `batch_push`.
         
     Returns
     -------
@@ -43,34 +51,47 @@ def update_clij_code(code: str, output_path: str) -> bool:
         True if the file was updated successfully, False otherwise.
     """
     
-    # read CLIJ3.java file
-    clij_file_path = os.path.join(
-        output_path, "src/main/java/net/clesperanto/CLIJ3Ops.java"
-    )
-    # clij_class = gencle.read_file(clij_file_path)
+    # CLIJ3.java file
+    clij_path = "src/main/java/net/clesperanto/CLIJ3Ops.java"
 
     # update CLIJ3.java file with new code
-    new_code = gencle.update_clij3_code(code)
-    return gencle.write_file(clij_file_path, new_code, overwrite=True)
+    new_code = gencle.update_clij3_code(code, batch_push=batch_push)
+    # fail before writing if the generated code is malformed
+    gencle.validate_generated_files({clij_path: new_code})
+    with ExitStack() as stack:
+        if sink is None:
+            sink = stack.enter_context(gencle.FileSystemSink(output_path))
+        sink.write(clij_path, new_code)
+    return True
 
 
 def main():
+    parser = argparse.ArgumentParser(
+        description="Update the clij3 repository in the given path to a version of clesperantoj.",
+        epilog="Example: python clij3_auto_update.py /path/to/clij3 1.2.3",
+    )
+    parser.add_argument("output_path", help="path to the clij3 repository")
+    parser.add_argument("version_tag", help="clesperantoj tag to update to")
+    parser.add_argument(
+        "--batch-push",
+        action="store_true",
+        help="push the input images of a call with a single de-duplicating call",
+    )
+    args = parser.parse_args()
 
-    if len(sys.argv) != 3:
-        print("Usage: python clij3_auto_update.py <OUTPUT_PATH> <VERSION_TAG>")
-        print("Example: python clij3_auto_update.py /path/to/clesperantoj 1.2.3")
-        print("This script will update the clij3 repository in the given path to version 1.2.3 of clesperantoj.")
-        sys.exit(1)
-
-    output_path = sys.argv[1]
-    version_tag = sys.argv[2]
+    output_path = args.output_path
+    version_tag = args.version_tag
     source_repo = "clesperanto/clesperantoj_prototype"
 
     print("gencle: Updating CLIJ3 repo ...")
     print(f"gencle: Reading from {source_repo} at tag {version_tag}")
     print(f"gencle: Writing to {output_path}")
-    code = generate_clij_code(source_repo, version_tag)
-    update_clij_code(code, output_path)
+    try:
+        code = generate_clij_code(source_repo, version_tag, batch_push=args.batch_push)
+        update_clij_code(code, output_path, batch_push=args.batch_push)
+    except (gencle.GeneratedCodeError, gencle.FetchError) as error:
+        print(f"gencle: Abort, nothing was written. {error}")
+        sys.exit(1)
     print("gencle: Done!")
 
 
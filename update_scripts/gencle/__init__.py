@@ -1,19 +1,86 @@
 from ._io import (
     read_clic_tier_from_github,
+    iter_clic_tier_from_github,
     read_clej_tier_from_github,
+    read_clic_kernels,
+    list_clic_tags,
+    resolve_tags,
+    tag_sort_key,
     list_tier_files,
     read_file,
     write_json_file,
     write_file,
+    write_staged_file,
+    commit_staged_files,
+    discard_staged_files,
 )
 
+from ._fetch import Fetcher, FetchError, configure_fetch, get_fetcher
+
+from ._cache import clear_caches, cached_render, content_hash, generator_fingerprint
+
+from ._bundle import CacheBundleError, export_cache_bundle, import_cache_bundle
+
 from ._doxygen import parse_doxygen_to_json, clear_doxygen_blocks
 
-from ._genpy import generate_wrapper_file, generate_python_file
+from ._diff import diff_kernel_lists, diff_to_json, diff_to_markdown
+
+from ._index import KernelIndex, default_index_path
+
+from ._pipeline import run_pipeline
+
+from ._sinks import (
+    OutputSink,
+    FileSystemSink,
+    MemorySink,
+    ArchiveSink,
+    GitFastImportSink,
+)
+
+from ._validate import (
+    GeneratedCodeError,
+    validate_file,
+    validate_generated_files,
+)
+
+from ._genpy import (
+    generate_wrapper_file,
+    generate_python_file,
+    generate_registration_table,
+    generate_docstrings_json,
+    generate_lazy_index_file,
+    generate_deferred_module,
+)
+from ._registry import (
+    generate_kernel_registry,
+    generate_registry_json,
+    generate_registry_file,
+)
 from ._genj import (
     generate_native_tier_code,
     merger_classes_in_header,
     generate_java_class,
+    generate_java_primitive_arrays_class,
+)
+
+from ._gencpp import (
+    generate_cpp_device_header,
+    generate_cpp_tier_header,
+    generate_cpp_api_header,
+    list_cpp_api_names,
+)
+
+from ._genbench import (
+    DEFAULT_BENCHMARK_SHAPES,
+    generate_pytest_benchmark_file,
+    generate_jmh_benchmark_class,
+)
+
+from ._timing import (
+    kernel_timing_key,
+    generate_kernel_timing_header,
+    generate_timing_wrapper_file,
+    generate_java_kernel_timing_class,
 )
 
 from ._genclij import (
@@ -0,0 +1,128 @@
+# Command line interface of gencle: python -m gencle <command> ...
+
+import argparse
+import sys
+
+import gencle
+
+
+def _diff(args) -> int:
+    old_kernels = gencle.read_clic_kernels(repo=args.repo, branch=args.old_tag)
+    new_kernels = gencle.read_clic_kernels(repo=args.repo, branch=args.new_tag)
+    if not old_kernels or not new_kernels:
+        missing = args.old_tag if not old_kernels else args.new_tag
+        print(f"gencle: Could not read any tier file of {args.repo} at {missing}", file=sys.stderr)
+        return 1
+    diff = gencle.diff_kernel_lists(old_kernels, new_kernels)
+    if args.format == "json":
+        print(gencle.diff_to_json(diff))
+    else:
+        print(gencle.diff_to_markdown(diff, args.old_tag, args.new_tag))
+    return 0
+
+
+def _cache_export(args) -> int:
+    try:
+        manifest = gencle.export_cache_bundle(args.bundle, folder=args.cache_dir, tag=args.tag)
+    except gencle.CacheBundleError as error:
+        print(f"gencle: Fail exporting cache. {error}", file=sys.stderr)
+        return 1
+    print(f"gencle: Exported {len(manifest['files'])} cache entries to {args.bundle}")
+    return 0
+
+
+def _cache_import(args) -> int:
+    try:
+        manifest = gencle.import_cache_bundle(args.bundle, folder=args.cache_dir, tag=args.tag)
+    except gencle.CacheBundleError as error:
+        print(f"gencle: Fail importing cache, starting cold. {error}", file=sys.stderr)
+        return 1
+    print(f"gencle: Imported {len(manifest['files'])} cache entries from {args.bundle}")
+    if manifest.get("fingerprint") != gencle.generator_fingerprint():
+        print("gencle: Bundle was rendered by other gencle sources, rendered files will be regenerated")
+    return 0
+
+
+def _index(args) -> int:
+    with gencle.KernelIndex(args.db) as index:
+        if args.index_command == "update":
+            tags = gencle.resolve_tags(args.tags, repo=args.repo) if args.tags else None
+            added = index.update(repo=args.repo, tags=tags)
+            print(f"gencle: Indexed {len(added)} new tags, {len(index.tags())} tags in {index.path}")
+        elif args.index_command == "tags":
+            print("\n".join(index.tags()))
+        elif args.index_command == "introduced":
+            if args.parameter:
+                tag = index.parameter_introduced(args.kernel, args.parameter)
+                subject = f"parameter '{args.parameter}' of '{args.kernel}'"
+            else:
+                tag = index.kernel_introduced(args.kernel)
+                subject = f"kernel '{args.kernel}'"
+            if tag is None:
+                print(f"gencle: No indexed tag has the {subject}", file=sys.stderr)
+                return 1
+            print(tag)
+        elif args.index_command == "deprecations":
+            for row in index.deprecations_per_tag():
+                new = f" (new: {', '.join(row['newly_deprecated'])})" if row["newly_deprecated"] else ""
+                print(f"{row['tag']}: {row['deprecated']}/{row['kernels']} deprecated{new}")
+        elif args.index_command == "history":
+            history = index.kernel_history(args.kernel)
+            if not history:
+                print(f"gencle: No indexed tag has the kernel '{args.kernel}'", file=sys.stderr)
+                return 1
+            for row in history:
+                parameters = ", ".join(p["name"] for p in row["parameters"])
+                deprecated = " [deprecated]" if row["deprecation"] else ""
+                print(f"{row['tag']}: tier{row['tier']} {args.kernel}({parameters}) -> {row['return']}{deprecated}")
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="gencle", description="clEsperanto code generator tools.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    diff_parser = commands.add_parser("diff", help="structural API diff between two CLIc tags")
+    diff_parser.add_argument("old_tag")
+    diff_parser.add_argument("new_tag")
+    diff_parser.add_argument("--repo", default="clEsperanto/CLIc")
+    diff_parser.add_argument("--format", choices=["markdown", "json"], default="markdown")
+    diff_parser.set_defaults(func=_diff)
+
+    cache_parser = commands.add_parser("cache", help="share the persistent caches between jobs")
+    cache_commands = cache_parser.add_subparsers(dest="cache_command", required=True)
+    for name, func, help in [
+        ("export", _cache_export, "pack the cache folder into a bundle"),
+        ("import", _cache_import, "check a bundle and unpack it into the cache folder"),
+    ]:
+        cache_command = cache_commands.add_parser(name, help=help)
+        cache_command.add_argument("bundle", help="path of the .tar.gz bundle")
+        cache_command.add_argument(
+            "--cache-dir", default=None, help="cache folder, by default $GENCLE_CACHE_DIR"
+        )
+        cache_command.add_argument("--tag", default=None, help="CLIc tag of the cache")
+        cache_command.set_defaults(func=func)
+
+    index_parser = commands.add_parser("index", help="query the local index of the kernels of every CLIc tag")
+    index_parser.add_argument("--db", default=None, help="index file, by default in the gencle cache folder")
+    index_parser.set_defaults(func=_index)
+    index_commands = index_parser.add_subparsers(dest="index_command", required=True)
+    update_parser = index_commands.add_parser("update", help="fetch and index the tags missing in the index")
+    update_parser.add_argument("tags", nargs="*", help="tags or tag ranges first..last, by default all tags")
+    update_parser.add_argument("--repo", default="clEsperanto/CLIc")
+    index_commands.add_parser("tags", help="list the indexed tags")
+    introduced_parser = index_commands.add_parser(
+        "introduced", help="first tag with a kernel, or with a parameter of a kernel"
+    )
+    introduced_parser.add_argument("kernel")
+    introduced_parser.add_argument("parameter", nargs="?", default=None)
+    index_commands.add_parser("deprecations", help="number of deprecated kernels per tag")
+    history_parser = index_commands.add_parser("history", help="signature of a kernel in every tag")
+    history_parser.add_argument("kernel")
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,168 @@
+# This module is in charge of packing the persistent caches into archives shared between jobs.
+
+import hashlib
+import io
+import json
+import os
+import re
+import tarfile
+import time
+from typing import Optional
+
+from ._cache import CACHE_NAMES, cache_dir, generator_fingerprint
+
+BUNDLE_FORMAT_VERSION = 1
+
+_MANIFEST_NAME = "manifest.json"
+_ENTRY_NAME = re.compile(r"^(%s)/[0-9a-f]{64}\.json$" % "|".join(CACHE_NAMES))
+
+
+class CacheBundleError(ValueError):
+    """Raised when a cache bundle can not be imported."""
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _resolve_cache_dir(folder: Optional[str]) -> str:
+    folder = folder or cache_dir()
+    if folder is None:
+        raise CacheBundleError(
+            "no cache folder, set GENCLE_CACHE_DIR or give the folder explicitly"
+        )
+    return folder
+
+
+def export_cache_bundle(
+    bundle_path: str, folder: Optional[str] = None, tag: Optional[str] = None
+) -> dict:
+    """Pack the persistent caches into a single tar.gz archive.
+
+    Notes: the archive holds a manifest with the bundle format version, the fingerprint of
+    the gencle sources, the optional tag, and the sha256 of every cache entry.
+
+    Parameters
+    ----------
+    bundle_path : str
+        Path of the archive to write.
+    folder : str, optional
+        Cache folder, by default the one set by `GENCLE_CACHE_DIR`.
+    tag : str, optional
+        CLIc tag the cache was warmed with, checked on import if given.
+
+    Returns
+    -------
+    dict
+        Manifest of the bundle.
+    """
+    folder = _resolve_cache_dir(folder)
+    entries = {}
+    for name in CACHE_NAMES:
+        sub_folder = os.path.join(folder, name)
+        if not os.path.isdir(sub_folder):
+            continue
+        for filename in sorted(os.listdir(sub_folder)):
+            arcname = f"{name}/{filename}"
+            if _ENTRY_NAME.match(arcname):
+                with open(os.path.join(sub_folder, filename), "rb") as file:
+                    entries[arcname] = file.read()
+    manifest = {
+        "format_version": BUNDLE_FORMAT_VERSION,
+        "fingerprint": generator_fingerprint(),
+        "tag": tag,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "files": {arcname: _sha256(data) for arcname, data in entries.items()},
+    }
+
+    def _add(archive, arcname, data):
+        info = tarfile.TarInfo(arcname)
+        info.size = len(data)
+        archive.addfile(info, io.BytesIO(data))
+
+    if os.path.dirname(bundle_path):
+        os.makedirs(os.path.dirname(bundle_path), exist_ok=True)
+    with tarfile.open(bundle_path, "w:gz") as archive:
+        _add(archive, _MANIFEST_NAME, json.dumps(manifest, indent=1).encode("utf-8"))
+        for arcname, data in entries.items():
+            _add(archive, arcname, data)
+    return manifest
+
+
+def import_cache_bundle(
+    bundle_path: str, folder: Optional[str] = None, tag: Optional[str] = None
+) -> dict:
+    """Check a cache bundle against its manifest and unpack it into the cache folder.
+
+    Notes: nothing is written unless the whole bundle is valid. Entries rendered by other
+    gencle sources are unpacked but never used, as the fingerprint is part of their key.
+
+    Parameters
+    ----------
+    bundle_path : str
+        Path of the archive written by `export_cache_bundle`.
+    folder : str, optional
+        Cache folder, by default the one set by `GENCLE_CACHE_DIR`.
+    tag : str, optional
+        If given, the bundle must have been exported for this tag.
+
+    Returns
+    -------
+    dict
+        Manifest of the bundle.
+
+    Raises
+    ------
+    CacheBundleError
+        If the archive is unreadable, of another format version, exported for another
+        tag, or if any entry is unexpected, missing or does not match its checksum.
+    """
+    folder = _resolve_cache_dir(folder)
+    try:
+        with tarfile.open(bundle_path, "r:gz") as archive:
+            members = {}
+            for member in archive.getmembers():
+                if member.isdir():
+                    continue
+                if not member.isfile():
+                    raise CacheBundleError(f"unexpected entry in bundle: {member.name}")
+                members[member.name] = archive.extractfile(member).read()
+    except (OSError, tarfile.TarError) as error:
+        raise CacheBundleError(f"could not read bundle {bundle_path}: {error}") from error
+
+    if _MANIFEST_NAME not in members:
+        raise CacheBundleError("bundle has no manifest")
+    try:
+        manifest = json.loads(members.pop(_MANIFEST_NAME).decode("utf-8"))
+    except ValueError as error:
+        raise CacheBundleError(f"unreadable manifest: {error}") from error
+    if manifest.get("format_version") != BUNDLE_FORMAT_VERSION:
+        raise CacheBundleError(
+            f"bundle format {manifest.get('format_version')} is not supported, "
+            f"expected {BUNDLE_FORMAT_VERSION}"
+        )
+    if tag is not None and manifest.get("tag") != tag:
+        raise CacheBundleError(f"bundle was exported for tag {manifest.get('tag')}, not {tag}")
+
+    checksums = manifest.get("files", {})
+    issues = []
+    for arcname in sorted(set(checksums) | set(members)):
+        if not _ENTRY_NAME.match(arcname):
+            issues.append(f"{arcname}: unexpected entry")
+        elif arcname not in members:
+            issues.append(f"{arcname}: missing")
+        elif arcname not in checksums:
+            issues.append(f"{arcname}: not in manifest")
+        elif _sha256(members[arcname]) != checksums[arcname]:
+            issues.append(f"{arcname}: checksum mismatch")
+    if issues:
+        raise CacheBundleError("corrupted bundle:\n" + "\n".join(issues))
+
+    for arcname, data in members.items():
+        filepath = os.path.join(folder, *arcname.split("/"))
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+        temporary_path = f"{filepath}.{os.getpid()}.tmp"
+        with open(temporary_path, "wb") as file:
+            file.write(data)
+        os.replace(temporary_path, filepath)
+    return manifest
@@ -0,0 +1,201 @@
+# This module is in charge of the caches shared by the fetch, parse and render steps.
+
+import copy
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+# folder persisting the caches across processes, e.g. to share a warm cache between CI jobs
+CACHE_DIR_ENV = "GENCLE_CACHE_DIR"
+
+
+def cache_dir() -> Optional[str]:
+    """Return the folder of the persistent caches, None if `GENCLE_CACHE_DIR` is not set."""
+    return os.environ.get(CACHE_DIR_ENV) or None
+
+
+def _entry_path(folder: str, name: str, key) -> str:
+    return os.path.join(folder, name, content_hash(repr(key)) + ".json")
+
+
+class LRUCache:
+    """Thread-safe bounded cache dropping the least recently used entries first.
+
+    Notes: a named cache is also persisted as one json file per entry in the `name`
+    sub-folder of `cache_dir()`, if set. Entries missing in memory are then read from
+    disk. None values are never persisted, and `persist=False` keeps an entry in memory
+    only, on both get and put.
+
+    Parameters
+    ----------
+    maxsize : int, optional
+        Maximum number of entries kept in memory, by default 64.
+    name : str, optional
+        Name of the sub-folder persisting the cache, by default None (memory only).
+    """
+
+    def __init__(self, maxsize: int = 64, name: Optional[str] = None):
+        self.maxsize = maxsize
+        self.name = name
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _read_disk(self, key):
+        folder = cache_dir()
+        if self.name is None or folder is None:
+            return None
+        try:
+            with open(_entry_path(folder, self.name, key), "r") as file:
+                entry = json.load(file)
+        except (OSError, ValueError):
+            return None
+        # the file name is a hash of the key, the key itself guards against collisions
+        if entry.get("key") != repr(key):
+            return None
+        return entry.get("value")
+
+    def _write_disk(self, key, value) -> None:
+        folder = cache_dir()
+        if self.name is None or folder is None or value is None:
+            return
+        filepath = _entry_path(folder, self.name, key)
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+        temporary_path = f"{filepath}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporary_path, "w") as file:
+            json.dump({"key": repr(key), "value": value}, file)
+        os.replace(temporary_path, filepath)
+
+    def _put_memory(self, key, value) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get(self, key, default=None, persist: bool = True):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                return self._data[key]
+        value = self._read_disk(key) if persist else None
+        if value is None:
+            return default
+        self._put_memory(key, value)
+        return value
+
+    def put(self, key, value, persist: bool = True) -> None:
+        self._put_memory(key, value)
+        if persist:
+            self._write_disk(key, value)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __contains__(self, key) -> bool:
+        with self._lock:
+            if key in self._data:
+                return True
+        return self.get(key) is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+
+# raw file contents indexed by url, None marks a missing file, only immutable urls persist
+fetch_cache = LRUCache(maxsize=256, name="fetch")
+
+# parsed function lists indexed by the parser name and the hash of the parsed code
+parse_cache = LRUCache(maxsize=64, name="parse")
+
+# rendered files indexed by the generator fingerprint and a key given by the caller
+render_cache = LRUCache(maxsize=64, name="render")
+
+CACHE_NAMES = ("fetch", "parse", "render")
+
+_fingerprint = None
+
+
+def content_hash(content: str) -> str:
+    """Return the sha256 hex digest of a string."""
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def cached_parse(code: str, parser, parse=None) -> list:
+    """Parse code with parser, reusing the result of a previous parse of the same code.
+
+    Notes: a deep copy is returned as the generators modify the function dictionaries.
+
+    Parameters
+    ----------
+    code : str
+        Code to be parsed.
+    parser : callable
+        Function parsing the code into a list of function dictionaries.
+    parse : callable, optional
+        Function giving the same result as parser, called instead of it on a cache miss,
+        e.g. a parallel version sharing its cache entries.
+
+    Returns
+    -------
+    list
+        List of parsed function dictionaries.
+    """
+    key = (parser.__name__, content_hash(code))
+    functions = parse_cache.get(key)
+    if functions is None:
+        functions = (parse or parser)(code)
+        parse_cache.put(key, functions)
+    return copy.deepcopy(functions)
+
+
+def generator_fingerprint() -> str:
+    """Return a hash of the gencle sources, rendered files depend on it."""
+    global _fingerprint
+    if _fingerprint is None:
+        digest = hashlib.sha256()
+        folder = os.path.dirname(os.path.abspath(__file__))
+        for filename in sorted(os.listdir(folder)):
+            if filename.endswith(".py"):
+                with open(os.path.join(folder, filename), "rb") as file:
+                    digest.update(filename.encode("utf-8") + b"\0" + file.read())
+        _fingerprint = digest.hexdigest()
+    return _fingerprint
+
+
+def cached_render(key: tuple, render):
+    """Render files with render, reusing the result of a previous render with the same key.
+
+    Notes: the key must identify the inputs of render, e.g. the name of the target, the
+    tier and the hash of the tier code. The fingerprint of the gencle sources is added to
+    it, so a change of the generators never reuses files rendered by a previous version.
+
+    Parameters
+    ----------
+    key : tuple
+        Identifier of the inputs of render.
+    render : callable
+        Function without argument returning json serializable content.
+
+    Returns
+    -------
+    object
+        Rendered content.
+    """
+    key = (generator_fingerprint(),) + tuple(key)
+    content = render_cache.get(key)
+    if content is None:
+        content = render()
+        render_cache.put(key, content)
+    return copy.deepcopy(content)
+
+
+def clear_caches() -> None:
+    """Empty all in-process caches, the persistent caches are left untouched."""
+    fetch_cache.clear()
+    parse_cache.clear()
+    render_cache.clear()
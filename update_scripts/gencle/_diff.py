@@ -0,0 +1,219 @@
+# This module is in charge of comparing the kernel lists parsed from two CLIc versions.
+
+import hashlib
+import json
+
+
+def _kernel_name(function_dict: dict) -> str:
+    return function_dict["name"].replace("_func", "").strip()
+
+
+def _hash(data) -> str:
+    return hashlib.sha1(json.dumps(data, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _signature_hash(function_dict: dict) -> str:
+    """Hash of the callable signature of a kernel (parameters and return), independent of its name."""
+    parameters = [
+        (p["name"], p["type"], p["default_value"]) for p in function_dict["parameters"]
+    ]
+    return _hash([parameters, function_dict["return"]])
+
+
+def _kernel_hash(function_dict: dict) -> str:
+    """Hash of everything the diff reports on for a kernel."""
+    return _hash(
+        [
+            _signature_hash(function_dict),
+            function_dict.get("tier"),
+            bool(function_dict.get("deprecation")),
+        ]
+    )
+
+
+def _index_kernels(function_list: list) -> dict:
+    """Index kernels by label, so that kernels sharing a name in different tiers are all kept."""
+    return {_kernel_label(f): f for f in function_list}
+
+
+def _kernel_label(function_dict: dict) -> str:
+    """Name of a kernel qualified by its tier as 'tier{N}.{name}', or its bare name without tier."""
+    tier = function_dict.get("tier")
+    name = _kernel_name(function_dict)
+    return name if tier is None else f"tier{tier}.{name}"
+
+
+def _diff_parameters(old: dict, new: dict) -> dict:
+    """Compare the parameters and return type of two versions of the same kernel."""
+    old_params = {p["name"]: p for p in old["parameters"]}
+    new_params = {p["name"]: p for p in new["parameters"]}
+    changes = {}
+
+    added = [name for name in new_params if name not in old_params]
+    removed = [name for name in old_params if name not in new_params]
+    if added:
+        changes["parameters_added"] = added
+    if removed:
+        changes["parameters_removed"] = removed
+
+    type_changes = []
+    default_changes = []
+    for name, p in new_params.items():
+        if name not in old_params:
+            continue
+        q = old_params[name]
+        if q["type"] != p["type"]:
+            type_changes.append({"parameter": name, "from": q["type"], "to": p["type"]})
+        if q["default_value"] != p["default_value"]:
+            default_changes.append(
+                {"parameter": name, "from": q["default_value"], "to": p["default_value"]}
+            )
+    if type_changes:
+        changes["type_changes"] = type_changes
+    if default_changes:
+        changes["default_changes"] = default_changes
+
+    old_order = [name for name in old_params if name in new_params]
+    new_order = [name for name in new_params if name in old_params]
+    if old_order != new_order:
+        changes["order_changed"] = {"from": old_order, "to": new_order}
+
+    if old["return"] != new["return"]:
+        changes["return"] = {"from": old["return"], "to": new["return"]}
+    if old.get("tier") != new.get("tier"):
+        changes["tier"] = {"from": old.get("tier"), "to": new.get("tier")}
+    return changes
+
+
+def diff_kernel_lists(old_list: list, new_list: list) -> dict:
+    """Compare two lists of parsed kernels structurally.
+
+    Notes: kernels are matched by tier and name, and reported as 'tier{N}.{name}' when
+    they have a tier. Removed and added kernels sharing the same signature hash are then
+    reported as renamed, which includes kernels moved to another tier. Runs in linear time in the number of kernels.
+
+    Parameters
+    ----------
+    old_list : list
+        Function dictionaries of the old version, optionally with a 'tier' key.
+    new_list : list
+        Function dictionaries of the new version, optionally with a 'tier' key.
+
+    Returns
+    -------
+    dict
+        Added, removed, renamed, deprecated, undeprecated and changed kernels.
+    """
+    old_kernels = _index_kernels(old_list)
+    new_kernels = _index_kernels(new_list)
+
+    added = [name for name in new_kernels if name not in old_kernels]
+    removed = [name for name in old_kernels if name not in new_kernels]
+
+    # pair removed and added kernels with identical signatures as renames
+    added_by_signature = {}
+    for name in added:
+        added_by_signature.setdefault(_signature_hash(new_kernels[name]), []).append(name)
+    renamed = []
+    for name in removed:
+        candidates = added_by_signature.get(_signature_hash(old_kernels[name]))
+        if candidates:
+            renamed.append({"from": name, "to": candidates.pop(0)})
+    renamed_from = {r["from"] for r in renamed}
+    renamed_to = {r["to"] for r in renamed}
+    added = [name for name in added if name not in renamed_to]
+    removed = [name for name in removed if name not in renamed_from]
+
+    deprecated = []
+    undeprecated = []
+    changed = []
+    for name, new in new_kernels.items():
+        old = old_kernels.get(name)
+        if old is None or _kernel_hash(old) == _kernel_hash(new):
+            continue
+        if new.get("deprecation") and not old.get("deprecation"):
+            deprecated.append(name)
+        elif old.get("deprecation") and not new.get("deprecation"):
+            undeprecated.append(name)
+        changes = _diff_parameters(old, new)
+        if changes:
+            changed.append({"name": name, **changes})
+    # kernels added directly as deprecated are still worth flagging
+    deprecated.extend(name for name in added if new_kernels[name].get("deprecation"))
+
+    return {
+        "added": added,
+        "removed": removed,
+        "renamed": renamed,
+        "deprecated": deprecated,
+        "undeprecated": undeprecated,
+        "changed": changed,
+    }
+
+
+def diff_to_json(diff: dict) -> str:
+    """Format a kernel diff as a json string."""
+    return json.dumps(diff, indent=4)
+
+
+def diff_to_markdown(diff: dict, old_tag: str = "old", new_tag: str = "new") -> str:
+    """Format a kernel diff as markdown, e.g. for a pull request body.
+
+    Parameters
+    ----------
+    diff : dict
+        Diff returned by `diff_kernel_lists`.
+    old_tag : str, optional
+        Name of the old version, by default 'old'.
+    new_tag : str, optional
+        Name of the new version, by default 'new'.
+
+    Returns
+    -------
+    str
+        Markdown summary of the diff.
+    """
+    lines = [f"### API changes from `{old_tag}` to `{new_tag}`", ""]
+    sections = [
+        ("Added", [f"`{n}`" for n in diff["added"]]),
+        ("Removed", [f"`{n}`" for n in diff["removed"]]),
+        ("Renamed", [f"`{r['from']}` → `{r['to']}`" for r in diff["renamed"]]),
+        ("Deprecated", [f"`{n}`" for n in diff["deprecated"]]),
+        ("No longer deprecated", [f"`{n}`" for n in diff["undeprecated"]]),
+    ]
+    for title, items in sections:
+        if items:
+            lines.append(f"**{title}** ({len(items)}): " + ", ".join(items))
+            lines.append("")
+
+    if diff["changed"]:
+        lines.append(f"**Changed** ({len(diff['changed'])}):")
+        lines.append("")
+        for change in diff["changed"]:
+            details = []
+            if "parameters_added" in change:
+                details.append("added " + ", ".join(f"`{p}`" for p in change["parameters_added"]))
+            if "parameters_removed" in change:
+                details.append("removed " + ", ".join(f"`{p}`" for p in change["parameters_removed"]))
+            for c in change.get("type_changes", []):
+                details.append(f"`{c['parameter']}` type `{c['from']}` → `{c['to']}`")
+            for c in change.get("default_changes", []):
+                details.append(f"`{c['parameter']}` default `{c['from']}` → `{c['to']}`")
+            if "order_changed" in change:
+                details.append(
+                    "order ("
+                    + ", ".join(change["order_changed"]["from"])
+                    + ") → ("
+                    + ", ".join(change["order_changed"]["to"])
+                    + ")"
+                )
+            if "return" in change:
+                details.append(f"return `{change['return']['from']}` → `{change['return']['to']}`")
+            if "tier" in change:
+                details.append(f"tier {change['tier']['from']} → {change['tier']['to']}")
+            lines.append(f"- `{change['name']}`: " + "; ".join(details))
+        lines.append("")
+
+    if len(lines) == 2:
+        lines.append("No API change.")
+    return "\n".join(lines).strip() + "\n"
@@ -1,4 +1,11 @@
+import marshal
+import os
 import re
+import sys
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Optional
+
+from ._cache import cached_parse
 
 def _parse_param_tag(line:str) -> dict:
     """Parse param tag composed of a name, type and default value.
@@ -83,15 +90,45 @@ def _read_doxygen_block(block: str) -> dict:
     params = re.findall(r"@param\s+(.*)", block)
     params_list = [_parse_param_tag(p) for p in params]
 
-    # get the string staring with @brief and ending with @param or @return
-    briefs = re.findall(r"@brief(.*?)@param", block, re.DOTALL) # [0].replace("\n *", "").strip()]
-    brief = briefs[0].replace("\n *", "").strip() if len(briefs) != 0 else print(f"no brief found in {name}")
-    # print(brief) if len(brief) == 0  else None
+    # get the string starting with the first @brief and ending with the next tag or the block,
+    # a single search scans the block once, whatever the tags following the brief
+    body = block[:-2] if block.endswith("*/") else block
+    brief = re.search(r"@brief(.*?)(?=\s@\w|\Z)", body, re.DOTALL)
+    brief = brief.group(1).replace("\n *", "").strip() if brief else ''
 
-    return {'name': name[0], 'priority': priority[0] if len(priority) > 0 else '', 'category': category[0] if len(category) > 0 else '', 
+    # a block without @name is kept with an empty name, as the other missing tags
+    return {'name': name[0] if len(name) > 0 else '', 'priority': priority[0] if len(priority) > 0 else '', 'category': category[0] if len(category) > 0 else '', 
             'link': link, 'return': return_type[0] if len(return_type) > 0 else '', 'parameters': params_list, 'deprecation': deprecation, 'brief': brief}
 
 
+def _deprecation_message(function_dict: dict) -> str:
+    """Return the text of the @deprecated tags of a parsed block, empty if it is not deprecated."""
+    deprecation = function_dict.get("deprecation")
+    if not deprecation:
+        return ""
+    if isinstance(deprecation, list):
+        return " ".join(deprecation).strip()
+    return deprecation.strip()
+
+
+def _doxygen_block_spans(code: str) -> list:
+    """Return the (start, end) positions of the doxygen blocks, as `re.findall(r"/\*\*.*?\*/")` would.
+
+    Notes: the regular expression scans to the end of the code from each `/**` which is
+    never closed, which is quadratic on unterminated blocks. A block without end closes
+    no later block either, so the scan stops at the first one.
+    """
+    spans = []
+    start = code.find("/**")
+    while start != -1:
+        end = code.find("*/", start + 3)
+        if end == -1:
+            break
+        spans.append((start, end + 2))
+        start = code.find("/**", end + 2)
+    return spans
+
+
 def _extract_doxygen_blocks(code: str) -> list:
     """ Extract doxygen blocks from cpp code.
     
@@ -107,28 +144,126 @@ def _extract_doxygen_blocks(code: str) -> list:
     list
         List of doxygen blocks.
     """
-    blocks = re.findall(r"/\*\*.*?\*/", code, re.DOTALL)
-    # drop the first element if it contains "@namespace"
-    if blocks[0].find("@namespace") != -1:
+    blocks = [code[start:end] for start, end in _doxygen_block_spans(code)]
+    # drop the first element if it contains "@namespace", code may have no complete block
+    if blocks and blocks[0].find("@namespace") != -1:
         blocks.pop(0)
     return blocks
 
 
-def parse_doxygen_to_json(code: str) -> list:
+def _parse_doxygen_blocks(code: str) -> list:
+    blocks = _extract_doxygen_blocks(code)
+    return [_read_doxygen_block(b) for b in blocks]
+
+
+# below this number of blocks per chunk, sending a chunk to a worker costs more than parsing it
+_MIN_BLOCKS_PER_CHUNK = 32
+
+
+def _read_doxygen_chunk(chunk: str) -> bytes:
+    """Parse every doxygen block of a chunk of code, marshalled for the parent process.
+
+    Notes: the dictionaries are decoded in C by `marshal.loads`, faster than unpickling
+    them. The workers run the interpreter of the parent, so the format matches. Values
+    repeated across blocks, such as parameter types, are interned: marshal writes each of
+    them once, and the parent decodes them once.
+    """
+    blocks = [_read_doxygen_block(chunk[start:end]) for start, end in _doxygen_block_spans(chunk)]
+    for block in blocks:
+        for key in ('priority', 'category', 'return'):
+            block[key] = sys.intern(block[key])
+        for param in block['parameters']:
+            for key, value in param.items():
+                param[key] = sys.intern(value)
+    return marshal.dumps(blocks)
+
+
+def _doxygen_chunk_cut(code: str, position: int) -> int:
+    """Return the first position from `position` on which no doxygen block spans, len(code) if none.
+
+    Notes: right after a `*/` is such a position, unless it ends a `/**/`, which does not
+    close its block, or starts a `*/**`, whose block may start before it.
+    """
+    end = code.find("*/", position)
+    while end != -1 and (code[end - 2:end] == "/*" or code.startswith("/**", end + 1)):
+        end = code.find("*/", end + 2)
+    return len(code) if end == -1 else end + 2
+
+
+def _split_doxygen_chunks(code: str, chunks_count: int) -> list:
+    """Cut the code into chunks of about the same size, which hold the blocks of `_extract_doxygen_blocks`.
+
+    Notes: no block spans a cut, so a chunk holds the blocks the whole code holds between
+    its ends, and the cuts are found without scanning the blocks. The `@namespace` block
+    is left out of the chunks.
+    """
+    position = 0
+    start = code.find("/**")
+    if start != -1:
+        end = code.find("*/", start + 3)
+        if end != -1 and code.find("@namespace", start, end + 2) != -1:
+            position = end + 2
+    size = len(code) - position
+    cuts = [position]
+    cuts += [_doxygen_chunk_cut(code, position + size * i // chunks_count) for i in range(1, chunks_count)]
+    cuts.append(len(code))
+    return [code[a:b] for a, b in zip(cuts, cuts[1:]) if b > a]
+
+
+def _parse_doxygen_blocks_parallel(
+    code: str, max_workers: Optional[int], executor: Optional[Executor]
+) -> list:
+    """Parse chunks of the code across worker processes, in source order."""
+    workers = max_workers or os.cpu_count() or 1
+    # a few chunks per worker even out the chunks which are slower to parse, and let the
+    # first chunks be decoded while the workers parse the next ones
+    chunks_count = min(workers * 4, code.count("/**") // _MIN_BLOCKS_PER_CHUNK)
+    if workers < 2 or chunks_count < 2:
+        return _parse_doxygen_blocks(code)
+    chunks = _split_doxygen_chunks(code, chunks_count)
+    if executor is not None:
+        results = executor.map(_read_doxygen_chunk, chunks)
+        return [block for result in results for block in marshal.loads(result)]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(_read_doxygen_chunk, chunks)
+        return [block for result in results for block in marshal.loads(result)]
+
+
+def parse_doxygen_to_json(
+    code: str, max_workers: Optional[int] = 0, executor: Optional[Executor] = None
+) -> list:
     """Parse doxygen blocks to json dict format.
 
+    Notes: results are cached in-process, parsing the same code twice only costs a copy.
+
+    With several workers, the code is cut between doxygen blocks into a few chunks per
+    worker. Each worker parses the raw text of its chunks and sends back the marshalled
+    blocks, which are put back in source order, so the result is the one of the serial
+    parse. Code with less than two chunks of `_MIN_BLOCKS_PER_CHUNK` blocks, or a
+    single worker, is parsed in-process.
+
     Parameters
     ----------
     code : str
         Code to be parsed.
+    max_workers : int, optional
+        Number of worker processes, by default 0 to parse in-process. None uses one per cpu.
+    executor : Executor, optional
+        Pool to parse the chunks in, instead of starting a new one. The code is then cut
+        for max_workers workers, or one per cpu.
 
     Returns
     -------
     list
         List of parsed doxygen blocks.
     """
-    blocks = _extract_doxygen_blocks(code)
-    return [_read_doxygen_block(b) for b in blocks]
+    if max_workers == 0 and executor is None:
+        return cached_parse(code, _parse_doxygen_blocks)
+    return cached_parse(
+        code,
+        _parse_doxygen_blocks,
+        lambda code: _parse_doxygen_blocks_parallel(code, max_workers, executor),
+    )
 
 
 def clear_doxygen_blocks(code: str) -> str:
@@ -146,5 +281,11 @@ def clear_doxygen_blocks(code: str) -> str:
     str
         Code without doxygen blocks.
     """
-    return re.sub(r'/\*\*.*?\*/', '', code, flags=re.DOTALL)
+    kept = []
+    position = 0
+    for start, end in _doxygen_block_spans(code):
+        kept.append(code[position:start])
+        position = end
+    kept.append(code[position:])
+    return "".join(kept)
 
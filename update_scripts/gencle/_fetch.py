@@ -0,0 +1,238 @@
+# This module is in charge of downloading files within bounded time, from ordered mirrors.
+
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import List, Optional
+
+# base url templates of the raw files, tried in order
+DEFAULT_MIRRORS = ["https://raw.githubusercontent.com/{repo}/{branch}/{path}"]
+
+
+class FetchError(OSError):
+    """Raised when an url could not be read from any mirror, or not before the deadline."""
+
+
+# client errors meaning the file does not exist, and the ones sent when rate limited
+_MISSING_CODES = (404, 410)
+_RETRY_CODES = (403, 408, 429)
+
+
+def _http_get(url: str, timeout: float) -> Optional[str]:
+    """Read an url, None if the server answered that it has no such file.
+
+    Raises
+    ------
+    FetchError
+        On client errors other than missing files and rate limiting, which another
+        attempt would not fix.
+    OSError
+        On network errors, timeouts, rate limiting and server errors, which are worth
+        another attempt.
+    """
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            if response.status != 200:
+                return None
+            return response.read().decode("utf-8")
+    except urllib.error.HTTPError as error:
+        if error.code in _MISSING_CODES:
+            return None
+        if error.code >= 500 or error.code in _RETRY_CODES:
+            raise
+        raise FetchError(f"{url}: HTTP {error.code} {error.reason}") from error
+
+
+class Fetcher:
+    """Download files with per-request timeouts, hedged requests and a global deadline.
+
+    Notes: a request is sent to the first url. If it did not answer once the hedge delay
+    elapsed, the same file is requested from the next url (or again from the same one if
+    there is a single url), and the first answer wins. The hedge delay is the
+    `hedge_percentile` of the latencies observed so far, or `hedge_after` seconds until
+    `min_samples` latencies were observed. A failed or timed out attempt is replaced by
+    the next one right away. An answer saying the file does not exist (404, 410) is final
+    and so are the other client errors, which raise a `FetchError`, except rate limiting
+    (403, 429) and request timeouts (408) which are attempted again.
+
+    Parameters
+    ----------
+    mirrors : list, optional
+        Base url templates with `{repo}`, `{branch}` and `{path}` fields, tried in order,
+        by default raw.githubusercontent.com.
+    timeout : float, optional
+        Maximum time in seconds given to a single request, by default 10.
+    deadline : float, optional
+        Maximum time in seconds spent fetching, counted from the first fetch, by default
+        None (no deadline).
+    hedge_percentile : float, optional
+        Latency percentile after which a hedged request is sent, by default 0.9.
+    hedge_after : float, optional
+        Hedge delay in seconds used until enough latencies were observed, by default 2.
+    min_samples : int, optional
+        Number of latencies observed before using the percentile, by default 5.
+    max_attempts : int, optional
+        Maximum number of requests per file, by default one per mirror and at least 2.
+    """
+
+    def __init__(
+        self,
+        mirrors: Optional[List[str]] = None,
+        timeout: float = 10.0,
+        deadline: Optional[float] = None,
+        hedge_percentile: float = 0.9,
+        hedge_after: float = 2.0,
+        min_samples: int = 5,
+        max_attempts: Optional[int] = None,
+    ):
+        self.mirrors = list(mirrors or DEFAULT_MIRRORS)
+        self.timeout = timeout
+        self.deadline = deadline
+        self.hedge_percentile = hedge_percentile
+        self.hedge_after = hedge_after
+        self.min_samples = min_samples
+        self.max_attempts = max_attempts
+        self._latencies = deque(maxlen=128)
+        self._lock = threading.Lock()
+        self._deadline_at = None
+        self._executor = None
+
+    def mirror_urls(self, repo: str, branch: str, path: str) -> List[str]:
+        """Urls of a file on every mirror, in order."""
+        return [m.format(repo=repo, branch=branch, path=path) for m in self.mirrors]
+
+    def hedge_delay(self) -> float:
+        """Time in seconds after which a request still waiting for an answer is hedged."""
+        with self._lock:
+            latencies = sorted(self._latencies)
+        if len(latencies) < self.min_samples:
+            return min(self.hedge_after, self.timeout)
+        index = int(round(self.hedge_percentile * (len(latencies) - 1)))
+        return min(latencies[index], self.timeout)
+
+    def _start(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="gencle-fetch")
+            if self.deadline is not None and self._deadline_at is None:
+                self._deadline_at = time.monotonic() + self.deadline
+            return self._executor, self._deadline_at
+
+    def fetch(self, urls: List[str]) -> Optional[str]:
+        """Read the first answer of a list of urls serving the same file.
+
+        Parameters
+        ----------
+        urls : list
+            Urls of the file, in order of preference.
+
+        Returns
+        -------
+        str or None
+            Decoded content, None if a server answered that the file does not exist.
+
+        Raises
+        ------
+        FetchError
+            If every attempt failed, a server answered with a final client error, or the
+            deadline passed before any answer.
+        """
+        executor, deadline_at = self._start()
+        max_attempts = self.max_attempts or max(len(urls), 2)
+        attempts = [urls[i % len(urls)] for i in range(max_attempts)]
+        hedge_delay = self.hedge_delay()
+        started = {}
+        errors = []
+        next_attempt = 0
+        last_start = 0.0
+
+        def _launch():
+            nonlocal next_attempt, last_start
+            url = attempts[next_attempt]
+            next_attempt += 1
+            last_start = time.monotonic()
+            started[executor.submit(_http_get, url, self.timeout)] = (url, last_start)
+
+        _launch()
+        while True:
+            now = time.monotonic()
+            if deadline_at is not None and now >= deadline_at:
+                raise FetchError(f"fetch deadline of {self.deadline}s exceeded while reading {urls[0]}")
+            failed = False
+            # attempts running for longer than the timeout are given up
+            for future, (url, start) in list(started.items()):
+                if now - start >= self.timeout:
+                    del started[future]
+                    errors.append(f"{url}: timed out after {self.timeout}s")
+                    failed = True
+
+            if started:
+                # wake up for the next hedge, the oldest attempt timeout, or the deadline
+                wake_at = [min(start for _, start in started.values()) + self.timeout]
+                if next_attempt < len(attempts):
+                    wake_at.append(last_start + hedge_delay)
+                if deadline_at is not None:
+                    wake_at.append(deadline_at)
+                timeout = max(0.0, min(wake_at) - now)
+                done, _ = wait(list(started), timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    url, start = started.pop(future)
+                    try:
+                        content = future.result()
+                    except FetchError:
+                        raise
+                    except OSError as error:
+                        errors.append(f"{url}: {error}")
+                        failed = True
+                        continue
+                    if content is not None:
+                        with self._lock:
+                            self._latencies.append(time.monotonic() - start)
+                    return content
+
+            if next_attempt >= len(attempts):
+                if not started:
+                    raise FetchError(f"could not read {urls[0]}: " + "; ".join(errors))
+            elif failed or not started or time.monotonic() >= last_start + hedge_delay:
+                _launch()
+
+
+def _env_float(name: str) -> Optional[float]:
+    value = os.environ.get(name)
+    return float(value) if value else None
+
+
+def _fetcher_from_env() -> Fetcher:
+    mirrors = os.environ.get("GENCLE_MIRRORS")
+    return Fetcher(
+        mirrors=[m.strip() for m in mirrors.split(",") if m.strip()] if mirrors else None,
+        timeout=_env_float("GENCLE_FETCH_TIMEOUT") or 10.0,
+        deadline=_env_float("GENCLE_FETCH_DEADLINE"),
+    )
+
+
+_fetcher = None
+
+
+def get_fetcher() -> Fetcher:
+    """Return the fetcher used by gencle, configured by `GENCLE_MIRRORS` (comma separated
+    url templates), `GENCLE_FETCH_TIMEOUT` and `GENCLE_FETCH_DEADLINE` (seconds) if not
+    set by `configure_fetch`."""
+    global _fetcher
+    if _fetcher is None:
+        _fetcher = _fetcher_from_env()
+    return _fetcher
+
+
+def configure_fetch(**kwargs) -> Fetcher:
+    """Replace the fetcher used by gencle, see `Fetcher` for the parameters.
+
+    Notes: the deadline of the new fetcher starts with its first fetch.
+    """
+    global _fetcher
+    _fetcher = Fetcher(**kwargs)
+    return _fetcher
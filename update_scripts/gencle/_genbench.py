@@ -0,0 +1,314 @@
+# This module is in charge of generating the per-kernel benchmarks of pyclesperanto and clesperantoj.
+
+import re
+from typing import List, Optional
+
+from ._genj import _java_return_guard, _java_snake_to_camel
+from ._genpy import (
+    _convert_cpp_name_to_python,
+    _full_deprecation_message,
+    _is_input_image,
+    _is_output_image,
+)
+
+# image shapes benchmarked by default, as (width, height[, depth])
+DEFAULT_BENCHMARK_SHAPES = [(64, 64), (512, 512), (64, 64, 64)]
+
+# value given to the scalar parameters without default value
+_required_scalar_values = {"int": "1", "float": "1", "bool": "False"}
+
+
+def _value_type(param_type: str) -> str:
+    return param_type.replace("const ", "").replace("&", "").strip()
+
+
+def _benchmark_arguments(function_dict: dict) -> Optional[List[tuple]]:
+    """Classify the parameters of a kernel to call it on synthetic inputs.
+
+    Returns
+    -------
+    list or None
+        One `(parameter, kind, value)` per parameter, kind being 'device', 'image' (the
+        value is the index of the synthetic image), 'output' or 'scalar' (the value is the
+        default value, python-like). None if the kernel can not be called this way.
+    """
+    arguments = []
+    images = 0
+    for p in function_dict["parameters"]:
+        value_type = _value_type(p["type"])
+        default = p["default_value"].strip()
+        if value_type == "Device::Pointer":
+            arguments.append((p, "device", None))
+        elif _is_input_image(p):
+            arguments.append((p, "image", images))
+            images += 1
+        elif _is_output_image(p):
+            arguments.append((p, "output", None))
+        elif default and default != "None":
+            arguments.append((p, "scalar", default))
+        elif value_type in _required_scalar_values:
+            arguments.append((p, "scalar", _required_scalar_values[value_type]))
+        else:
+            return None
+    return arguments
+
+
+def _benchmarked_kernels(function_list: list) -> tuple:
+    """Split the kernels of a tier into the benchmarked ones, with their dictionary and arguments, and the skipped ones."""
+    benchmarked = []
+    skipped = []
+    for f in function_list:
+        name = f["name"].replace("_func", "").strip()
+        arguments = _benchmark_arguments(f)
+        if _full_deprecation_message(f):
+            skipped.append((name, "deprecated"))
+        elif arguments is None:
+            skipped.append((name, "no synthetic value for a parameter"))
+        else:
+            benchmarked.append((name, f, arguments))
+    return benchmarked, skipped
+
+
+def _skipped_comment(skipped: list, comment: str) -> str:
+    if not skipped:
+        return ""
+    lines = [f"{comment} not benchmarked:"] + [f"{comment}   {name}: {reason}" for name, reason in skipped]
+    return "\n" + "\n".join(lines) + "\n"
+
+
+def generate_pytest_benchmark_file(function_list: list, tier: int, shapes: list = None) -> str:
+    """Generate a pytest-benchmark module timing every kernel of a tier with pyclesperanto.
+
+    Notes: each kernel is called on random float images of every shape, its parameters
+    with a default value keeping it, and its other scalar parameters set to 1 or False.
+    Deprecated kernels and kernels needing values which can not be made up (strings,
+    lists, lists of images) are skipped and listed at the end of the module. Kernels
+    are waited for, so the timings include the execution on the device.
+
+    Parameters
+    ----------
+    function_list : list
+        List of function dictionaries.
+    tier : int
+        Tier number.
+    shapes : list, optional
+        Image shapes as (width, height[, depth]) tuples, by default
+        `DEFAULT_BENCHMARK_SHAPES`.
+
+    Returns
+    -------
+    str
+        Python code of the benchmark module, to run with `pytest --benchmark-only`.
+    """
+    _module_code = """#
+# This code is auto-generated from CLIc 'cle::tier{tier}.hpp' file, do not edit manually.
+#
+
+import numpy as np
+import pytest
+
+import pyclesperanto as cle
+
+# (width, height[, depth]) of the synthetic images
+SHAPES = {shapes_str}
+
+
+@pytest.fixture(scope="module", autouse=True)
+def _wait_for_kernels():
+\tcle.wait_for_kernel_to_finish(True)
+\tyield
+\tcle.wait_for_kernel_to_finish(False)
+
+
+@pytest.fixture(scope="module", params=SHAPES, ids=lambda shape: "x".join(map(str, shape)))
+def images(request):
+\t\"\"\"Random float images of the benchmarked shape.\"\"\"
+\trng = np.random.default_rng(0)
+\tshape = tuple(reversed(request.param))
+\treturn [cle.push(rng.random(shape, dtype=np.float32)) for _ in range({images_count})]
+
+{tests_str}
+{skipped_str}"""
+    _test_code = """
+def test_{name}(benchmark, images):
+\tbenchmark(cle.{name}{arguments_str})
+"""
+    benchmarked, skipped = _benchmarked_kernels(function_list)
+    tests = []
+    images_count = 1
+    for name, _, arguments in benchmarked:
+        keywords = []
+        for p, kind, value in arguments:
+            python_name = _convert_cpp_name_to_python(p["name"].strip())
+            if kind == "image":
+                keywords.append(f"{python_name}=images[{value}]")
+                images_count = max(images_count, value + 1)
+            elif kind == "scalar" and not p["default_value"].strip():
+                keywords.append(f"{python_name}={value}")
+        arguments_str = "".join(f", {k}" for k in keywords)
+        tests.append(_test_code.format(name=name, arguments_str=arguments_str))
+    _module_code = _module_code.format(
+        tier=tier,
+        shapes_str=repr([tuple(s) for s in (shapes or DEFAULT_BENCHMARK_SHAPES)]),
+        images_count=images_count,
+        tests_str="\n".join(tests),
+        skipped_str=_skipped_comment(skipped, "#"),
+    )
+    return re.sub(r"\t", "    ", _module_code).strip() + "\n"
+
+
+def _java_literal(param_type: str, value: str) -> Optional[str]:
+    """Convert a python-like default value to a java literal of the parameter type, None if not possible."""
+    value_type = _value_type(param_type)
+    value = value.strip()
+    if value_type == "bool":
+        return {"True": "true", "False": "false"}.get(value)
+    if value_type == "int":
+        return value if re.fullmatch(r"-?\d+", value) else None
+    if value_type == "float":
+        return f"{value}f" if re.fullmatch(r"-?\d+(\.\d*)?([eE]-?\d+)?", value) else None
+    if value_type == "std::string":
+        return '"' + value.strip("'\"") + '"'
+    if value_type in ("std::vector<float>", "std::vector<int>"):
+        items = [v.strip() for v in value.strip("[]").split(",") if v.strip()]
+        item_type = "float" if value_type == "std::vector<float>" else "int"
+        items = [_java_literal(item_type, v) for v in items]
+        if None in items:
+            return None
+        return f"new ArrayList<>(Arrays.asList({', '.join(items)}))"
+    return None
+
+
+def generate_jmh_benchmark_class(function_list: list, tier: int, shapes: list = None) -> str:
+    """Generate a JMH class timing every kernel of a tier with clesperantoj.
+
+    Notes: each kernel is called on random float images of every shape, which are
+    created once per trial, with its default parameter values and null outputs. The
+    kernels skipped by `generate_pytest_benchmark_file` are skipped as well, and so are
+    the kernels with a default value which has no java literal.
+
+    Parameters
+    ----------
+    function_list : list
+        List of function dictionaries.
+    tier : int
+        Tier number.
+    shapes : list, optional
+        Image shapes as (width, height[, depth]) tuples, by default
+        `DEFAULT_BENCHMARK_SHAPES`.
+
+    Returns
+    -------
+    str
+        Java code of the `Tier{tier}Benchmark` class.
+    """
+    _class_code = """/**
+ * This file is autogenerated. Do not edit manually.
+ */
+package net.clesperanto.benchmarks;
+
+import java.util.ArrayList;
+import java.util.Arrays;
+import java.util.Random;
+import java.util.concurrent.TimeUnit;
+
+import org.openjdk.jmh.annotations.Benchmark;
+import org.openjdk.jmh.annotations.BenchmarkMode;
+import org.openjdk.jmh.annotations.Level;
+import org.openjdk.jmh.annotations.Mode;
+import org.openjdk.jmh.annotations.OutputTimeUnit;
+import org.openjdk.jmh.annotations.Param;
+import org.openjdk.jmh.annotations.Scope;
+import org.openjdk.jmh.annotations.Setup;
+import org.openjdk.jmh.annotations.State;
+import org.openjdk.jmh.infra.Blackhole;
+
+import net.clesperanto.core.ArrayJ;
+import net.clesperanto.core.DeviceJ;
+import net.clesperanto.core.MemoryJ;
+import net.clesperanto.kernels.Tier{tier};
+
+/**
+ * Benchmarks of the tier {tier} kernels on random float images
+ */
+@State(Scope.Benchmark)
+@BenchmarkMode(Mode.AverageTime)
+@OutputTimeUnit(TimeUnit.MICROSECONDS)
+public class Tier{tier}Benchmark {{
+
+\t/**
+\t * width x height[ x depth] of the synthetic images
+\t */
+\t@Param({{{shapes_str}}})
+\tpublic String shape;
+
+\tprivate DeviceJ device;
+\tprivate ArrayJ[] images;
+
+\t@Setup(Level.Trial)
+\tpublic void setup() {{
+\t\tdevice = DeviceJ.getDefaultDevice();
+\t\timages = new ArrayJ[{images_count}];
+\t\tfor (int i = 0; i < images.length; i++) {{
+\t\t\timages[i] = randomImage(i);
+\t\t}}
+\t}}
+
+\tprivate ArrayJ randomImage(long seed) {{
+\t\tlong[] size = Arrays.stream(shape.split("x")).mapToLong(Long::parseLong).toArray();
+\t\tlong width = size[0];
+\t\tlong height = size.length > 1 ? size[1] : 1;
+\t\tlong depth = size.length > 2 ? size[2] : 1;
+\t\tArrayJ image = MemoryJ.makeFloatBuffer(device, width, height, depth, "buffer");
+\t\tfloat[] data = new float[(int) (width * height * depth)];
+\t\tRandom random = new Random(seed);
+\t\tfor (int i = 0; i < data.length; i++) {{
+\t\t\tdata[i] = random.nextFloat();
+\t\t}}
+\t\tMemoryJ.writeFloatBuffer(image, data, data.length);
+\t\treturn image;
+\t}}
+{benchmarks_str}}}
+{skipped_str}"""
+    _benchmark_code = """
+\t@Benchmark
+\tpublic void {java_name}(Blackhole blackhole) {{
+\t\t{call_statement}
+\t}}
+"""
+    _call_code = "Tier{tier}.{java_name}({arguments_str})"
+    benchmarked, skipped = _benchmarked_kernels(function_list)
+    benchmarks = []
+    images_count = 1
+    for name, function_dict, arguments in benchmarked:
+        values = []
+        for p, kind, value in arguments:
+            if kind == "device":
+                values.append("device")
+            elif kind == "image":
+                values.append(f"images[{value}]")
+                images_count = max(images_count, value + 1)
+            elif kind == "output":
+                values.append("null")
+            else:
+                values.append(_java_literal(p["type"], value))
+        if None in values:
+            skipped.append((name, "no java literal for a default value"))
+            continue
+        java_name = _java_snake_to_camel(name)
+        call = _call_code.format(tier=tier, java_name=java_name, arguments_str=", ".join(values))
+        # a void kernel has no result for the blackhole to consume
+        if _java_return_guard(function_dict["return"])[0] == "void":
+            call_statement = f"{call};"
+        else:
+            call_statement = f"blackhole.consume({call});"
+        benchmarks.append(_benchmark_code.format(java_name=java_name, call_statement=call_statement))
+    shapes = shapes or DEFAULT_BENCHMARK_SHAPES
+    _class_code = _class_code.format(
+        tier=tier,
+        shapes_str=", ".join('"' + "x".join(map(str, s)) + '"' for s in shapes),
+        images_count=images_count,
+        benchmarks_str="".join(benchmarks),
+        skipped_str=_skipped_comment(skipped, "//"),
+    )
+    return re.sub(r"\t", "    ", _class_code).strip() + "\n"
@@ -46,7 +46,49 @@ def make_java_types(list_of_parameters):
     return definitions, calls
 
 
-def function_wrapper(line, tier):
+def get_input_images(body_lines):
+    """Return the names of the input images of a Java tier method, from the lines of its body.
+
+    The tier classes check that the parameters of a `const Array::Pointer` type are not
+    null, the other images of a method are its outputs.
+    """
+    inputs = set()
+    for line in body_lines:
+        inputs.update(re.findall(r"Objects\.requireNonNull\((\w+),", line))
+    return inputs
+
+
+def make_batched_java_types(list_of_parameters, input_images):
+    """Same as make_java_types, but all input images are pushed by a single pushAll call.
+
+    Returns the parameter definitions, the call values and the pushAll statement (empty if
+    the function has no input image). Output images, the images not in `input_images`,
+    are pushed on their own, so that an output is never the buffer of one of the inputs.
+    """
+    definitions = []
+    calls = []
+    inputs = []
+    for p in list_of_parameters:
+        definition_type = p.split(" ")[0]
+        parameter_name = p.split(" ")[1]
+        if definition_type == "ArrayJ":
+            definitions.append("Object " + parameter_name)
+            if parameter_name not in input_images:
+                calls.append("CLIJ3OpsPush.pushArray(" + parameter_name + ")")
+            else:
+                calls.append(f"inputs[{len(inputs)}]")
+                inputs.append(parameter_name)
+        else:
+            definitions.append(definition_type + " " + parameter_name)
+            calls.append(parameter_name)
+
+    push_statement = ""
+    if inputs:
+        push_statement = "ArrayJ[] inputs = CLIJ3OpsPush.pushAll(" + ", ".join(inputs) + ");\n        "
+    return definitions, calls, push_statement
+
+
+def function_wrapper(line, tier, batch_push=False, input_images=()):
     camel_function_name = get_function_name(line)
     snake_function_name = camel_to_snake(camel_function_name)
     return_type = get_return_type(line).replace("static ", "").replace("public ", "default ")
@@ -54,14 +96,20 @@ def function_wrapper(line, tier):
 
     all_but_first_parameters = parameters[1:]
 
-    param_definitions, param_values = make_java_types(all_but_first_parameters)
+    push_statement = ""
+    if batch_push:
+        param_definitions, param_values, push_statement = make_batched_java_types(
+            all_but_first_parameters, input_images
+        )
+    else:
+        param_definitions, param_values = make_java_types(all_but_first_parameters)
 
     param_definitions = ", ".join(param_definitions)
     param_values = ", ".join(param_values)
 
     return f"""
     {return_type} {snake_function_name}({param_definitions}) {{
-        return Tier{tier}.{camel_function_name}(clij.device, {param_values});
+        {push_statement}return Tier{tier}.{camel_function_name}(clij.device, {param_values});
     }}
 """
 
@@ -78,24 +126,71 @@ def get_tier_number(file_name):
     return int(file_name.split("Tier")[1].split(".java")[0])
 
 
-def generate_clij_code_per_tier(files, tiers):
+def generate_clij_code_per_tier(files, tiers, batch_push=False):
+    """Generate the CLIJ3Ops methods of all tiers.
+
+    With `batch_push`, the input images of a call are pushed by a single de-duplicating
+    `pushAll`, which reuses objects already on the GPU (ArrayJ) and pushes an object
+    passed several times only once. The code must then be wrapped by
+    `update_clij3_code(code, batch_push=True)`, which adds the push helpers. The input
+    images are told from the outputs by the null checks of the tier methods.
+    """
     output = ""
     for tier, content in zip(tiers, files):
-        # List to store lines starting with "public static "
+        # lines starting with "public static ", with the lines of the method body
         matching_lines = []
 
         # Process each line
         for line in content.splitlines():
             stripped_line = line.lstrip()  # Remove leading spaces
             if stripped_line.startswith("public static "):
-                matching_lines.append(stripped_line)
-
-        for line in matching_lines:
-            output = output + function_wrapper(line, tier)
+                matching_lines.append((stripped_line, []))
+            elif matching_lines:
+                matching_lines[-1][1].append(stripped_line)
+
+        for line, body_lines in matching_lines:
+            output = output + function_wrapper(
+                line, tier, batch_push, get_input_images(body_lines)
+            )
     return output
 
 
-def update_clij3_code(code) -> str:
+# package-private class of CLIJ3Ops.java, holding the push helpers of the batched calls
+_clij3_push_helpers = """
+
+final class CLIJ3OpsPush {
+
+    private CLIJ3OpsPush() {
+    }
+
+    static ArrayJ pushArray(Object object) {
+        if (object instanceof ArrayJ) {
+            return (ArrayJ) object;
+        }
+        return CLIJ3Ops.clij.push(object);
+    }
+
+    static ArrayJ[] pushAll(Object... objects) {
+        ArrayJ[] arrays = new ArrayJ[objects.length];
+        IdentityHashMap<Object, ArrayJ> pushed = new IdentityHashMap<>();
+        for (int i = 0; i < objects.length; i++) {
+            Object object = objects[i];
+            if (object instanceof ArrayJ) {
+                arrays[i] = (ArrayJ) object;
+            } else if (pushed.containsKey(object)) {
+                arrays[i] = pushed.get(object);
+            } else {
+                arrays[i] = CLIJ3Ops.clij.push(object);
+                pushed.put(object, arrays[i]);
+            }
+        }
+        return arrays;
+    }
+}
+"""
+
+
+def update_clij3_code(code, batch_push=False) -> str:
 
 
     clijops_template = """ // This file is autogenerated by gencle script
@@ -104,7 +199,7 @@ package net.clesperanto;
 
 import java.util.ArrayList;
 import java.util.HashMap;
-import java.util.Map;    
+import java.util.Map;    {imports}
 
 import net.clesperanto.core.ArrayJ;
 import net.clesperanto.kernels.*;
@@ -115,9 +210,11 @@ public abstract interface CLIJ3Ops {{
 
     {functions}
 }}
-"""
+{helpers}"""
 
-    return clijops_template.format(functions=code)
+    imports = "\nimport java.util.IdentityHashMap;" if batch_push else ""
+    helpers = _clij3_push_helpers if batch_push else ""
+    return clijops_template.format(functions=code, imports=imports, helpers=helpers)
 
 
 
@@ -0,0 +1,304 @@
+# This module is in charge of generating the header-only high-level C++ API of clesperanto.
+
+import re
+
+# C++ keywords and alternative tokens which can not be used as function names
+_cpp_reserved_names = {
+    "and", "and_eq", "bitand", "bitor", "compl", "delete", "new", "not", "not_eq",
+    "operator", "or", "or_eq", "xor", "xor_eq", "default", "register", "union",
+}
+
+
+def _cpp_function_name(function_dict: dict) -> str:
+    name = function_dict["name"].replace("_func", "").strip()
+    return name + "_" if name in _cpp_reserved_names else name
+
+
+def _is_const_ref(param_type: str) -> bool:
+    return param_type.strip().startswith("const ") and param_type.strip().endswith("&")
+
+
+def _is_scalar(param_type: str) -> bool:
+    return param_type.strip() in ("bool", "int", "float", "double", "size_t", "unsigned int")
+
+
+def _cpp_default_value(default_value: str, param_type: str) -> str:
+    """Convert a doxygen default value (python-like) to C++."""
+    value = default_value.strip()
+    if value == "None":
+        return "nullptr" if "::Pointer" in param_type else "{}"
+    if value in ("True", "False"):
+        return value.lower()
+    if value.startswith("[") and value.endswith("]"):
+        return "{" + value[1:-1] + "}"
+    if len(value) > 1 and value[0] == value[-1] == "'":
+        return '"' + value[1:-1] + '"'
+    return value
+
+
+def _cpp_parameters(parameters: list) -> list:
+    """Declaration and forwarded argument of each parameter.
+
+    Parameters taken by const reference by CLIc are taken the same way, scalars are taken
+    by value, and other parameters taken by value by CLIc (pointers, strings, vectors) are
+    taken by value and moved into the CLIc call. Default values are kept as long as all
+    the following parameters have one, as required by C++.
+    """
+    declarations = []
+    arguments = []
+    trailing_defaults = True
+    for p in reversed(parameters):
+        param_type = p["type"].strip()
+        name = p["name"].strip()
+        default = p["default_value"].strip()
+        trailing_defaults = trailing_defaults and bool(default)
+        default_str = f" = {_cpp_default_value(default, param_type)}" if trailing_defaults else ""
+        declarations.append(f"{param_type} {name}{default_str}")
+        if _is_const_ref(param_type) or _is_scalar(param_type):
+            arguments.append(name)
+        else:
+            arguments.append(f"std::move({name})")
+    return list(reversed(declarations)), list(reversed(arguments))
+
+
+def _cpp_attributes(function_dict: dict) -> str:
+    attributes = []
+    if function_dict["return"].strip() != "void":
+        attributes.append("nodiscard")
+    deprecation = function_dict.get("deprecation")
+    if deprecation:
+        message = " ".join(deprecation) if isinstance(deprecation, list) else deprecation
+        message = message.strip().replace("\\", "\\\\").replace('"', '\\"')
+        attributes.append(f'deprecated("{message}")')
+    return f"[[{', '.join(attributes)}]] " if attributes else ""
+
+
+def _generate_cpp_docstring(function_dict: dict, with_device: bool) -> str:
+    lines = ["/**", f" * @brief {(function_dict.get('brief') or '').strip()}", " *"]
+    parameters = function_dict["parameters"] if with_device else function_dict["parameters"][1:]
+    for p in parameters:
+        lines.append(f" * @param {p['name'].strip()} {p['description'].strip()}")
+    lines.append(f" * @return {function_dict['return'].strip()}")
+    if not with_device:
+        lines.append(" * @note Runs on `default_device()`.")
+    lines.append(" */")
+    return "\n".join(lines)
+
+
+def _generate_cpp_function(tier: int, function_dict: dict, default_device: bool = True) -> str:
+    """Generate the inline forwarding function(s) of a kernel.
+
+    Parameters
+    ----------
+    tier : int
+        Tier number.
+    function_dict : dict
+        Function dictionary.
+    default_device : bool, optional
+        If True, also generate an overload without the device parameter, by default True.
+
+    Returns
+    -------
+    str
+        C++ code of the function(s).
+    """
+    _cpp_func_code = """{docstring}
+{attributes}inline auto
+{name}({declarations}) -> {return_type}
+{{
+    return cle::tier{tier}::{func_name}_func({arguments});
+}}
+"""
+    func_name = function_dict["name"].replace("_func", "").strip()
+    declarations, arguments = _cpp_parameters(function_dict["parameters"])
+    fields = dict(
+        attributes=_cpp_attributes(function_dict),
+        name=_cpp_function_name(function_dict),
+        return_type=function_dict["return"].strip(),
+        tier=tier,
+        func_name=func_name,
+    )
+    code = _cpp_func_code.format(
+        docstring=_generate_cpp_docstring(function_dict, True),
+        declarations=", ".join(declarations),
+        arguments=", ".join(arguments),
+        **fields,
+    )
+    parameters = function_dict["parameters"]
+    if default_device and parameters and "Device::Pointer" in parameters[0]["type"]:
+        code += "\n" + _cpp_func_code.format(
+            docstring=_generate_cpp_docstring(function_dict, False),
+            declarations=", ".join(declarations[1:]),
+            arguments=", ".join(["default_device()"] + arguments[1:]),
+            **fields,
+        )
+    return code
+
+
+def generate_cpp_device_header() -> str:
+    """Generate the header holding the default device of the C++ API.
+
+    Returns
+    -------
+    str
+        C++ code of the header.
+    """
+    _device_code = """/*
+ * This file is autogenerated. Do not edit manually.
+ */
+#ifndef __INCLUDE_CLE_API_DEVICE_HPP
+#define __INCLUDE_CLE_API_DEVICE_HPP
+
+#include "tier0.hpp"
+
+#include <utility>
+
+namespace cle::api
+{
+
+\tinline auto
+\tdefault_device_storage() -> Device::Pointer &
+\t{
+\t\tstatic Device::Pointer device = nullptr;
+\t\treturn device;
+\t}
+
+\t/**
+\t * @brief Set the device used by the functions called without device.
+\t */
+\tinline auto
+\tset_default_device(Device::Pointer device) -> void
+\t{
+\t\tdefault_device_storage() = std::move(device);
+\t}
+
+\t/**
+\t * @brief Device used by the functions called without device.
+\t */
+\tinline auto
+\tdefault_device() -> const Device::Pointer &
+\t{
+\t\treturn default_device_storage();
+\t}
+
+} // namespace cle::api
+
+#endif // __INCLUDE_CLE_API_DEVICE_HPP
+"""
+    return re.sub(r"\t", "    ", _device_code)
+
+
+def list_cpp_api_names(function_list: list) -> list:
+    """List the names of the C++ API functions generated for a tier, see `generate_cpp_tier_header`.
+
+    Parameters
+    ----------
+    function_list : list
+        List of function dictionaries.
+
+    Returns
+    -------
+    list
+        Function names, without duplicates.
+    """
+    return list(dict.fromkeys(_cpp_function_name(f) for f in function_list))
+
+
+def generate_cpp_tier_header(
+    tier: int, function_list: list, default_device: bool = True, defined_names=()
+) -> str:
+    """Generate the header-only C++ API of a tier.
+
+    Notes: each kernel becomes an inline function `cle::api::{name}` forwarding its
+    arguments to `cle::tier{tier}::{name}_func`, which the compiler reduces to a direct
+    call. Parameters are taken by const reference, or by value and moved when CLIc takes
+    them by value, and the result is returned without copy. Deprecated kernels are marked
+    `[[deprecated]]`. With `default_device`, an overload without the device parameter
+    runs on the device set by `set_default_device`.
+
+    All tiers share the namespace `cle::api`, a kernel whose name is already defined by a
+    previous tier is generated as `cle::api::tier{tier}::{name}` instead, so that
+    `cle_api.hpp` never defines a function twice.
+
+    Parameters
+    ----------
+    tier : int
+        Tier number.
+    function_list : list
+        List of function dictionaries.
+    default_device : bool, optional
+        If True, generate overloads using the default device, by default True.
+    defined_names : iterable, optional
+        Names defined in `cle::api` by the previous tiers, see `list_cpp_api_names`.
+
+    Returns
+    -------
+    str
+        C++ code of the header.
+    """
+    _header_code = """/*
+ * This file is autogenerated from CLIc 'cle::tier{tier}.hpp' file. Do not edit manually.
+ */
+#ifndef __INCLUDE_CLE_API_TIER{tier}_HPP
+#define __INCLUDE_CLE_API_TIER{tier}_HPP
+
+#include "cle_api_device.hpp"
+#include "tier{tier}.hpp"
+
+namespace cle::api
+{{
+
+{functions_str}
+}} // namespace cle::api
+
+#endif // __INCLUDE_CLE_API_TIER{tier}_HPP
+"""
+    _qualified_code = """namespace tier{tier}
+{{
+
+{functions_str}
+}} // namespace tier{tier}
+"""
+    defined_names = set(defined_names)
+    functions = []
+    qualified_functions = []
+    for f in function_list:
+        code = _generate_cpp_function(tier, f, default_device)
+        if _cpp_function_name(f) in defined_names:
+            qualified_functions.append(code)
+        else:
+            functions.append(code)
+    if qualified_functions:
+        functions.append(
+            _qualified_code.format(tier=tier, functions_str="\n".join(qualified_functions))
+        )
+    _header_code = _header_code.format(tier=tier, functions_str="\n".join(functions))
+    return re.sub(r"\t", "    ", _header_code)
+
+
+def generate_cpp_api_header(tiers: list) -> str:
+    """Generate the header including the C++ API of all tiers.
+
+    Parameters
+    ----------
+    tiers : list
+        Tier numbers.
+
+    Returns
+    -------
+    str
+        C++ code of the header.
+    """
+    _api_code = """/*
+ * This file is autogenerated. Do not edit manually.
+ */
+#ifndef __INCLUDE_CLE_API_HPP
+#define __INCLUDE_CLE_API_HPP
+
+#include "cle_api_device.hpp"
+{includes_str}
+
+#endif // __INCLUDE_CLE_API_HPP
+"""
+    includes = [f'#include "cle_api_tier{tier}.hpp"' for tier in sorted(tiers)]
+    return _api_code.format(includes_str="\n".join(includes))
@@ -1,5 +1,9 @@
 # This module is in charge of generating the source code for the clesperanto Java bindings.
 
+import copy
+
+from ._timing import _java_return_statement
+
 #
 # The following functions are used to generate the native code for the Java bindings.
 #
@@ -21,23 +25,35 @@ def __cpp_return_guard(parameter: str):
     return mapping.get(parameter, (parameter, "", ""))
 
 
-def _cpp_function_parameters(parameters):
+def _cpp_function_parameters(parameters, copy_free=False):
     def _replace_type(param_type):
+        # the vectors of arrays are replaced before their arrays
         replacements = {
             "const ": "",
             "&": "",
+            "std::vector<Array::Pointer>": "std::vector<ArrayJ>",
             "Device::Pointer": "DeviceJ *",
             "Array::Pointer": "ArrayJ *",
-            "std::vector<Array::Pointer>": "std::vector<ArrayJ>",
         }
         for old, new in replacements.items():
             param_type = param_type.replace(old, new)
         return param_type
 
+    def _const_ref_type(param_type):
+        # vectors and strings are passed by const reference, without copy
+        value_type = param_type.replace("const ", "").replace("&", "").strip()
+        if value_type == "std::vector<Array::Pointer>":
+            return "const std::vector<ArrayJ> &"
+        if "Pointer" in value_type:
+            return None
+        if value_type.startswith("std::vector") or value_type == "std::string":
+            return f"const {value_type} &"
+        return None
+
     function_parameters = []
     for p in parameters:
         param_name = p["name"].strip()
-        param_type = _replace_type(p["type"]).strip()
+        param_type = (copy_free and _const_ref_type(p["type"])) or _replace_type(p["type"]).strip()
         function_parameters.append(f"{param_type} {param_name}")
     return ", ".join(function_parameters)
 
@@ -47,6 +63,12 @@ def _cpp_call_parameters(parameters):
         return "::Pointer" in param_type
 
     def _generate_param_call(param_name, param_type, default_value):
+        if "std::vector<Array::Pointer>" in param_type:
+            # CLIc takes the arrays held by the ArrayJ, collected in a vector of their own
+            return (
+                f"[&] {{ std::vector<cle::Array::Pointer> arrays; arrays.reserve({param_name}.size()); "
+                f"for (const auto & array : {param_name}) {{ arrays.push_back(array.get()); }} return arrays; }}()"
+            )
         param_call = "->get()" if _is_pointer_type(param_type) else ""
         if default_value == "None" and _is_pointer_type(param_type):
             return f"{param_name} == nullptr ? nullptr : {param_name}{param_call}"
@@ -61,12 +83,26 @@ def _cpp_call_parameters(parameters):
     return ", ".join(native_call)
 
 
-def _generate_native_functions(tier, function_dict):
+def _generate_native_functions(tier, function_dict, copy_free=False):
     native_func_code_template = """
 {return_type} Tier{tier}::{func_name}({argument_list})
 {{
     return {return_prefix}cle::tier{tier}::{func_name}_func({argument_call}){return_suffix};
 }}
+"""
+    # move the returned pointers into the ArrayJ vector instead of copying them
+    native_func_move_code_template = """
+{return_type} Tier{tier}::{func_name}({argument_list})
+{{
+    auto result = cle::tier{tier}::{func_name}_func({argument_call});
+    {return_type} arrays;
+    arrays.reserve(result.size());
+    for (auto & array : result)
+    {{
+        arrays.emplace_back(std::move(array));
+    }}
+    return arrays;
+}}
 """
     native_func_header_template = (
         """static {return_type} {func_name}({argument_list});"""
@@ -76,8 +112,10 @@ def _generate_native_functions(tier, function_dict):
     return_type, return_prefix, return_suffix = __cpp_return_guard(
         function_dict["return"]
     )
-    argument_list = _cpp_function_parameters(function_dict["parameters"])
+    argument_list = _cpp_function_parameters(function_dict["parameters"], copy_free)
     argument_call = _cpp_call_parameters(function_dict["parameters"])
+    if copy_free and function_dict["return"] == "std::vector<Array::Pointer>":
+        native_func_code_template = native_func_move_code_template
     cpp_native = native_func_code_template.format(
         return_type=return_type,
         tier=tier,
@@ -93,9 +131,62 @@ def _generate_native_functions(tier, function_dict):
     return cpp_native, cpp_header
 
 
-def generate_native_tier_code(tier, functions):
-    """For a given tier and list of dictionary describing the functions, it generates the header and source code for the tier."""
-    class_header_template = """
+# element type of the vectors given as primitive arrays, see `_has_primitive_variant`
+_cpp_primitive_parameters = {"std::vector<float>": "float", "std::vector<int>": "int"}
+
+# holder of the result of a primitive-array function, copied into java arrays in bulk
+_cpp_primitive_returns = {"std::vector<float>": "FloatArrayJ", "StatisticsMap": "FloatArraysJ"}
+
+
+def _generate_native_primitive_functions(tier, function_dict):
+    """Generate the native function of a primitive-array variant, see `generate_java_class`.
+
+    Notes: a vector parameter is taken as a pointer and a size, which JavaCPP maps to a
+    java primitive array copied without boxing. A vector result is returned in a holder
+    copying it into java arrays in one call.
+    """
+    native_func_code_template = """
+{return_type} Tier{tier}::{func_name}_primitive({argument_list})
+{{
+    return {return_prefix}cle::tier{tier}::{func_name}_func({argument_call}){return_suffix};
+}}
+"""
+    native_func_header_template = """static {return_type} {func_name}_primitive({argument_list});"""
+
+    func_name = function_dict["name"]
+    return_type, return_prefix, return_suffix = __cpp_return_guard(function_dict["return"])
+    if function_dict["return"] in _cpp_primitive_returns:
+        return_type = _cpp_primitive_returns[function_dict["return"]]
+        return_prefix, return_suffix = f"{return_type}{{", "}"
+    arguments = []
+    calls = []
+    for p in function_dict["parameters"]:
+        name = p["name"].strip()
+        primitive_type = _java_primitive_type(p["type"])
+        if primitive_type:
+            element_type = _cpp_primitive_parameters[primitive_type]
+            arguments.append(f"const {element_type} * {name}, size_t {name}_size")
+            calls.append(f"std::vector<{element_type}>({name}, {name} + {name}_size)")
+        else:
+            arguments.append(_cpp_function_parameters([p]))
+            calls.append(_cpp_call_parameters([p]))
+    argument_list = ", ".join(arguments)
+    cpp_native = native_func_code_template.format(
+        return_type=return_type,
+        tier=tier,
+        func_name=func_name,
+        argument_list=argument_list,
+        argument_call=", ".join(calls),
+        return_prefix=return_prefix,
+        return_suffix=return_suffix,
+    )
+    cpp_header = native_func_header_template.format(
+        return_type=return_type, func_name=func_name, argument_list=argument_list
+    )
+    return cpp_native, cpp_header
+
+
+_native_class_header_template = """
 class Tier{tier}
 {{
 public:
@@ -103,19 +194,31 @@ public:
 }};
 """
 
-    class_code_template = """
+_native_class_code_template = """
 /*
  * This file is autogenerated. Do not edit manually.
  */
 #include "kernelj.hpp"
 #include "tier{tier}.hpp"
-{functions_code}
 """
 
+
+def generate_native_tier_code(tier, functions, copy_free=False, primitive_arrays=False):
+    """For a given tier and list of dictionary describing the functions, it generates the header and source code for the tier.
+
+    With `copy_free`, vector and string parameters are taken by const reference, the
+    vectors of arrays included, and returned vectors of arrays are moved instead of
+    converted by copy.
+
+    With `primitive_arrays`, functions with a primitive-array variant in the java class
+    (see `generate_java_class`) get a `{name}_primitive` native function, which takes its
+    vectors as pointers and sizes and returns its vectors in the holders of the merged
+    header (see `merger_classes_in_header`).
+    """
     functions_headers = []
-    functions_code = []
+    functions_code = [_native_class_code_template.format(tier=tier)]
     for func in functions:
-        code_full, header_full = _generate_native_functions(tier, func)
+        code_full, header_full = _generate_native_functions(tier, func, copy_free)
 
         func_header_str = "".join(header_full)
         functions_headers.append(func_header_str)
@@ -123,20 +226,23 @@ public:
         func_code_str = "".join(code_full)
         functions_code.append(func_code_str)
 
+        if primitive_arrays and _has_primitive_variant(func):
+            code_full, header_full = _generate_native_primitive_functions(tier, func)
+            functions_headers.append("".join(header_full))
+            functions_code.append("".join(code_full))
+
     functions_headers = "\n\t".join(functions_headers)
-    header = class_header_template.format(
+    header = _native_class_header_template.format(
         tier=tier, functions_headers=functions_headers
     )
 
-    functions_code = "".join(functions_code)
-    code = class_code_template.format(tier=tier, functions_code=functions_code)
+    functions_code.append("\n")
+    code = "".join(functions_code)
 
     return header, code
 
 
-def merger_classes_in_header(header_list):
-    """Merges the header code into one header."""
-    header_file = """
+_merged_header_head = """
 /*
  * This file is autogenerated. Do not edit manually.
  */    
@@ -145,13 +251,69 @@ def merger_classes_in_header(header_list):
 
 #include "clesperantoj.hpp"
 
-{header_str}
+"""
+
+_merged_header_tail = """
 
 #endif // __INCLUDE_KERNEL_HPP
 """
 
+# holders of the results of the primitive-array functions, see `generate_native_tier_code`
+_merged_header_primitive_arrays = """#include <algorithm>
+#include <string>
+#include <unordered_map>
+#include <vector>
+
+class FloatArrayJ
+{
+public:
+    FloatArrayJ() = default;
+    FloatArrayJ(std::vector<float> values) : values_(std::move(values)) {}
+
+    size_t size() const { return values_.size(); }
+    void copyTo(float * destination) const { std::copy(values_.begin(), values_.end(), destination); }
+
+private:
+    std::vector<float> values_;
+};
+
+class FloatArraysJ
+{
+public:
+    FloatArraysJ() = default;
+    FloatArraysJ(const std::unordered_map<std::string, std::vector<float>> & map)
+    {
+        keys_.reserve(map.size());
+        values_.reserve(map.size());
+        for (const auto & entry : map)
+        {
+            keys_.push_back(entry.first);
+            values_.emplace_back(entry.second);
+        }
+    }
+
+    size_t size() const { return keys_.size(); }
+    std::string key(size_t index) const { return keys_[index]; }
+    FloatArrayJ value(size_t index) const { return values_[index]; }
+
+private:
+    std::vector<std::string> keys_;
+    std::vector<FloatArrayJ> values_;
+};
+
+"""
+
+
+def merger_classes_in_header(header_list, primitive_arrays=False):
+    """Merges the header code into one header.
+
+    With `primitive_arrays`, the header also defines the holders returned by the
+    primitive-array native functions.
+    """
     header_str = "\n".join(header_list)
-    return header_file.format(header_str=header_str)
+    if primitive_arrays:
+        header_str = _merged_header_primitive_arrays + header_str
+    return _merged_header_head + header_str + _merged_header_tail
 
 
 #
@@ -231,12 +393,13 @@ def _java_return_guard(parameter):
     return mapping.get(parameter, (parameter, "", ""))
 
 
-def _generate_java_function(tier_idx, function_dict):
+def _generate_java_function(tier_idx, function_dict, timing=False):
     function_template = """    public static {return_type} {java_function_name}({function_parameters}) {{
         {parameter_null_checks}
-        return {return_prefix}net.clesperanto._internals.kernelj.Tier{tier_idx}.{native_function_name}({call_parameters}){return_suffix};
+        {return_statement}
     }}
     """
+    call_template = "{return_prefix}net.clesperanto._internals.kernelj.Tier{tier_idx}.{native_function_name}({call_parameters}){return_suffix}"
     native_function_name = function_dict["name"]
     java_function_name = _java_snake_to_camel(function_dict["name"])
     return_type, return_prefix, return_suffix = _java_return_guard(
@@ -245,16 +408,19 @@ def _generate_java_function(tier_idx, function_dict):
     parameter_null_checks = _java_null_check(function_dict["parameters"])
     function_parameters = _java_function_parameters(function_dict["parameters"])
     call_parameters = _java_call_parameters(function_dict["parameters"])
+    call = call_template.format(
+        return_prefix=return_prefix,
+        tier_idx=tier_idx,
+        native_function_name=native_function_name,
+        call_parameters=call_parameters,
+        return_suffix=return_suffix,
+    )
     function = function_template.format(
         return_type=return_type,
         java_function_name=java_function_name,
-        tier_idx=tier_idx,
-        native_function_name=native_function_name,
         function_parameters=function_parameters,
         parameter_null_checks=parameter_null_checks,
-        call_parameters=call_parameters,
-        return_prefix=return_prefix,
-        return_suffix=return_suffix,
+        return_statement=_java_return_statement(tier_idx, native_function_name, call, timing),
     )
     return function.replace("src", "input").replace("dst", "output")
 
@@ -364,8 +530,143 @@ def _generate_java_docstring(function_dict):
     return docstring
 
 
-def generate_java_class(tier_idx, functions):
-    class_template = """
+# java type of the primitive variant, and unboxing of the list given to the boxed function
+_java_primitive_parameters = {
+    "std::vector<float>": ("float[]", "PrimitiveArrays.toFloatArray"),
+    "std::vector<int>": ("int[]", "PrimitiveArrays.toIntArray"),
+}
+
+# java type of the primitive variant, name suffix, copy of the native holder, and boxing
+# of the result of the boxed function
+_java_primitive_returns = {
+    "std::vector<float>": ("float[]", "AsArray", "PrimitiveArrays.toFloatArray", "PrimitiveArrays.toFloatList"),
+    "StatisticsMap": (
+        "HashMap<String, float[]>",
+        "AsArrays",
+        "PrimitiveArrays.toFloatArrays",
+        "PrimitiveArrays.toFloatLists",
+    ),
+}
+
+# name suffix of the variants only taking primitive arrays, an overload would make null ambiguous
+_java_primitive_parameters_suffix = "FromArrays"
+
+
+def _java_primitive_type(param_type):
+    value_type = param_type.replace("const ", "").replace("&", "").strip()
+    return value_type if value_type in _java_primitive_parameters else None
+
+
+def _has_primitive_variant(function_dict):
+    return function_dict["return"] in _java_primitive_returns or any(
+        _java_primitive_type(p["type"]) for p in function_dict["parameters"]
+    )
+
+
+def _java_primitive_function_name(function_dict):
+    """Name of the primitive-array variant of a function."""
+    name = _java_snake_to_camel(function_dict["name"])
+    if function_dict["return"] in _java_primitive_returns:
+        return name + _java_primitive_returns[function_dict["return"]][1]
+    return name + _java_primitive_parameters_suffix
+
+
+def _generate_java_primitive_function(tier_idx, function_dict, timing=False):
+    """Generate the variant of a function taking and returning primitive arrays instead of boxed lists.
+
+    Notes: the arrays go to the `{name}_primitive` native function as they are, and its
+    result is copied from the native holder, so no value is boxed.
+    """
+    primitive_template = """    public static {return_type} {primitive_function_name}({function_parameters}) {{
+        {parameter_null_checks}
+        {return_statement}
+    }}
+    """
+    call_template = "{return_prefix}net.clesperanto._internals.kernelj.Tier{tier_idx}.{native_function_name}_primitive({call_parameters}){return_suffix}"
+    native_function_name = function_dict["name"]
+    parameters = function_dict["parameters"]
+
+    primitive_function_name = _java_primitive_function_name(function_dict)
+    return_type, return_prefix, return_suffix = _java_return_guard(function_dict["return"])
+    if function_dict["return"] in _java_primitive_returns:
+        return_type, _, copy, _ = _java_primitive_returns[function_dict["return"]]
+        return_prefix, return_suffix = f"{copy}(", ")"
+
+    primitive_parameters = []
+    call_parameters = []
+    for p in parameters:
+        param_name = p["name"].strip()
+        primitive_type = _java_primitive_type(p["type"])
+        if primitive_type:
+            java_type, _ = _java_primitive_parameters[primitive_type]
+            primitive_parameters.append(f"{java_type} {param_name}")
+            call_parameters.append(
+                f"{param_name}, {param_name} == null ? 0 : {param_name}.length"
+            )
+        else:
+            primitive_parameters.append(_java_function_parameters([p]))
+            call_parameters.append(_java_call_parameters([p]))
+
+    call = call_template.format(
+        return_prefix=return_prefix,
+        tier_idx=tier_idx,
+        native_function_name=native_function_name,
+        call_parameters=", ".join(call_parameters),
+        return_suffix=return_suffix,
+    )
+    primitive = primitive_template.format(
+        return_type=return_type,
+        primitive_function_name=primitive_function_name,
+        function_parameters=", ".join(primitive_parameters),
+        parameter_null_checks=_java_null_check(parameters),
+        return_statement=_java_return_statement(tier_idx, native_function_name, call, timing),
+    )
+    return primitive.replace("src", "input").replace("dst", "output")
+
+
+def _generate_java_boxed_adapter(function_dict):
+    """Generate the boxed function of a function with a primitive-array variant, converting its lists for it."""
+    adapter_template = """    public static {return_type} {java_function_name}({function_parameters}) {{
+        return {return_prefix}{primitive_function_name}({call_parameters}){return_suffix};
+    }}
+    """
+    return_type, _, _ = _java_return_guard(function_dict["return"])
+    return_prefix, return_suffix = "", ""
+    if function_dict["return"] in _java_primitive_returns:
+        return_prefix, return_suffix = f"{_java_primitive_returns[function_dict['return']][3]}(", ")"
+    call_parameters = []
+    for p in function_dict["parameters"]:
+        param_name = p["name"].strip()
+        primitive_type = _java_primitive_type(p["type"])
+        if primitive_type:
+            call_parameters.append(f"{_java_primitive_parameters[primitive_type][1]}({param_name})")
+        else:
+            call_parameters.append(param_name)
+    adapter = adapter_template.format(
+        return_type=return_type,
+        java_function_name=_java_snake_to_camel(function_dict["name"]),
+        function_parameters=_java_function_parameters(function_dict["parameters"]),
+        return_prefix=return_prefix,
+        primitive_function_name=_java_primitive_function_name(function_dict),
+        call_parameters=", ".join(call_parameters),
+        return_suffix=return_suffix,
+    )
+    return adapter.replace("src", "input").replace("dst", "output")
+
+
+def _primitive_function_dict(function_dict):
+    """Copy of a function dictionary with the java primitive types, used for its docstring."""
+    primitive_dict = copy.deepcopy(function_dict)
+    for p in primitive_dict["parameters"]:
+        primitive_type = _java_primitive_type(p["type"])
+        if primitive_type:
+            p["type"] = _java_primitive_parameters[primitive_type][0]
+    if primitive_dict["return"] in _java_primitive_returns:
+        primitive_dict["return"] = _java_primitive_returns[primitive_dict["return"]][0]
+    return primitive_dict
+
+
+_java_class_head = """
 /**
  * This file is autogenerated. Do not edit manually.
  */    
@@ -383,16 +684,126 @@ import net.clesperanto.core.Utils;
  * Class containing all functions of tier {tier_idx} category
  */
 public class Tier{tier_idx} {{
-{functions}
-}}
 """
 
+_java_class_tail = """
+}
+"""
+
+
+def generate_java_class(tier_idx, functions, primitive_arrays=False, timing=False):
+    """Generate the java class of a tier.
+
+    With `primitive_arrays`, functions taking or returning float vectors, int vectors or
+    statistics maps are followed by a variant using `float[]` / `int[]` arrays, so callers
+    holding primitive arrays do not box them into lists. A variant is suffixed with
+    `AsArray` (`AsArrays` for statistics maps) if its return type changes, else with
+    `FromArrays`, so a `null` argument never makes a call ambiguous. The variants pass
+    their arrays to the `{name}_primitive` native functions as they are, and copy their
+    results from the native holders (see `generate_native_tier_code`), so nothing is
+    boxed. The boxed function becomes an adapter converting its lists for the variant,
+    with the `PrimitiveArrays` class, to be written next to the tier classes (see
+    `generate_java_primitive_arrays_class`).
+
+    With `timing`, each function records its calls and wall time in the `KernelTiming`
+    class (see `generate_java_kernel_timing_class`) when `KernelTiming.ENABLED` is true.
+    """
     func_list = []
     for function in functions:
+        primitive_docstring = None
+        if primitive_arrays and _has_primitive_variant(function):
+            # made first, the docstring generator rewrites the links of the dictionary
+            primitive_docstring = _generate_java_docstring(_primitive_function_dict(function))
         docstring = _generate_java_docstring(function)
-        code = _generate_java_function(tier_idx, function)
+        if primitive_docstring is None:
+            code = _generate_java_function(tier_idx, function, timing)
+        else:
+            code = _generate_java_boxed_adapter(function)
         func_list.append(docstring + "\n" + code)
-    functions_str = "".join(func_list)
+        if primitive_docstring is not None:
+            primitive = _generate_java_primitive_function(tier_idx, function, timing)
+            func_list.append(primitive_docstring + "\n" + primitive)
+    return _java_class_head.format(tier_idx=tier_idx) + "".join(func_list) + _java_class_tail
+
+
+def generate_java_primitive_arrays_class():
+    """Generate `PrimitiveArrays.java`, the conversions used by the primitive-array variants.
+
+    Notes: the class is package-private, it is not part of the clesperantoj API. It copies
+    the native holders into primitive arrays, and converts between primitive arrays and
+    the boxed lists of the adapter functions.
+    """
+    return """/**
+ * This file is autogenerated. Do not edit manually.
+ */
+package net.clesperanto.kernels;
+
+import java.util.ArrayList;
+import java.util.HashMap;
+import java.util.Map;
+
+import net.clesperanto._internals.kernelj.FloatArrayJ;
+import net.clesperanto._internals.kernelj.FloatArraysJ;
+
+/**
+ * Conversions of the primitive arrays of the Tier classes
+ */
+final class PrimitiveArrays {
+
+    private PrimitiveArrays() {
+    }
 
-    # functions_str = "".join([_generate_java_function(tier_idx, function) for function in functions])
-    return class_template.format(tier_idx=tier_idx, functions=functions_str)
+    static float[] toFloatArray(FloatArrayJ holder) {
+        float[] values = new float[(int) holder.size()];
+        holder.copyTo(values);
+        return values;
+    }
+
+    static HashMap<String, float[]> toFloatArrays(FloatArraysJ holder) {
+        int size = (int) holder.size();
+        HashMap<String, float[]> arrays = new HashMap<>(size * 2);
+        for (int i = 0; i < size; i++) {
+            arrays.put(holder.key(i), toFloatArray(holder.value(i)));
+        }
+        return arrays;
+    }
+
+    static float[] toFloatArray(ArrayList<Float> list) {
+        if (list == null) {
+            return null;
+        }
+        float[] values = new float[list.size()];
+        for (int i = 0; i < values.length; i++) {
+            values[i] = list.get(i);
+        }
+        return values;
+    }
+
+    static int[] toIntArray(ArrayList<Integer> list) {
+        if (list == null) {
+            return null;
+        }
+        int[] values = new int[list.size()];
+        for (int i = 0; i < values.length; i++) {
+            values[i] = list.get(i);
+        }
+        return values;
+    }
+
+    static ArrayList<Float> toFloatList(float[] values) {
+        ArrayList<Float> list = new ArrayList<>(values.length);
+        for (float value : values) {
+            list.add(value);
+        }
+        return list;
+    }
+
+    static HashMap<String, ArrayList<Float>> toFloatLists(HashMap<String, float[]> arrays) {
+        HashMap<String, ArrayList<Float>> map = new HashMap<>(arrays.size() * 2);
+        for (Map.Entry<String, float[]> entry : arrays.entrySet()) {
+            map.put(entry.getKey(), toFloatList(entry.getValue()));
+        }
+        return map;
+    }
+}
+"""
@@ -1,9 +1,14 @@
 # This module is in charge of generating the source code for the clesperanto Python bindings.
 
-import textwrap, re
+import inspect, json, textwrap, re
 
+from ._doxygen import _deprecation_message
+from ._timing import _cpp_timer_statement
 
-def _generate_function_wrapper(function_dict: dict, tier: int) -> str:
+
+def _generate_function_wrapper(
+    function_dict: dict, tier: int, release_gil: bool = False, timing: bool = False
+) -> str:
     """Generate pybind11 wrapper code for a single function and return it as a string.
 
     Parameters
@@ -12,6 +17,10 @@ def _generate_function_wrapper(function_dict: dict, tier: int) -> str:
         Function dictionary (json-style).
     tier : int
         Tier number.
+    release_gil : bool, optional
+        If True, release the GIL for the duration of the call, by default False.
+    timing : bool, optional
+        If True, bind a timed lambda when `CLE_KERNEL_TIMING` is defined, by default False.
 
     Returns
     -------
@@ -19,28 +28,199 @@ def _generate_function_wrapper(function_dict: dict, tier: int) -> str:
         Pybind11 wrapper code for a single function.
     """
     _wrapper_func_code = """m.def(\"_{name}\", &cle::tier{tier}::{name}_func, "Call cle::tier{tier}::{name}_func from C++ CLIc.",
-    py::return_value_policy::automatic_reference,
+    py::return_value_policy::automatic_reference,{call_guard}
     {parameters_bindings});"""
+    _timed_wrapper_func_code = """#ifdef CLE_KERNEL_TIMING
+\tm.def(\"_{name}\", []({declarations}) {{
+\t\t{timer}
+\t\treturn cle::tier{tier}::{name}_func({arguments});
+\t}},
+\t"Call cle::tier{tier}::{name}_func from C++ CLIc.",
+\tpy::return_value_policy::automatic_reference,{call_guard}
+\t{parameters_bindings});
+#else
+\t{wrapper}
+#endif"""
 
     name = function_dict["name"].replace("_func", "").strip()
 
     # for each parameter inf function_dict["parameters"], generate a string like 'py::arg("{parameter_name}")'
     parameters_name = [p["name"] for p in function_dict["parameters"]]
     parameters_bindings = ", ".join([f'py::arg("{p}")' for p in parameters_name])
-    return _wrapper_func_code.format(
-        name=name, tier=tier, parameters_bindings=parameters_bindings
+    call_guard = "\n    py::call_guard<py::gil_scoped_release>()," if release_gil else ""
+    wrapper = _wrapper_func_code.format(
+        name=name, tier=tier, call_guard=call_guard, parameters_bindings=parameters_bindings
     ).strip()
+    if not timing:
+        return wrapper
+    # the lambda is only compiled with CLE_KERNEL_TIMING, the binding is unchanged otherwise
+    declarations = [f"{p['type'].strip()} {p['name']}" for p in function_dict["parameters"]]
+    return _timed_wrapper_func_code.format(
+        name=name,
+        tier=tier,
+        declarations=", ".join(declarations),
+        timer=_cpp_timer_statement(tier, name),
+        arguments=", ".join(parameters_name),
+        call_guard=call_guard.replace("    ", "\t"),
+        parameters_bindings=parameters_bindings,
+        wrapper=wrapper,
+    )
+
+
+def _is_array_type(param_type: str) -> bool:
+    return "Array::Pointer" in param_type and "std::vector" not in param_type
+
+
+def _is_output_image(parameter: dict) -> bool:
+    """Whether a parameter is an output image, named `dst` (`output_image` in Python) by CLIc."""
+    return _is_array_type(parameter["type"]) and _convert_cpp_name_to_python(
+        parameter["name"].strip()
+    ).startswith("output_image")
+
+
+def _is_input_image(parameter: dict) -> bool:
+    return _is_array_type(parameter["type"]) and not _is_output_image(parameter)
+
+
+def _is_batchable(function_dict: dict) -> bool:
+    """Whether a kernel can be run over a batch: it takes a device and an input image, and returns an image."""
+    parameters = function_dict["parameters"]
+    return (
+        function_dict["return"].strip() == "Array::Pointer"
+        and len(parameters) > 1
+        and "Device::Pointer" in parameters[0]["type"]
+        and any(_is_input_image(p) for p in parameters)
+    )
 
 
-def generate_wrapper_file(function_list: list, tier: int) -> str:
+def _generate_batch_wrapper(
+    function_dict: dict, tier: int, release_gil: bool = True, timing: bool = False
+) -> str:
+    """Generate the pybind11 wrapper running a kernel on each image of a batch.
+
+    Parameters
+    ----------
+    function_dict : dict
+        Function dictionary (json-style), see `_is_batchable`.
+    tier : int
+        Tier number.
+    release_gil : bool, optional
+        If True, release the GIL during the loop over the batch, by default True.
+    timing : bool, optional
+        If True, time each call when `CLE_KERNEL_TIMING` is defined, by default False.
+
+    Returns
+    -------
+    str
+        Pybind11 wrapper code of the batch function.
+    """
+    _batch_func_code = """m.def("_{name}_batch", []({declarations}) -> std::vector<Array::Pointer> {{
+\t\tconst auto count = {first_input}.size();{size_check}
+\t\tstd::vector<Array::Pointer> result(count);
+\t\tif (count == 0) {{
+\t\t\treturn result;
+\t\t}}
+\t\tconst auto batch_device = {device} ? {device} : {first_input}.front()->device();
+\t\t{{{gil_release}
+\t\t\tfor (std::size_t i = 0; i < count; ++i) {{{timer}
+\t\t\t\tresult[i] = cle::tier{tier}::{name}_func({arguments});
+\t\t\t}}
+\t\t}}
+\t\treturn result;
+\t}},
+\t"Call cle::tier{tier}::{name}_func from C++ CLIc on each image of a batch.",
+\t{parameters_bindings});"""
+
+    name = function_dict["name"].replace("_func", "").strip()
+    parameters = function_dict["parameters"]
+    device = parameters[0]["name"]
+    declarations = []
+    arguments = []
+    inputs = []
+    outputs = []
+    for p in parameters:
+        param_type = p["type"].strip()
+        if p is parameters[0]:
+            declarations.append(f"{param_type} {device}")
+            arguments.append("batch_device")
+        elif _is_array_type(param_type):
+            declarations.append(f"const std::vector<Array::Pointer> & {p['name']}")
+            if _is_input_image(p):
+                inputs.append(p["name"])
+                arguments.append(f"{p['name']}[i]")
+            else:
+                outputs.append(p["name"])
+                arguments.append(f"{p['name']}.empty() ? nullptr : {p['name']}[i]")
+        else:
+            declarations.append(f"{param_type} {p['name']}")
+            arguments.append(p["name"])
+
+    # inputs have one image per item of the batch, outputs too or none to create them
+    mismatches = [f"{i}.size() != count" for i in inputs[1:]]
+    mismatches += [f"!{o}.empty() && {o}.size() != count" for o in outputs]
+    if len(mismatches) > 1:
+        mismatches = [f"({m})" if "&&" in m else m for m in mismatches]
+    size_check = ""
+    if mismatches:
+        size_check = (
+            f"\n\t\tif ({' || '.join(mismatches)}) {{"
+            f'\n\t\t\tthrow std::invalid_argument("_{name}_batch: the image lists must have the same length");'
+            "\n\t\t}"
+        )
+    gil_release = "\n\t\t\tpy::gil_scoped_release release;" if release_gil else ""
+    return _batch_func_code.format(
+        name=name,
+        tier=tier,
+        declarations=", ".join(declarations),
+        first_input=inputs[0],
+        size_check=size_check,
+        device=device,
+        gil_release=gil_release,
+        timer=f"\n\t\t\t\t{_cpp_timer_statement(tier, name)}" if timing else "",
+        arguments=", ".join(arguments),
+        parameters_bindings=", ".join([f'py::arg("{p["name"]}")' for p in parameters]),
+    )
+
+
+def generate_wrapper_file(
+    function_list: list,
+    tier: int,
+    release_gil: bool = False,
+    gil_opt_out: list = None,
+    batch: bool = False,
+    timing: bool = False,
+) -> str:
     """Generate pybind11 wrapper code for a single tier and return it as a string.
 
+    Notes: with `release_gil`, each binding gets a `py::call_guard<py::gil_scoped_release>`
+    so that concurrent Python threads can run kernels in parallel. Functions touching
+    Python objects must keep the GIL and be listed in `gil_opt_out`.
+
+    With `batch`, kernels taking a device and input images and returning an image also get
+    a `_{name}_batch` binding. It takes a list of images for each image parameter and
+    loops over them in C++ with the GIL released, so a whole batch costs a single call from
+    Python. An empty output list lets the kernel create the outputs, and without device the
+    device of the first input image is used.
+
+    With `timing`, each binding calls the kernel from a lambda recording its calls and
+    wall time (see `generate_kernel_timing_header`) when the extension is compiled with
+    `CLE_KERNEL_TIMING` defined, and is unchanged otherwise.
+
     Parameters
     ----------
     function_list : list
         list of function diction (json-style) contained in tier.
     tier : int
         Tier number.
+    release_gil : bool, optional
+        If True, release the GIL during the kernel calls, by default False.
+    gil_opt_out : list, optional
+        Names of the functions keeping the GIL when `release_gil` is True, and in their
+        batch binding.
+    batch : bool, optional
+        If True, also generate the batch bindings, by default False.
+    timing : bool, optional
+        If True, generate the timing instrumentation, by default False.
 
     Returns
     -------
@@ -50,7 +230,7 @@ def generate_wrapper_file(function_list: list, tier: int) -> str:
     _wrapper_file_code = """// this code is auto-generated, do not edit manually
     
 #include "pycle_wrapper.hpp"
-#include "tier{tier}.hpp"
+#include "tier{tier}.hpp"{timing_includes}{batch_includes}
 
 namespace py = pybind11;
 
@@ -58,10 +238,27 @@ auto tier{tier}_(py::module &m) -> void {{
 {list_function_code}
 }}
 """
-    list_function_code = [_generate_function_wrapper(f, tier) for f in function_list]
+    gil_opt_out = set(gil_opt_out or [])
+    list_function_code = []
+    for f in function_list:
+        name = f["name"].replace("_func", "").strip()
+        list_function_code.append(
+            _generate_function_wrapper(f, tier, release_gil and name not in gil_opt_out, timing)
+        )
+        if batch and _is_batchable(f):
+            list_function_code.append(
+                _generate_batch_wrapper(f, tier, name not in gil_opt_out, timing)
+            )
     str_function_code = "\n\n\t".join(list_function_code).strip()
+    # preprocessor directives of the timing instrumentation are not indented
+    str_function_code = re.sub(r"^\t#", "#", str_function_code, flags=re.MULTILINE)
+    batch_includes = "\n\n#include <stdexcept>\n#include <vector>" if batch else ""
+    timing_includes = '\n#include "kernel_timing.hpp"' if timing else ""
     _wrapper_file_code = _wrapper_file_code.format(
-        tier=tier, list_function_code=str_function_code
+        tier=tier,
+        batch_includes=batch_includes,
+        timing_includes=timing_includes,
+        list_function_code=str_function_code,
     )
     _wrapper_file_code = re.sub(r"\t", "    ", _wrapper_file_code)
     return _wrapper_file_code.strip()
@@ -244,50 +441,102 @@ def _generate_decorator(function_dict: dict) -> str:
     return decorator_defines
 
 
+def _full_deprecation_message(function_dict: dict) -> str:
+    """Return the deprecation message of a function, empty if it is not deprecated."""
+    message = _deprecation_message(function_dict)
+    if not message:
+        return ""
+
+    function_name = function_dict["name"].replace("_func", "").strip()
+    return f"{function_name}: {message}"
+
+
 def _generate_deprecated_decorator(function_dict: dict) -> str:
     """Generate the deprecation decorator line for a function, if needed."""
-    deprecation = function_dict.get("deprecation", {})
-    if not deprecation:
+    full_message = _full_deprecation_message(function_dict)
+    if not full_message:
         return ""
+    return f"@deprecated({full_message!r})\n"
 
-    if isinstance(deprecation, list):
-        message = " ".join(deprecation).strip()
-    else:
-        message = deprecation.strip()
-    if not message:
-        return ""
 
+def _generate_deprecation_check(function_dict: dict) -> str:
+    """Generate the first statement of a deprecated function in registration mode, warning on its first call."""
+    if not _full_deprecation_message(function_dict):
+        return ""
     function_name = function_dict["name"].replace("_func", "").strip()
-    full_message = f"{function_name}: {message}"
-    return f"@deprecated({full_message!r})\n"
+    return f'if "{function_name}" in _deprecations:\n\t\t_warn_deprecated("{function_name}")\n\t'
+
 
+def _generate_push_statements(function_dict: dict) -> str:
+    """Generate the statements of an undecorated function doing the work of `plugin_function`.
 
-def _generate_python_function(function_dict: dict) -> str:
+    Notes: the device is resolved from the device argument, else the first image, else the
+    current device, and each image argument is pushed to it.
+    """
+    images = [
+        _convert_cpp_name_to_python(p["name"]).strip()
+        for p in function_dict["parameters"]
+        if _is_array_type(p["type"])
+    ]
+    has_device = any("Device::Pointer" in p["type"] for p in function_dict["parameters"])
+    if not images and not has_device:
+        return ""
+    statements = [f"device = _device_of({'device' if has_device else 'None'}, {', '.join(images)})"]
+    statements += [f"{image} = _push({image}, device)" for image in images]
+    return "".join(f"{statement}\n\t" for statement in statements)
+
+
+def _generate_python_function(
+    function_dict: dict,
+    fast: bool = False,
+    registration: bool = False,
+    external_docstrings: bool = False,
+    deferred: bool = False,
+) -> str:
     """Generate Python function code for a single function and return it as a string.
 
     Parameters
     ----------
     function_dict : dict
         Function dictionary.
+    fast : bool, optional
+        If True, call the cached backend and only cast integers, by default False.
+    registration : bool, optional
+        If True, leave the function undecorated, see `generate_registration_table`, by
+        default False.
+    external_docstrings : bool, optional
+        If True, leave the docstring out, see `generate_docstrings_json`, by default False.
+    deferred : bool, optional
+        If True, record the call instead of running it, see `generate_deferred_module`,
+        by default False.
 
     Returns
     -------
     str
         Python function code for a single function.
     """
-    _python_func_code = """{deprecation_decorator}@plugin_function{decorator}
-def {function_name}(
+    _python_func_code = """{decorators}def {function_name}(
     {python_parameters_str}
 ) -> {return_type}:
-    {docstring_str}
-    return _get_backend()._{function_name}({arguments_str})
+    {docstring_str}{deprecation_check}{push_str}return {call_str}
 """
 
     function_name = function_dict["name"].replace("_func", "").strip()
     return_type = _convert_cpp_type_to_python(function_dict["return"])
-    _docstring_str = _generate_function_docstring(function_dict)
-    decorator = _generate_decorator(function_dict)
-    deprecation_decorator = _generate_deprecated_decorator(function_dict)
+    push_str = ""
+    _docstring_str = ""
+    if not external_docstrings:
+        _docstring_str = _generate_function_docstring(function_dict) + "\n\t"
+    if registration:
+        decorators = ""
+        deprecation_check = _generate_deprecation_check(function_dict)
+        push_str = _generate_push_statements(function_dict)
+    else:
+        decorators = (
+            _generate_deprecated_decorator(function_dict)
+            + f"@plugin_function{_generate_decorator(function_dict)}\n"
+        )
+        deprecation_check = ""
 
     arguments_list = []
     python_parameters_list = []
@@ -298,89 +547,760 @@ def {function_name}(
         default = p["default_value"].strip()
         default_value = f" ={default}" if len(default) > 0 else ""
         python_parameters_list.append(f"{param_name}: {param_type}{default_value}")
+        # pybind11 implicitly converts int to float, only float to int needs a cast
+        casted_types = ["int"] if fast else ["int", "float", "str"]
         arguments_list.append(
             param_name
-            if param_type not in ["int", "float", "str"]
+            if param_type not in casted_types
             else f"{param_type}({param_name})"
         )
     # put the first element of python_parameters_list at the end of the list
     python_parameters_list.append(python_parameters_list.pop(0))
     python_parameters_str = ",\n\t".join(python_parameters_list)
     arguments_str = ", ".join(arguments_list)
+    call_str = f"{_backend_expression(fast)}._{function_name}({arguments_str})"
+    if deferred:
+        # only the images are computed later, other results are read as soon as returned
+        recorder = "_record" if return_type == "Image" else "_run"
+        call_str = f'{recorder}("{function_name}", {arguments_str})'
 
     return _python_func_code.format(
-        decorator=decorator,
-        deprecation_decorator=deprecation_decorator,
+        decorators=decorators,
+        deprecation_check=deprecation_check,
+        push_str=push_str,
         function_name=function_name,
         python_parameters_str=python_parameters_str,
         return_type=return_type,
         docstring_str=_docstring_str,
-        arguments_str=arguments_str,
+        call_str=call_str,
     ).strip()
 
 
+def _generate_python_batch_function(
+    function_dict: dict, fast: bool = False, registration: bool = False, deferred: bool = False
+) -> str:
+    """Generate the Python function running a kernel on each image of a batch, see `_is_batchable`.
+
+    Parameters
+    ----------
+    function_dict : dict
+        Function dictionary.
+    fast : bool, optional
+        If True, call the cached backend and only cast integers, by default False.
+    registration : bool, optional
+        If True, warn about a deprecation without decorator, by default False.
+    deferred : bool, optional
+        If True, compute the recorded images of the batch before the call, by default
+        False.
+
+    Returns
+    -------
+    str
+        Python function code for the batch function.
+    """
+    _python_batch_func_code = """{deprecation_decorator}def {function_name}_batch(
+    {python_parameters_str}
+) -> list:
+    \"\"\"Run `{function_name}` on each image of a batch, in a single call to the backend.
+
+    The image parameters take lists of images, processed item by item, while the other
+    parameters are shared by the whole batch. The loop over the batch runs in C++.
+
+    Parameters
+    ----------
+    {parameters_str}
 
-def generate_api_functions_list(function_list: list) -> str:
+    Returns
+    -------
+    list
+    \"\"\"
+    {deprecation_check}{push_str}return {call_str}
+"""
+
+    function_name = function_dict["name"].replace("_func", "").strip()
+
+    arguments_list = []
+    python_parameters_list = []
+    parameters_list = []
+    inputs = []
+    push_list = []
+    for p, cpp_p in zip(
+        map(_convert_argument_from_cpp_to_python, function_dict["parameters"]),
+        function_dict["parameters"],
+    ):
+        param_name = p["name"]
+        param_type = p["type"]
+        default = p["default_value"].strip()
+        description = p["description"]
+        # the images of the lists are pushed to the device, as plugin_function does for an image
+        if _is_input_image(cpp_p):
+            param_type = "list"
+            inputs.append(param_name)
+            push_list.append(f"{param_name} = [_push(image, device) for image in {param_name}]")
+            arguments_list.append(param_name)
+        elif _is_output_image(cpp_p):
+            param_type = "Optional[list]"
+            description += " One per input image, or None to create them."
+            push_list.append(
+                f"{param_name} = [] if {param_name} is None else "
+                f"[_push(image, device) for image in {param_name}]"
+            )
+            arguments_list.append(param_name)
+        else:
+            casted_types = ["int"] if fast else ["int", "float", "str"]
+            arguments_list.append(
+                param_name if param_type not in casted_types else f"{param_type}({param_name})"
+            )
+        default_value = f" ={default}" if len(default) > 0 else ""
+        python_parameters_list.append(f"{param_name}: {param_type}{default_value}")
+        default_str = f"(= {default})" if len(default) > 0 else ""
+        parameters_list.append(f"{param_name}: {param_type} {default_str}\n\t\t{description}")
+    # put the device at the end of the parameters
+    python_parameters_list.append(python_parameters_list.pop(0))
+    parameters_list.append(parameters_list.pop(0))
+    arguments_str = ", ".join(arguments_list)
+    call_str = f"{_backend_expression(fast)}._{function_name}_batch({arguments_str})"
+    if deferred:
+        call_str = f'_run("{function_name}_batch", {arguments_str})'
+    # without device, the batch runs on the device of its first image
+    images_str = ", ".join(f"*{name}" for name in inputs)
+    push_list.insert(0, f"device = _device_of(device, {images_str})")
+
+    return _python_batch_func_code.format(
+        deprecation_decorator="" if registration else _generate_deprecated_decorator(function_dict),
+        deprecation_check=_generate_deprecation_check(function_dict) if registration else "",
+        push_str="".join(f"{line}\n\t" for line in push_list),
+        function_name=function_name,
+        python_parameters_str=",\n\t".join(python_parameters_list),
+        parameters_str="\n\t".join(parameters_list),
+        call_str=call_str,
+    ).strip()
+
+
+def generate_api_functions_list(function_list: list, batch: bool = False) -> str:
     """Generate __all__ list for the Python module.
 
     Parameters
     ----------
     function_list : list
         List of function dictionaries.
+    batch : bool, optional
+        If True, also list the batch functions, by default False.
 
     Returns
     -------
     str
         __all__ list for the Python module.
     """
-    function_names = [
-        f'"{f["name"].replace("_func", "").strip()}"' for f in function_list
-    ]
+    function_names = []
+    for f in function_list:
+        function_names.append(f'"{f["name"].replace("_func", "").strip()}"')
+        if batch and _is_batchable(f):
+            function_names.append(f'"{f["name"].replace("_func", "").strip()}_batch"')
     # generate a string __all__ = [ "func1", "func2", ... ]
     api_functions_list = ", ".join(function_names)
     return f"__all__ = [{api_functions_list}]"
 
 
 
-def generate_python_file(function_list: list, tier: int) -> str:
+def generate_registration_table(function_list: list) -> str:
+    """Generate the registration table of a module, replacing the function decorators.
+
+    Notes: the categories, priority and deprecation message of each function are set as
+    attributes of the function object when the module is imported, as `plugin_function`
+    does, and the function itself is left unwrapped. A function without categories or
+    priority gets the defaults of `plugin_function`, None and 0, and its `__module__` is
+    the package. A deprecated function checks a flag on each call and warns on the first
+    one only, other functions have no check at all.
+
+    Parameters
+    ----------
+    function_list : list
+        List of function dictionaries.
+
+    Returns
+    -------
+    str
+        Python code of the registration table, to put after the functions.
+    """
+    from ._registry import _parse_categories, _parse_priority
+
+    _registration_code = """# categories, priority and deprecation of the functions, set as function attributes
+_REGISTRATION = {{
+{registration_str}
+}}
+
+
+def _register_functions():
+\tmodule = globals()
+\tfor name, attributes in _REGISTRATION.items():
+\t\tfunction = module[name]
+\t\tfunction.categories = None
+\t\tfunction.priority = 0
+\t\tfunction.__module__ = __package__
+\t\tfor key, value in attributes.items():
+\t\t\tsetattr(function, key, value){deprecation_str}
+
+
+_register_functions()
+"""
+    _deprecation_code = """
+\t\tif "deprecation" in attributes:
+\t\t\t_deprecations[name] = attributes["deprecation"]"""
+    registration_list = []
+    for f in function_list:
+        attributes = {}
+        if f["category"].strip():
+            attributes["categories"] = _parse_categories(f["category"])
+        priority = _parse_priority(f["priority"])
+        if priority is not None:
+            attributes["priority"] = priority
+        if _full_deprecation_message(f):
+            attributes["deprecation"] = _full_deprecation_message(f)
+        name = f["name"].replace("_func", "").strip()
+        registration_list.append(f"\t{json.dumps(name)}: {json.dumps(attributes)},")
+    return _registration_code.format(
+        registration_str="\n".join(registration_list),
+        deprecation_str=_deprecation_code if any(map(_full_deprecation_message, function_list)) else "",
+    )
+
+
+def generate_docstrings_json(function_list: list) -> str:
+    """Generate the side file holding the docstrings of a tier, for `external_docstrings`.
+
+    Notes: the docstrings are cleaned as `inspect.getdoc` would and indexed by function
+    name. The file is named `_tier{N}_docstrings.json` and installed next to the tier
+    module, which reads it when it is imported.
+
+    Parameters
+    ----------
+    function_list : list
+        List of function dictionaries.
+
+    Returns
+    -------
+    str
+        Json content.
+    """
+    docstrings = {}
+    for f in function_list:
+        docstring = re.sub(r"\t", "    ", _generate_function_docstring(f))
+        docstrings[f["name"].replace("_func", "").strip()] = inspect.cleandoc(docstring[3:-3])
+    return json.dumps(docstrings, separators=(",", ":"))
+
+
+# deprecation flags of the functions, checked on each call in registration mode
+_deprecations_code = """
+_deprecations = {}
+
+
+def _warn_deprecated(name):
+    \"\"\"Warn about a deprecated function on its first call only.\"\"\"
+    message = _deprecations.pop(name, None)
+    if message is not None:
+        warnings.warn(message, DeprecationWarning, stacklevel=3)
+"""
+
+
+# device resolution and push of the images, done by `plugin_function` for decorated functions
+_images_code = """
+
+def _device_of(device, *images):
+\t\"\"\"Return the device of a call: the given one, else the one of the first image, else the current one.\"\"\"
+\tif isinstance(device, Device):
+\t\treturn device
+\tfor image in images:
+\t\tif is_image(image):
+\t\t\timage_device = getattr(image, "device", None)
+\t\t\treturn image_device if isinstance(image_device, Device) else get_device()
+\treturn get_device()
+
+
+def _push(image, device):
+\t\"\"\"Push an image to the device, a device array or None is returned as it is.\"\"\"
+\treturn push(image, device=device) if is_image(image) else image
+"""
+
+# imports of the device resolution and push helpers, only in the modules using them
+_images_imports = [
+    ("from ._array import is_image", r"\bis_image\("),
+    ("from ._core import get_device", r"\bget_device\("),
+    ("from ._memory import push", r"\bpush\("),
+]
+
+
+def _backend_expression(fast: bool) -> str:
+    """Expression giving the backend module in a generated function.
+
+    Notes: in fast mode, the active backend kept by `_backend.py` is read without a call,
+    `_get_backend()` is only called to select it on the first kernel call. Nothing is
+    resolved at import, and `select_backend` takes effect on the next call.
+    """
+    if fast:
+        return "(_backends._active_backend or _get_backend())"
+    return "_get_backend()"
+
+
+# import of the backend state module, only in fast mode
+_fast_import = ("from . import _backend as _backends", r"\b_backends\.")
+
+
+# import groups of the generated modules, each import with the pattern telling if it is used
+_python_imports = [
+    [("import warnings", r"\bwarnings\."), ("from typing import Optional", r"\bOptional\b")],
+    [("import numpy as np", r"\bnp\.")],
+    [
+        ("from ._array import Image", r"\bImage\b"),
+        ("from ._backend import _get_backend", r"\b_get_backend\b"),
+        ("from ._core import Device", r"\bDevice\b"),
+        ("from ._decorators import plugin_function", r"@plugin_function\b"),
+        ("from ._utils import deprecated", r"@deprecated\("),
+    ],
+]
+
+# imports of the decorators, unused in registration mode
+_decorator_imports = [
+    "from ._decorators import plugin_function",
+    "from ._utils import deprecated",
+]
+
+# docstrings of the functions set from the side file of the module, with external docstrings
+_docstrings_code = """# docstrings of the functions, kept in a side file loaded with the module
+def _load_docstrings():
+\tpath = os.path.join(os.path.dirname(__file__), __name__.rpartition(".")[2] + "_docstrings.json")
+\ttry:
+\t\twith open(path, "r", encoding="utf-8") as file:
+\t\t\tdocstrings = json.load(file)
+\texcept (OSError, ValueError):
+\t\treturn
+\tmodule = globals()
+\tfor name, docstring in docstrings.items():
+\t\tif name in module:
+\t\t\tmodule[name].__doc__ = docstring
+
+
+_load_docstrings()
+"""
+
+# imports of the docstring loader, only with external docstrings
+_docstrings_imports = [("import json", r"\bjson\."), ("import os", r"\bos\.")]
+
+# import of the graph recorder, only in deferred mode
+_deferred_import = ("from ._deferred import _record, _run", r"\b_(record|run)\(")
+
+
+def _merge_imports(lines: list) -> list:
+    """Merge the `from module import name` lines of the same module, keeping the first position."""
+    merged = {}
+    for line in lines:
+        module, _, names = line.partition(" import ")
+        if line.startswith("from ") and module in merged:
+            merged[module] += ", " + names
+        elif line.startswith("from "):
+            merged[module] = names
+        else:
+            merged[line] = None
+    return [line if names is None else f"{line} import {names}" for line, names in merged.items()]
+
+
+def _generate_imports(
+    code: str, trim_imports: bool, extra_imports: list = (), excluded_imports: list = ()
+) -> str:
+    """Generate the import block of a module, keeping only the imports used by code if trim_imports.
+
+    The extra imports of the optional modes are sorted into the standard library or the
+    package imports, and the excluded imports are left out even without trim_imports.
+    """
+    package_imports = [i for i in extra_imports if i[0].startswith("from .")]
+    standard_imports = [i for i in extra_imports if not i[0].startswith("from .")]
+    groups = []
+    for group in _python_imports:
+        extra = package_imports if group is _python_imports[-1] else []
+        extra = standard_imports if group is _python_imports[0] else extra
+        if extra:
+            # plain imports first, as in the default import block
+            group = sorted(group + extra, key=lambda i: (i[0].startswith("from "), i[0]))
+        group = [(line, pattern) for line, pattern in group if line not in excluded_imports]
+        lines = [line for line, pattern in group if not trim_imports or re.search(pattern, code)]
+        lines = _merge_imports(lines)
+        if lines:
+            groups.append("\n".join(lines))
+    return "\n\n".join(groups)
+
+
+def generate_python_file(
+    function_list: list,
+    tier: int,
+    fast: bool = False,
+    trim_imports: bool = False,
+    batch: bool = False,
+    registration: bool = False,
+    external_docstrings: bool = False,
+    deferred: bool = False,
+) -> str:
     """Generate Python code for a single tier and return it as a string.
 
+    Notes: in fast mode, the functions read the active backend module of `_backend.py`
+    instead of calling `_get_backend()` on every call, and `float`/`str` casts handled by
+    pybind11 are dropped. The backend is still selected on the first kernel call, not at
+    import, and a `select_backend` call applies to the next kernel call. The functions are
+    not decorated by `plugin_function`, whose binding of the arguments to the signature is
+    most of the cost of a call, so `fast` implies `registration`.
+
+    With `batch`, each function with a batch binding (see `generate_wrapper_file`) is
+    followed by a `{name}_batch` function calling it with lists of images. As the batch
+    functions are not decorated, they resolve the device and push the images of the lists
+    themselves, the way `plugin_function` does.
+
+    With `registration`, functions are not decorated by `plugin_function` and
+    `deprecated`, so a call goes straight to the backend. Each function resolves its
+    device and pushes its images inline instead, and their metadata are set by a
+    registration table at the end of the module (see `generate_registration_table`).
+
+    With `external_docstrings`, the functions have no docstring, which makes the module
+    smaller to load. Their docstrings go to a side file (see `generate_docstrings_json`)
+    read when the module is imported, so `__doc__` is set however the functions are
+    imported. The batch functions keep their short docstring.
+
+    With `deferred`, a function returning an image records its call and returns a
+    `DeferredImage` at once. The recorded calls form a graph, whose nodes are the
+    intermediate images, run by a single backend call when a result is read (see
+    `generate_deferred_module`). Functions returning something else run the pending
+    graph first, then run as usual. Recording only happens with a backend defining
+    `_execute_graph`, with another backend the calls run at once. As `plugin_function`
+    would inspect the deferred images, `deferred` implies `registration`.
+
     Parameters
     ----------
     function_list : list
         List of function dictionaries.
     tier : int
         Tier number.
+    fast : bool, optional
+        If True, generate lower-overhead functions, by default False. Implies
+        `registration`.
+    trim_imports : bool, optional
+        If True, only import what the generated functions use, by default False.
+    batch : bool, optional
+        If True, also generate the batch functions, by default False.
+    registration : bool, optional
+        If True, replace the decorators by a registration table, by default False.
+    external_docstrings : bool, optional
+        If True, leave the docstrings out of the functions, by default False.
+    deferred : bool, optional
+        If True, record the kernel calls in a graph run when a result is read, by default
+        False. Implies `registration`.
 
     Returns
     -------
     str
         Python code for a single tier.
     """
-    _python_code = """#
+    _header_code = """#
 # This code is auto-generated from CLIc 'cle::tier{tier}.hpp' file, do not edit manually.
 #
 
-import warnings
-from typing import Optional
+{imports_str}
+{backend_cache_str}
+"""
+    # plugin_function is most of the overhead of a fast call, and would inspect the deferred
+    # images, the functions are left undecorated in both modes
+    registration = registration or fast or deferred
+    backend_cache_str = ""
+    with_deprecations = registration and any(map(_full_deprecation_message, function_list))
+    if with_deprecations:
+        backend_cache_str += _deprecations_code
+    # undecorated functions resolve their device and push their images themselves
+    with_push = registration or (batch and any(_is_batchable(f) for f in function_list))
+    if with_push:
+        backend_cache_str += _images_code
+    python_functions = [
+        code
+        for f in function_list
+        for code in (
+            [
+                _generate_python_function(f, fast, registration, external_docstrings, deferred),
+                _generate_python_batch_function(f, fast, registration, deferred),
+            ]
+            if batch and _is_batchable(f)
+            else [_generate_python_function(f, fast, registration, external_docstrings, deferred)]
+        )
+    ]
+    python_functions_str = "\n\n".join(python_functions)
+    if trim_imports:
+        imports_code = backend_cache_str + python_functions_str
+        imports_code += _docstrings_code if external_docstrings else ""
+    else:
+        imports_code = ""
+    extra_imports = []
+    if with_push:
+        extra_imports += _images_imports
+    # deferred functions reach the backend through the graph recorder only
+    if fast and not deferred:
+        extra_imports.append(_fast_import)
+    if deferred:
+        extra_imports.append(_deferred_import)
+    if external_docstrings:
+        extra_imports += _docstrings_imports
+    excluded_imports = []
+    if registration:
+        excluded_imports += _decorator_imports
+        if not with_deprecations:
+            excluded_imports.append("import warnings")
+    imports_str = _generate_imports(imports_code, trim_imports, extra_imports, excluded_imports)
+
+    sections = [python_functions_str]
+    if registration:
+        sections.append(generate_registration_table(function_list))
+    if external_docstrings:
+        sections.append(_docstrings_code)
+    sections.append(generate_api_functions_list(function_list, batch))
+    _python_code = _header_code.format(
+        tier=tier, imports_str=imports_str, backend_cache_str=backend_cache_str
+    )
+    _python_code += "\n\n".join(sections) + "\n"
+    _python_code = re.sub(r"\t", "    ", _python_code)
+    return _python_code.strip()
+
 
-import numpy as np
+def generate_lazy_index_file(function_lists: dict, batch: bool = False) -> str:
+    """Generate a module indexing the functions of all tiers, loading their module on first access.
+
+    Notes: the generated module defines PEP 562 `__getattr__` and `__dir__`, to be imported
+    in the package `__init__.py` (`from ._tier_index import __getattr__, __dir__`) in place
+    of the `from ._tierN import *` imports. A tier module is then only imported when one
+    of its functions is used, and the function is cached on the package.
+
+    Parameters
+    ----------
+    function_lists : dict
+        List of function dictionaries, indexed by tier number.
+    batch : bool, optional
+        If True, also index the batch functions, as generated by `generate_python_file`
+        with `batch`, by default False.
+
+    Returns
+    -------
+    str
+        Python code of the index module.
+    """
+    _index_code = """#
+# This code is auto-generated from CLIc tier files, do not edit manually.
+#
+
+import importlib
+import sys
+
+_FUNCTION_MODULES = {{
+{index_str}
+}}
+
+__all__ = list(_FUNCTION_MODULES)
+
+
+def __getattr__(name):
+    module_name = _FUNCTION_MODULES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {{__package__!r}} has no attribute {{name!r}}")
+    function = getattr(importlib.import_module(module_name, __package__), name)
+    setattr(sys.modules[__package__], name, function)
+    return function
+
+
+def __dir__():
+    return sorted(set(vars(sys.modules[__package__])) | set(_FUNCTION_MODULES))
+"""
+    # as with star imports, a function defined in several tiers comes from the last one
+    function_modules = {}
+    for tier in sorted(function_lists):
+        for f in function_lists[tier]:
+            name = f["name"].replace("_func", "").strip()
+            function_modules[name] = f"._tier{tier}"
+            if batch and _is_batchable(f):
+                function_modules[f"{name}_batch"] = f"._tier{tier}"
+    index_list = [f'\t"{name}": "{module}",' for name, module in function_modules.items()]
+    _index_code = _index_code.format(index_str="\n".join(index_list))
+    _index_code = re.sub(r"\t", "    ", _index_code)
+    return _index_code.strip()
+
+
+def generate_deferred_module() -> str:
+    """Generate `_deferred.py`, the graph recorder of the functions generated with `deferred`.
+
+    Notes: a generated function returning an image calls `_record`, which appends the
+    call to the graph of the current thread and returns a `DeferredImage`. Its arguments
+    which are pending deferred images become edges of the graph. When an image is read,
+    the whole graph is passed to the backend `_execute_graph(operations, keep)` in one
+    call:
+
+    - `operations` lists `(name, arguments, dependencies)` in call order, where
+      `dependencies` maps the index of an argument to the index of the operation giving
+      it, the argument itself being None.
+    - `keep` lists the indices of the operations whose image is still referenced in
+      Python. The others are intermediate images, whose buffers the backend may reuse.
+
+    It returns one result per operation, None for the intermediate ones. Recording is
+    gated on this entry point: with a backend which does not define it, `_record` runs
+    the call at once through the usual `_{name}` binding and returns the image, so the
+    functions behave as without `deferred`. A generated function returning anything
+    else calls `_run`, which runs the pending graph first. If `_execute_graph` raises,
+    the calls stay recorded, so reading one of their images raises again instead of
+    giving None. Graphs are thread-local, so threads do not run the calls of each other.
+
+    Returns
+    -------
+    str
+        Python code of the module, to export `DeferredImage` and `flush` from.
+    """
+    _deferred_code = """#
+# This code is auto-generated, do not edit manually.
+#
+
+import threading
+import weakref
 
-from ._array import Image
 from ._backend import _get_backend
-from ._core import Device
-from ._decorators import plugin_function
-from ._utils import deprecated
 
-{python_functions_str}
 
-{api_functions_list}
+class _Node:
+\t\"\"\"Recorded kernel call, whose arguments may be nodes of the same graph.\"\"\"
+
+\t__slots__ = ("name", "arguments", "graph", "image", "result", "done")
+
+\tdef __init__(self, name, arguments, graph):
+\t\tself.name = name
+\t\tself.arguments = arguments
+\t\tself.graph = graph
+\t\tself.image = None
+\t\tself.result = None
+\t\tself.done = False
+
+
+class DeferredImage:
+\t\"\"\"Output image of a recorded kernel call, computed when it is read.
+
+\tPassing it to a generated function records a call depending on it. Reading any of its
+\tattributes, converting it to a numpy array or calling `compute()` runs the graph of
+\tthe calls recorded so far.
+\t\"\"\"
+
+\t__slots__ = ("_node", "__weakref__")
+
+\tdef __init__(self, node):
+\t\tself._node = node
+
+\tdef compute(self):
+\t\t\"\"\"Run the recorded calls if needed and return the computed image.\"\"\"
+\t\tnode = self._node
+\t\tif not node.done:
+\t\t\tnode.graph.flush()
+\t\treturn node.result
+
+\tdef __getattr__(self, name):
+\t\treturn getattr(self.compute(), name)
+
+\tdef __array__(self, *args, **kwargs):
+\t\treturn self.compute().__array__(*args, **kwargs)
+
+\tdef __repr__(self):
+\t\treturn repr(self.compute())
+
+
+class _Graph:
+\t\"\"\"Kernel calls recorded by a thread for a backend and not run yet.\"\"\"
+
+\tdef __init__(self):
+\t\tself.nodes = []
+\t\tself.backend = None
+\t\tself.lock = threading.RLock()
+
+\tdef record(self, name, arguments):
+\t\twith self.lock:
+\t\t\tnode = _Node(name, arguments, self)
+\t\t\tself.nodes.append(node)
+\t\t\timage = DeferredImage(node)
+\t\t\tnode.image = weakref.ref(image)
+\t\t\treturn image
+
+\tdef flush(self):
+\t\twith self.lock:
+\t\t\tnodes, self.nodes = self.nodes, []
+\t\t\tif not nodes:
+\t\t\t\treturn
+\t\t\tpositions = {id(node): position for position, node in enumerate(nodes)}
+\t\t\toperations = []
+\t\t\tfor node in nodes:
+\t\t\t\tdependencies = {
+\t\t\t\t\tindex: positions[id(argument)]
+\t\t\t\t\tfor index, argument in enumerate(node.arguments)
+\t\t\t\t\tif isinstance(argument, _Node)
+\t\t\t\t}
+\t\t\t\targuments = [None if isinstance(a, _Node) else a for a in node.arguments]
+\t\t\t\toperations.append((node.name, arguments, dependencies))
+\t\t\t# images no longer referenced are intermediate, their buffers can be reused
+\t\t\tkeep = [position for position, node in enumerate(nodes) if node.image() is not None]
+\t\t\ttry:
+\t\t\t\tresults = self.backend._execute_graph(operations, keep)
+\t\t\texcept BaseException:
+\t\t\t\t# the calls stay recorded, reading one of their images raises again
+\t\t\t\tself.nodes[:0] = nodes
+\t\t\t\traise
+\t\t\tfor node, result in zip(nodes, results):
+\t\t\t\tnode.result = result if node.image() is not None else None
+\t\t\t\tnode.arguments = None
+\t\t\t\tnode.done = True
+
+
+_local = threading.local()
+
+
+def _current_graph():
+\tgraph = getattr(_local, "graph", None)
+\tif graph is None:
+\t\tgraph = _local.graph = _Graph()
+\treturn graph
+
+
+def _resolve(argument, graph=None):
+\t\"\"\"Replace a deferred image by its node if recorded in graph, else by the computed image.\"\"\"
+\tif isinstance(argument, DeferredImage):
+\t\tnode = argument._node
+\t\tif not node.done and node.graph is graph:
+\t\t\treturn node
+\t\treturn argument.compute()
+\tif isinstance(argument, (list, tuple)):
+\t\treturn type(argument)(_resolve(item, graph) for item in argument)
+\treturn argument
+
+
+def _record(name, *arguments):
+\t\"\"\"Record a kernel call returning an image, run when the image is read.\"\"\"
+\tbackend = _get_backend()
+\t# a backend without graph entry point runs the call at once, as without recording
+\tif not hasattr(backend, "_execute_graph"):
+\t\treturn _run(name, *arguments)
+\tgraph = _current_graph()
+\t# the calls recorded for another backend run on it first
+\tif graph.backend is not backend:
+\t\tgraph.flush()
+\t\tgraph.backend = backend
+\targuments = [_resolve(argument, graph) for argument in arguments]
+\treturn graph.record(name, arguments)
+
+
+def _run(name, *arguments):
+\t\"\"\"Run the recorded calls, then a kernel call which does not return an image.\"\"\"
+\tflush()
+\targuments = [_resolve(argument) for argument in arguments]
+\treturn getattr(_get_backend(), "_" + name)(*arguments)
+
+
+def flush():
+\t\"\"\"Run the kernel calls recorded by the current thread.
+
+\tAn output image given explicitly to a recorded call is only written when the graph
+\truns, so call `flush()` before reading it.
+\t\"\"\"
+\t_current_graph().flush()
 """
-    api_functions_list = generate_api_functions_list(function_list)
-    python_functions_list = [_generate_python_function(f) for f in function_list]
-    python_functions_str = "\n\n".join(python_functions_list)
-    _python_code = _python_code.format(
-        tier=tier, python_functions_str=python_functions_str, api_functions_list=api_functions_list
-    )
-    _python_code = re.sub(r"\t", "    ", _python_code)
-    return _python_code.strip()
+    return re.sub(r"\t", "    ", _deferred_code).strip() + "\n"
@@ -0,0 +1,278 @@
+# This module is in charge of the local index of the kernels of every CLIc tag.
+
+import os
+import sqlite3
+import time
+from typing import List, Optional
+
+from ._cache import cache_dir
+from ._doxygen import _deprecation_message
+from ._io import list_clic_tags, read_clic_kernels, tag_sort_key
+
+INDEX_SCHEMA_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tags (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    position INTEGER NOT NULL,
+    indexed_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS kernels (
+    id INTEGER PRIMARY KEY,
+    tag_id INTEGER NOT NULL REFERENCES tags(id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    tier INTEGER,
+    brief TEXT,
+    return_type TEXT,
+    category TEXT,
+    priority TEXT,
+    deprecation TEXT,
+    UNIQUE (tag_id, name)
+);
+CREATE TABLE IF NOT EXISTS parameters (
+    kernel_id INTEGER NOT NULL REFERENCES kernels(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    type TEXT,
+    default_value TEXT,
+    description TEXT,
+    PRIMARY KEY (kernel_id, position)
+);
+CREATE INDEX IF NOT EXISTS kernels_by_name ON kernels (name, tag_id);
+CREATE INDEX IF NOT EXISTS parameters_by_name ON parameters (name);
+"""
+
+
+def default_index_path() -> str:
+    """Return the path of the kernel index, in `GENCLE_CACHE_DIR` if set, else in ~/.cache/gencle."""
+    folder = cache_dir() or os.path.join(os.path.expanduser("~"), ".cache", "gencle")
+    return os.path.join(folder, "kernel_index.sqlite")
+
+
+class KernelIndex:
+    """SQLite index of the kernels parsed from every indexed CLIc tag.
+
+    Notes: tags, kernels and parameters are stored in normalized tables, a kernel row per
+    tag and a parameter row per kernel. Tags are indexed once, so updating the index only
+    fetches and parses the new tags, and queries never need the network.
+
+    Parameters
+    ----------
+    path : str, optional
+        Path of the database file, by default `default_index_path()`. Use ':memory:' for
+        a temporary index.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or default_index_path()
+        if self.path != ":memory:" and os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._connection = sqlite3.connect(self.path)
+        self._connection.execute("PRAGMA foreign_keys = ON")
+        with self._connection:
+            self._connection.executescript(_SCHEMA)
+            self._connection.execute(
+                "INSERT OR IGNORE INTO meta (key, value) VALUES ('schema_version', ?)",
+                (str(INDEX_SCHEMA_VERSION),),
+            )
+        version = self._connection.execute(
+            "SELECT value FROM meta WHERE key = 'schema_version'"
+        ).fetchone()[0]
+        if int(version) != INDEX_SCHEMA_VERSION:
+            raise ValueError(
+                f"kernel index {self.path} has schema version {version}, "
+                f"expected {INDEX_SCHEMA_VERSION}, remove it to rebuild it"
+            )
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def _reorder_tags(self) -> None:
+        names = [row[0] for row in self._connection.execute("SELECT name FROM tags")]
+        self._connection.executemany(
+            "UPDATE tags SET position = ? WHERE name = ?",
+            [(position, name) for position, name in enumerate(sorted(names, key=tag_sort_key))],
+        )
+
+    def tags(self) -> List[str]:
+        """Return the indexed tags, oldest version first."""
+        return [row[0] for row in self._connection.execute("SELECT name FROM tags ORDER BY position")]
+
+    def has_tag(self, tag: str) -> bool:
+        return self._connection.execute("SELECT 1 FROM tags WHERE name = ?", (tag,)).fetchone() is not None
+
+    def add_tag(self, tag: str, function_list: list, replace: bool = False) -> bool:
+        """Store the kernels of a tag.
+
+        Parameters
+        ----------
+        tag : str
+            Version tag.
+        function_list : list
+            Function dictionaries of all tiers, with their 'tier' key (see `read_clic_kernels`).
+        replace : bool, optional
+            If True, replace a tag already indexed, by default False.
+
+        Returns
+        -------
+        bool
+            True if the tag was stored, False if it was already indexed.
+        """
+        with self._connection:
+            if self.has_tag(tag):
+                if not replace:
+                    return False
+                self._connection.execute("DELETE FROM tags WHERE name = ?", (tag,))
+            tag_id = self._connection.execute(
+                "INSERT INTO tags (name, position, indexed_at) VALUES (?, 0, ?)",
+                (tag, time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())),
+            ).lastrowid
+            # a kernel defined in several tiers is indexed once, the last tier wins
+            kernels = {f["name"].replace("_func", "").strip(): f for f in function_list}
+            for name, f in kernels.items():
+                kernel_id = self._connection.execute(
+                    "INSERT INTO kernels "
+                    "(tag_id, name, tier, brief, return_type, category, priority, deprecation) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        tag_id,
+                        name,
+                        f.get("tier"),
+                        (f.get("brief") or "").strip(),
+                        f["return"].strip(),
+                        f["category"].strip(),
+                        f["priority"].strip(),
+                        _deprecation_message(f) or None,
+                    ),
+                ).lastrowid
+                self._connection.executemany(
+                    "INSERT INTO parameters (kernel_id, position, name, type, default_value, description) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    [
+                        (kernel_id, position, p["name"], p["type"], p["default_value"], p["description"])
+                        for position, p in enumerate(f["parameters"])
+                    ],
+                )
+            self._reorder_tags()
+        return True
+
+    def update(self, repo: str = "clEsperanto/CLIc", tags: Optional[List[str]] = None) -> List[str]:
+        """Fetch, parse and store the tags which are not indexed yet.
+
+        Parameters
+        ----------
+        repo : str, optional
+            Repository to read from, by default 'clEsperanto/CLIc'.
+        tags : list, optional
+            Tags to index, by default all the tags of the repository.
+
+        Returns
+        -------
+        list
+            Tags added to the index.
+        """
+        if tags is None:
+            tags = list_clic_tags(repo)
+        added = []
+        for tag in tags:
+            if self.has_tag(tag):
+                continue
+            # tags older than the tier files are stored without kernels, not fetched again
+            self.add_tag(tag, read_clic_kernels(repo=repo, branch=tag))
+            added.append(tag)
+        return added
+
+    def kernel_introduced(self, kernel: str) -> Optional[str]:
+        """Return the first tag defining a kernel, None if no indexed tag does."""
+        row = self._connection.execute(
+            "SELECT t.name FROM kernels k JOIN tags t ON t.id = k.tag_id "
+            "WHERE k.name = ? ORDER BY t.position LIMIT 1",
+            (kernel,),
+        ).fetchone()
+        return row[0] if row else None
+
+    def parameter_introduced(self, kernel: str, parameter: str) -> Optional[str]:
+        """Return the first tag where a kernel has a parameter, None if no indexed tag has it."""
+        row = self._connection.execute(
+            "SELECT t.name FROM parameters p "
+            "JOIN kernels k ON k.id = p.kernel_id JOIN tags t ON t.id = k.tag_id "
+            "WHERE k.name = ? AND p.name = ? ORDER BY t.position LIMIT 1",
+            (kernel, parameter),
+        ).fetchone()
+        return row[0] if row else None
+
+    def deprecations_per_tag(self) -> List[dict]:
+        """Count the deprecated kernels of every tag.
+
+        Returns
+        -------
+        list
+            One dictionary per tag, oldest first, with the tag name, the number of kernels,
+            the number of deprecated kernels, and the names of the kernels deprecated in this
+            tag but not in the previous one.
+        """
+        rows = self._connection.execute(
+            "SELECT t.name, k.name, k.deprecation IS NOT NULL FROM tags t "
+            "LEFT JOIN kernels k ON k.tag_id = t.id ORDER BY t.position, k.name"
+        ).fetchall()
+        summary = []
+        previous = set()
+        current = None
+        for tag, kernel, deprecated in rows:
+            if current is None or current["tag"] != tag:
+                if current is not None:
+                    previous = current.pop("_deprecated")
+                current = {"tag": tag, "kernels": 0, "deprecated": 0, "newly_deprecated": [], "_deprecated": set()}
+                summary.append(current)
+            if kernel is None:
+                continue
+            current["kernels"] += 1
+            if deprecated:
+                current["deprecated"] += 1
+                current["_deprecated"].add(kernel)
+                if kernel not in previous:
+                    current["newly_deprecated"].append(kernel)
+        if current is not None:
+            current.pop("_deprecated")
+        return summary
+
+    def kernel_history(self, kernel: str) -> List[dict]:
+        """Return the tier, deprecation and parameters of a kernel in every tag defining it, oldest first."""
+        rows = self._connection.execute(
+            "SELECT t.name, k.id, k.tier, k.return_type, k.deprecation FROM kernels k "
+            "JOIN tags t ON t.id = k.tag_id WHERE k.name = ? ORDER BY t.position",
+            (kernel,),
+        ).fetchall()
+        history = []
+        for tag, kernel_id, tier, return_type, deprecation in rows:
+            parameters = self._connection.execute(
+                "SELECT name, type, default_value FROM parameters WHERE kernel_id = ? ORDER BY position",
+                (kernel_id,),
+            ).fetchall()
+            history.append(
+                {
+                    "tag": tag,
+                    "tier": tier,
+                    "return": return_type,
+                    "deprecation": deprecation,
+                    "parameters": [
+                        {"name": n, "type": t, "default_value": d} for n, t, d in parameters
+                    ],
+                }
+            )
+        return history
+
+    def query(self, sql: str, parameters: tuple = ()) -> list:
+        """Run an SQL query on the index tables (tags, kernels, parameters) and return its rows."""
+        return self._connection.execute(sql, parameters).fetchall()
@@ -1,7 +1,112 @@
-import os, glob, json
-import urllib.request
+import os, glob, json, re
 
-from typing import List, Tuple
+from typing import Iterator, List, Optional, Tuple
+
+from ._cache import fetch_cache
+from ._fetch import get_fetcher
+from ._doxygen import parse_doxygen_to_json
+
+
+# git refs which never change: a commit sha or a version tag such as 0.10.0 or v1.2-rc1
+_IMMUTABLE_REF = re.compile(r"[0-9a-f]{40}|v?\d+(\.\d+)+([-+.]?[0-9A-Za-z]+)*")
+
+_MISSING = object()
+
+
+def _is_immutable_ref(ref: str) -> bool:
+    """Return True if a git ref is a commit sha or a version tag, False for a branch.
+
+    Parameters
+    ----------
+    ref : str
+        Branch, tag or commit sha.
+
+    Returns
+    -------
+    bool
+        True if the content at ref never changes, so it may be cached across runs.
+    """
+    return _IMMUTABLE_REF.fullmatch(ref) is not None
+
+
+def _read_url(
+    url: str, mirror_urls: Optional[List[str]] = None, persist: bool = True
+) -> Optional[str]:
+    """Read the content of an url, reusing the fetch cache.
+
+    Notes: the content of a branch or of an api listing changes over time, read it with
+    persist set to False so it is only cached for the current process.
+
+    Parameters
+    ----------
+    url : str
+        Url to read, also the key of the fetch cache.
+    mirror_urls : list, optional
+        Urls serving the same file, in order of preference, by default only url.
+    persist : bool, optional
+        Keep the content in the persistent cache, by default True.
+
+    Returns
+    -------
+    str or None
+        Decoded content, None if the server answered that the file does not exist.
+
+    Raises
+    ------
+    FetchError
+        If the file could not be read before the fetch timeout or deadline, see `Fetcher`.
+    """
+    content = fetch_cache.get(url, _MISSING, persist=persist)
+    if content is not _MISSING:
+        return content
+    content = get_fetcher().fetch(mirror_urls or [url])
+    fetch_cache.put(url, content, persist=persist)
+    return content
+
+
+def _iter_tiers_from_github(repo: str, branch: str, path_template: str) -> Iterator[Tuple[int, str]]:
+    fetcher = get_fetcher()
+    persist = _is_immutable_ref(branch)
+    for tier in range(1, 10):
+        file_path = path_template.format(tier=tier)
+        raw_file_url = f"https://raw.githubusercontent.com/{repo}/{branch}/{file_path}"
+        content = _read_url(
+            raw_file_url, fetcher.mirror_urls(repo, branch, file_path), persist=persist
+        )
+        if content is None:
+            break
+        yield tier, content
+
+
+def _read_tiers_from_github(
+    repo: str, branch: str, path_template: str
+) -> Tuple[List[str], List[int]]:
+    tier_list = []
+    code_list = []
+    for tier, content in _iter_tiers_from_github(repo, branch, path_template):
+        code_list.append(content)
+        tier_list.append(tier)
+    return code_list, tier_list
+
+
+def iter_clic_tier_from_github(
+    repo: str = "clEsperanto/CLIc", branch: str = "master"
+) -> Iterator[Tuple[int, str]]:
+    """Lazily read tier files from github repository, one download per iteration.
+
+    Parameters
+    ----------
+    repo : str, optional
+        Repository to read from, by default 'clEsperanto/CLIc'.
+    branch : str, optional
+        Branch to read from, by default 'master'.
+
+    Yields
+    ------
+    tuple
+        Tier number and contents of the tier file.
+    """
+    return _iter_tiers_from_github(repo, branch, "clic/include/tier{tier}.hpp")
 
 
 def read_clej_tier_from_github(
@@ -26,23 +131,9 @@ def read_clej_tier_from_github(
         Contents of tier file.
     """
 
-    tier_list = []
-    code_list = []
-    for tier in range(1, 10):
-        file_path = f"src/main/java/net/clesperanto/kernels/Tier{tier}.java"
-        raw_file_url = f"https://raw.githubusercontent.com/{repo}/{branch}/{file_path}"
-
-        try:
-            with urllib.request.urlopen(raw_file_url) as response:
-                if response.status == 200:
-                    code_list.append(response.read().decode("utf-8"))
-                    tier_list.append(tier)
-                else:
-                    break
-        except urllib.error.URLError:
-            break
-
-    return code_list, tier_list
+    return _read_tiers_from_github(
+        repo, branch, "src/main/java/net/clesperanto/kernels/Tier{tier}.java"
+    )
 
 
 def read_clic_tier_from_github(
@@ -67,23 +158,108 @@ def read_clic_tier_from_github(
         Contents of tier file.
     """
 
-    tier_list = []
-    code_list = []
-    for tier in range(1, 10):
-        file_path = f"clic/include/tier{tier}.hpp"
-        raw_file_url = f"https://raw.githubusercontent.com/{repo}/{branch}/{file_path}"
+    return _read_tiers_from_github(repo, branch, "clic/include/tier{tier}.hpp")
+
+
+def read_clic_kernels(repo: str = "clEsperanto/CLIc", branch: str = "master") -> list:
+    """Read and parse all tier files of a CLIc version into a single kernel list.
+
+    Parameters
+    ----------
+    repo : str, optional
+        Repository to read from, by default 'clEsperanto/CLIc'.
+    branch : str, optional
+        Branch or tag to read from, by default 'master'.
 
-        try:
-            with urllib.request.urlopen(raw_file_url) as response:
-                if response.status == 200:
-                    code_list.append(response.read().decode("utf-8"))
-                    tier_list.append(tier)
-                else:
-                    break
-        except urllib.error.URLError:
+    Returns
+    -------
+    list
+        Function dictionaries of all tiers, each with an additional 'tier' key.
+    """
+    kernels = []
+    code_list, tier_list = read_clic_tier_from_github(repo=repo, branch=branch)
+    for tier, code in zip(tier_list, code_list):
+        for function_dict in parse_doxygen_to_json(code):
+            function_dict["tier"] = tier
+            kernels.append(function_dict)
+    return kernels
+
+
+def tag_sort_key(tag: str) -> tuple:
+    """Sort key ordering version tags numerically (e.g. '0.10.0' after '0.9.1').
+
+    Parameters
+    ----------
+    tag : str
+        Version tag.
+
+    Returns
+    -------
+    tuple
+        Sort key.
+    """
+    tokens = re.findall(r"\d+|[a-zA-Z]+", tag.lstrip("vV"))
+    return tuple((0, int(t), "") if t.isdigit() else (1, 0, t) for t in tokens)
+
+
+def list_clic_tags(repo: str = "clEsperanto/CLIc") -> List[str]:
+    """List the tags of a github repository, oldest version first.
+
+    Parameters
+    ----------
+    repo : str, optional
+        Repository to read from, by default 'clEsperanto/CLIc'.
+
+    Returns
+    -------
+    list
+        Sorted list of tags.
+    """
+    tags = []
+    page = 1
+    while True:
+        url = f"https://api.github.com/repos/{repo}/tags?per_page=100&page={page}"
+        # new tags are added to the listing, it is never read from the persistent cache
+        content = _read_url(url, persist=False)
+        if not content:
+            break
+        entries = json.loads(content)
+        if not entries:
             break
+        tags.extend(e["name"] for e in entries)
+        page += 1
+    return sorted(tags, key=tag_sort_key)
 
-    return code_list, tier_list
+
+def resolve_tags(specs: List[str], repo: str = "clEsperanto/CLIc") -> List[str]:
+    """Expand a list of tags and tag ranges into a list of tags.
+
+    Notes: a range is written `first..last` and includes both ends.
+
+    Parameters
+    ----------
+    specs : list
+        Tags or tag ranges.
+    repo : str, optional
+        Repository listing the tags used by ranges, by default 'clEsperanto/CLIc'.
+
+    Returns
+    -------
+    list
+        List of tags, without duplicates, in the order given.
+    """
+    tags = []
+    available = None
+    for spec in specs:
+        if ".." not in spec:
+            tags.append(spec)
+            continue
+        if available is None:
+            available = list_clic_tags(repo)
+        first, last = spec.split("..", 1)
+        low, high = tag_sort_key(first), tag_sort_key(last)
+        tags.extend(t for t in available if low <= tag_sort_key(t) <= high)
+    return list(dict.fromkeys(tags))
 
 
 def list_tier_files(folder: str) -> list:
@@ -172,3 +348,56 @@ def write_file(
         print(f"File not found: {filepath}")
         return False
     return True
+
+
+def _staged_path(filepath: str) -> str:
+    return filepath + ".gencle-staged"
+
+
+def write_staged_file(filepath: str, content: str, create_folder: bool = True) -> str:
+    """Write content next to its destination, to be moved in place by `commit_staged_files`.
+
+    Parameters
+    ----------
+    filepath : str
+        Final path of the file.
+    content : str
+        Content to be written.
+    create_folder : bool, optional
+        Create the parent folder if needed, by default True.
+
+    Returns
+    -------
+    str
+        Final path of the file.
+    """
+    if create_folder and not os.path.exists(os.path.dirname(filepath)):
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+    with open(_staged_path(filepath), "w") as file:
+        file.write(content)
+    return filepath
+
+
+def commit_staged_files(filepaths: List[str]) -> None:
+    """Move staged files to their final path, overwriting existing files.
+
+    Parameters
+    ----------
+    filepaths : list
+        Final paths of files written with `write_staged_file`.
+    """
+    for filepath in filepaths:
+        os.replace(_staged_path(filepath), filepath)
+
+
+def discard_staged_files(filepaths: List[str]) -> None:
+    """Remove staged files, leaving their destination untouched.
+
+    Parameters
+    ----------
+    filepaths : list
+        Final paths of files written with `write_staged_file`.
+    """
+    for filepath in filepaths:
+        if os.path.exists(_staged_path(filepath)):
+            os.remove(_staged_path(filepath))
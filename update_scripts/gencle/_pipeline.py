@@ -0,0 +1,107 @@
+# This module is in charge of running the update steps as overlapping stages.
+
+import queue
+import threading
+from typing import Callable, Iterable, List
+
+_DONE = object()
+
+
+def run_pipeline(source: Iterable, stages: List[Callable], maxsize: int = 2) -> list:
+    """Run the items of source through a chain of stages, each stage in its own thread.
+
+    Notes: stages are connected by bounded queues, so a fast stage blocks once `maxsize`
+    items wait for the next one (back-pressure). Each stage is a single thread reading a
+    FIFO queue, hence items leave the pipeline in the order of the source. The source
+    itself is consumed in a dedicated thread, so a lazy source (e.g. downloading tier
+    files one by one) overlaps with the processing of the previous items.
+
+    Parameters
+    ----------
+    source : iterable
+        Items to process, consumed lazily.
+    stages : list
+        Functions applied in sequence, each taking the output of the previous one.
+    maxsize : int, optional
+        Capacity of the queues between stages, by default 2.
+
+    Returns
+    -------
+    list
+        Outputs of the last stage, in source order.
+
+    Raises
+    ------
+    Exception
+        The first exception raised by the source or a stage, after all threads stopped.
+    """
+    queues = [queue.Queue(maxsize=maxsize) for _ in range(len(stages) + 1)]
+    stop = threading.Event()
+    errors = []
+
+    def _put(q, item) -> bool:
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.05)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(q):
+        while not stop.is_set():
+            try:
+                return q.get(timeout=0.05)
+            except queue.Empty:
+                continue
+        return _DONE
+
+    def _fail(error) -> None:
+        errors.append(error)
+        stop.set()
+
+    def _produce() -> None:
+        try:
+            for item in source:
+                if not _put(queues[0], item):
+                    return
+        except BaseException as error:
+            _fail(error)
+        finally:
+            _put(queues[0], _DONE)
+
+    def _work(stage, q_in, q_out) -> None:
+        try:
+            while True:
+                item = _get(q_in)
+                if item is _DONE:
+                    break
+                if not _put(q_out, stage(item)):
+                    return
+        except BaseException as error:
+            _fail(error)
+        finally:
+            _put(q_out, _DONE)
+
+    threads = [threading.Thread(target=_produce, daemon=True)]
+    for index, stage in enumerate(stages):
+        threads.append(
+            threading.Thread(
+                target=_work, args=(stage, queues[index], queues[index + 1]), daemon=True
+            )
+        )
+    for thread in threads:
+        thread.start()
+
+    results = []
+    while True:
+        item = _get(queues[-1])
+        if item is _DONE:
+            break
+        results.append(item)
+
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise errors[0]
+    return results
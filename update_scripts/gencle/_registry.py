@@ -0,0 +1,152 @@
+# This module is in charge of generating a static registry of the kernels metadata.
+
+import ast
+import json
+import re
+
+from ._doxygen import _deprecation_message
+from ._genpy import _convert_argument_from_cpp_to_python, _convert_cpp_type_to_python
+
+
+def _parse_categories(category: str) -> list:
+    """Convert a doxygen @note string such as `'filter', 'in assistant'` to a list."""
+    if not category.strip():
+        return []
+    try:
+        categories = ast.literal_eval(f"[{category}]")
+        return [str(c) for c in categories]
+    except (ValueError, SyntaxError):
+        return [c.strip().strip("'\"") for c in category.split(",") if c.strip()]
+
+
+def _parse_priority(priority: str):
+    priority = priority.strip()
+    if re.fullmatch(r"-?\d+", priority):
+        return int(priority)
+    return priority or None
+
+
+def _python_signature(function_dict: dict) -> str:
+    """Python signature of the generated function, the device being the last parameter."""
+    function_name = function_dict["name"].replace("_func", "").strip()
+    parameters = []
+    for p in function_dict["parameters"]:
+        p = _convert_argument_from_cpp_to_python(p)
+        default = p["default_value"].strip()
+        default_value = f" = {default}" if default else ""
+        parameters.append(f"{p['name']}: {p['type']}{default_value}")
+    if parameters:
+        parameters.append(parameters.pop(0))
+    return_type = _convert_cpp_type_to_python(function_dict["return"])
+    return f"{function_name}({', '.join(parameters)}) -> {return_type}"
+
+
+def generate_kernel_registry(function_lists: dict) -> list:
+    """Gather the metadata of all kernels in a list of entries.
+
+    Parameters
+    ----------
+    function_lists : dict
+        List of function dictionaries, indexed by tier number.
+
+    Returns
+    -------
+    list
+        One dictionary per kernel with its name, tier, categories, priority, signature and
+        deprecation message (None if not deprecated).
+    """
+    registry = []
+    for tier in sorted(function_lists):
+        for f in function_lists[tier]:
+            registry.append(
+                {
+                    "name": f["name"].replace("_func", "").strip(),
+                    "tier": tier,
+                    "categories": _parse_categories(f["category"]),
+                    "priority": _parse_priority(f["priority"]),
+                    "signature": _python_signature(f),
+                    "deprecation": _deprecation_message(f) or None,
+                }
+            )
+    return registry
+
+
+def generate_registry_json(registry: list) -> str:
+    """Serialize the kernel registry as compact json.
+
+    Parameters
+    ----------
+    registry : list
+        Registry returned by `generate_kernel_registry`.
+
+    Returns
+    -------
+    str
+        Json content.
+    """
+    return json.dumps(registry, separators=(",", ":"))
+
+
+def generate_registry_file(registry: list) -> str:
+    """Generate a Python module holding the kernel registry as a static table.
+
+    Notes: the module has no dependency, so tools can search and filter the operations
+    (e.g. `find_kernels(category="filter")`) without importing the tier modules.
+
+    Parameters
+    ----------
+    registry : list
+        Registry returned by `generate_kernel_registry`.
+
+    Returns
+    -------
+    str
+        Python code of the registry module.
+    """
+    _registry_code = """#
+# This code is auto-generated from CLIc tier files, do not edit manually.
+#
+
+from typing import NamedTuple, Optional, Tuple, Union
+
+
+class KernelInfo(NamedTuple):
+    name: str
+    tier: int
+    categories: Tuple[str, ...]
+    priority: Union[int, str, None]
+    signature: str
+    deprecation: Optional[str]
+
+
+KERNELS = (
+{kernels_str}
+)
+
+KERNELS_BY_NAME = {{k.name: k for k in KERNELS}}
+
+
+def find_kernels(category=None, tier=None, include_deprecated=False):
+    \"\"\"Return the kernels matching a category and / or a tier.\"\"\"
+    return [
+        k
+        for k in KERNELS
+        if (category is None or category in k.categories)
+        and (tier is None or k.tier == tier)
+        and (include_deprecated or k.deprecation is None)
+    ]
+"""
+    kernels_list = [
+        "\tKernelInfo({!r}, {!r}, {!r}, {!r}, {!r}, {!r}),".format(
+            k["name"],
+            k["tier"],
+            tuple(k["categories"]),
+            k["priority"],
+            k["signature"],
+            k["deprecation"],
+        )
+        for k in registry
+    ]
+    _registry_code = _registry_code.format(kernels_str="\n".join(kernels_list))
+    _registry_code = re.sub(r"\t", "    ", _registry_code)
+    return _registry_code.strip()
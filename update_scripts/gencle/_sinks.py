@@ -0,0 +1,285 @@
+# This module is in charge of the destinations receiving the generated files.
+
+import io
+import os
+import subprocess
+import tarfile
+import time
+import zipfile
+from typing import Dict, Optional
+
+from ._io import _staged_path, commit_staged_files, discard_staged_files, write_staged_file
+
+
+class OutputSink:
+    """Destination of generated files, addressed by paths relative to the sink root.
+
+    Notes: a sink is used as a context manager. Files written in the `with` block are only
+    published when it exits without error, and discarded otherwise.
+    """
+
+    def write(self, path: str, content: str) -> None:
+        """Write the content of a file, replacing any previous content."""
+        raise NotImplementedError
+
+    def read(self, path: str) -> Optional[str]:
+        """Read the current content of a file, None if the sink can not provide it."""
+        return None
+
+    def close(self) -> None:
+        """Publish all written files."""
+
+    def abort(self) -> None:
+        """Discard all written files."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class FileSystemSink(OutputSink):
+    """Write files in a folder, staged next to their destination until the sink is closed.
+
+    Parameters
+    ----------
+    root : str
+        Folder receiving the files, usually the target repository.
+    backup : bool, optional
+        If True, existing files are kept as '.backup' copies when replaced, by default False.
+    """
+
+    def __init__(self, root: str, backup: bool = False):
+        self.root = root
+        self.backup = backup
+        self._staged = []
+
+    def _path(self, path: str) -> str:
+        return os.path.join(self.root, path)
+
+    def write(self, path: str, content: str) -> None:
+        filepath = write_staged_file(self._path(path), content)
+        if filepath not in self._staged:
+            self._staged.append(filepath)
+
+    def read(self, path: str) -> Optional[str]:
+        filepath = self._path(path)
+        if filepath in self._staged:
+            filepath = _staged_path(filepath)
+        if not os.path.exists(filepath):
+            return None
+        with open(filepath, "r") as file:
+            return file.read()
+
+    def close(self) -> None:
+        if self.backup:
+            for filepath in self._staged:
+                if os.path.exists(filepath):
+                    os.replace(filepath, filepath + ".backup")
+        commit_staged_files(self._staged)
+        self._staged = []
+
+    def abort(self) -> None:
+        discard_staged_files(self._staged)
+        self._staged = []
+
+
+class MemorySink(OutputSink):
+    """Keep files in a dictionary, e.g. for tests or to embed gencle in another tool.
+
+    Parameters
+    ----------
+    files : dict, optional
+        Initial content indexed by path, readable by `read`.
+    """
+
+    def __init__(self, files: Optional[Dict[str, str]] = None):
+        self.files = dict(files or {})
+        self._pending = {}
+
+    def write(self, path: str, content: str) -> None:
+        self._pending[path] = content
+
+    def read(self, path: str) -> Optional[str]:
+        return self._pending.get(path, self.files.get(path))
+
+    def close(self) -> None:
+        self.files.update(self._pending)
+        self._pending = {}
+
+    def abort(self) -> None:
+        self._pending = {}
+
+
+class ArchiveSink(OutputSink):
+    """Pack files into a zip or tar archive, written and moved in place when the sink is closed.
+
+    Notes: a file written twice is packed once, with its last content.
+
+    Parameters
+    ----------
+    archive_path : str
+        Path of the archive, its format is deduced from the extension: '.zip', '.tar',
+        '.tar.gz' or '.tgz'.
+    """
+
+    _TAR_MODES = {".tar": "w", ".tar.gz": "w:gz", ".tgz": "w:gz"}
+
+    def __init__(self, archive_path: str):
+        self.archive_path = archive_path
+        self._temporary_path = f"{archive_path}.{os.getpid()}.tmp"
+        self._tar_mode = None
+        if not archive_path.endswith(".zip"):
+            self._tar_mode = next(
+                (m for e, m in self._TAR_MODES.items() if archive_path.endswith(e)), None
+            )
+            if self._tar_mode is None:
+                raise ValueError(f"unsupported archive format: {archive_path}")
+        self._files = {}
+
+    def write(self, path: str, content: str) -> None:
+        self._files[path] = content
+
+    def read(self, path: str) -> Optional[str]:
+        return self._files.get(path)
+
+    def _pack(self) -> None:
+        if self._tar_mode is None:
+            with zipfile.ZipFile(self._temporary_path, "w", zipfile.ZIP_DEFLATED) as archive:
+                for path, content in self._files.items():
+                    archive.writestr(path, content.encode("utf-8"))
+            return
+        mtime = int(time.time())
+        with tarfile.open(self._temporary_path, self._tar_mode) as archive:
+            for path, content in self._files.items():
+                data = content.encode("utf-8")
+                info = tarfile.TarInfo(path)
+                info.size = len(data)
+                info.mtime = mtime
+                archive.addfile(info, io.BytesIO(data))
+
+    def close(self) -> None:
+        folder = os.path.dirname(self.archive_path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        try:
+            self._pack()
+        except BaseException:
+            if os.path.exists(self._temporary_path):
+                os.remove(self._temporary_path)
+            raise
+        os.replace(self._temporary_path, self.archive_path)
+        self._files = {}
+
+    def abort(self) -> None:
+        self._files = {}
+
+
+class GitFastImportSink(OutputSink):
+    """Commit files on a new branch of a local git repository, without touching its working tree.
+
+    Notes: each file is streamed as a blob to `git fast-import` when written. Closing the
+    sink adds a single commit on top of `parent` replacing the written files, and creates
+    `branch` pointing to it. Files which are not written keep their content in `parent`.
+    A file written twice is committed with its last content.
+
+    Parameters
+    ----------
+    repo_path : str
+        Path of the local git repository.
+    branch : str
+        Name of the branch to create, it must not exist yet.
+    message : str, optional
+        Commit message, by default 'Update generated code'.
+    parent : str, optional
+        Revision the commit is based on, by default 'HEAD'.
+    committer : str, optional
+        Committer identity as 'Name <email>', by default the one configured in git.
+    """
+
+    def __init__(
+        self,
+        repo_path: str,
+        branch: str,
+        message: str = "Update generated code",
+        parent: str = "HEAD",
+        committer: Optional[str] = None,
+    ):
+        self.repo_path = repo_path
+        self.branch = branch
+        self.message = message
+        if self._git("rev-parse", "--verify", "--quiet", f"refs/heads/{branch}", check=False):
+            raise ValueError(f"branch {branch} already exists in {repo_path}")
+        self.parent = self._git("rev-parse", "--verify", f"{parent}^{{commit}}")
+        if committer is None:
+            self.committer = self._git("var", "GIT_COMMITTER_IDENT")
+        else:
+            self.committer = f"{committer} {int(time.time())} +0000"
+        self._marks = {}
+        self._pending = {}
+        self._last_mark = 0
+        self._process = subprocess.Popen(
+            ["git", "fast-import", "--quiet"],
+            cwd=repo_path,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+        )
+
+    def _git(self, *args, check: bool = True) -> str:
+        result = subprocess.run(
+            ["git", *args], cwd=self.repo_path, capture_output=True, text=True
+        )
+        if check and result.returncode != 0:
+            raise RuntimeError(f"git {' '.join(args)} failed: {result.stderr.strip()}")
+        return result.stdout.strip()
+
+    def _send(self, *chunks: bytes) -> None:
+        for chunk in chunks:
+            self._process.stdin.write(chunk)
+
+    @staticmethod
+    def _data(data: bytes) -> bytes:
+        return b"data %d\n" % len(data) + data + b"\n"
+
+    def write(self, path: str, content: str) -> None:
+        if path.startswith('"') or "\n" in path or "\\" in path:
+            raise ValueError(f"unsupported path for git fast-import: {path!r}")
+        # marks are never reused, a path written again points to its new blob
+        self._last_mark += 1
+        path = path.replace(os.sep, "/")
+        self._marks[path] = self._last_mark
+        self._pending[path] = content
+        self._send(b"blob\nmark :%d\n" % self._last_mark, self._data(content.encode("utf-8")))
+
+    def read(self, path: str) -> Optional[str]:
+        path = path.replace(os.sep, "/")
+        if path in self._pending:
+            return self._pending[path]
+        result = subprocess.run(
+            ["git", "show", f"{self.parent}:{path}"],
+            cwd=self.repo_path,
+            capture_output=True,
+        )
+        return result.stdout.decode("utf-8") if result.returncode == 0 else None
+
+    def close(self) -> None:
+        commit = [
+            f"commit refs/heads/{self.branch}\n".encode("utf-8"),
+            f"committer {self.committer}\n".encode("utf-8"),
+            self._data(self.message.encode("utf-8")),
+            f"from {self.parent}\n".encode("utf-8"),
+        ]
+        commit += [f"M 100644 :{mark} {path}\n".encode("utf-8") for path, mark in self._marks.items()]
+        self._send(*commit, b"\n")
+        self._process.stdin.close()
+        if self._process.wait() != 0:
+            raise RuntimeError(f"git fast-import failed to create branch {self.branch}")
+
+    def abort(self) -> None:
+        # without a commit command, fast-import only leaves unreachable blobs behind
+        self._process.stdin.close()
+        self._process.wait()
@@ -0,0 +1,268 @@
+# This module is in charge of generating the opt-in timing instrumentation of the kernels.
+
+import re
+
+# macro enabling the C++ instrumentation, the generated code is unchanged without it
+TIMING_MACRO = "CLE_KERNEL_TIMING"
+
+
+def kernel_timing_key(tier: int, name: str) -> str:
+    """Name of a kernel in the timing tables, shared by the Python, native and Java layers."""
+    return f"tier{tier}::{name.replace('_func', '').strip()}"
+
+
+def _cpp_timer_statement(tier: int, name: str) -> str:
+    """Statement timing the rest of the enclosing C++ scope, empty unless the macro is defined."""
+    return f'CLE_KERNEL_TIMER("{kernel_timing_key(tier, name)}");'
+
+
+def generate_kernel_timing_header() -> str:
+    """Generate `kernel_timing.hpp`, the registry of the kernel timings shared by the C++ wrappers.
+
+    Notes: when `CLE_KERNEL_TIMING` is defined, `CLE_KERNEL_TIMER(name)` declares a scoped
+    timer adding one call and the wall time until the end of the scope to the kernel
+    entry, and `cle::timing::snapshot()` returns the table. Otherwise the macro expands
+    to nothing and the header declares nothing else.
+
+    Returns
+    -------
+    str
+        C++ code of the header.
+    """
+    _header_code = """/*
+ * This file is autogenerated. Do not edit manually.
+ */
+#ifndef __INCLUDE_KERNEL_TIMING_HPP
+#define __INCLUDE_KERNEL_TIMING_HPP
+
+#ifdef CLE_KERNEL_TIMING
+
+#include <chrono>
+#include <cstdint>
+#include <map>
+#include <mutex>
+#include <string>
+
+namespace cle::timing
+{
+
+\tstruct KernelTiming
+\t{
+\t\tstd::uint64_t calls = 0;
+\t\tdouble seconds = 0.0;
+\t};
+
+\tinline auto
+\tregistry_mutex() -> std::mutex &
+\t{
+\t\tstatic std::mutex mutex;
+\t\treturn mutex;
+\t}
+
+\tinline auto
+\tregistry() -> std::map<std::string, KernelTiming> &
+\t{
+\t\tstatic std::map<std::string, KernelTiming> table;
+\t\treturn table;
+\t}
+
+\t/**
+\t * @brief Add a call of a kernel lasting a number of seconds.
+\t */
+\tinline auto
+\trecord(const char * kernel, double seconds) -> void
+\t{
+\t\tconst std::lock_guard<std::mutex> lock(registry_mutex());
+\t\tauto & timing = registry()[kernel];
+\t\ttiming.calls += 1;
+\t\ttiming.seconds += seconds;
+\t}
+
+\t/**
+\t * @brief Call count and cumulative wall time of each kernel called since the last reset.
+\t */
+\tinline auto
+\tsnapshot() -> std::map<std::string, KernelTiming>
+\t{
+\t\tconst std::lock_guard<std::mutex> lock(registry_mutex());
+\t\treturn registry();
+\t}
+
+\t/**
+\t * @brief Forget the timings recorded so far.
+\t */
+\tinline auto
+\treset() -> void
+\t{
+\t\tconst std::lock_guard<std::mutex> lock(registry_mutex());
+\t\tregistry().clear();
+\t}
+
+\tclass ScopedTimer
+\t{
+\tpublic:
+\t\texplicit ScopedTimer(const char * kernel)
+\t\t  : kernel_(kernel)
+\t\t  , start_(std::chrono::steady_clock::now())
+\t\t{}
+
+\t\tScopedTimer(const ScopedTimer &) = delete;
+\t\tauto
+\t\toperator=(const ScopedTimer &) -> ScopedTimer & = delete;
+
+\t\t~ScopedTimer()
+\t\t{
+\t\t\tconst std::chrono::duration<double> elapsed = std::chrono::steady_clock::now() - start_;
+\t\t\trecord(kernel_, elapsed.count());
+\t\t}
+
+\tprivate:
+\t\tconst char *                          kernel_;
+\t\tstd::chrono::steady_clock::time_point start_;
+\t};
+
+} // namespace cle::timing
+
+#define CLE_KERNEL_TIMER(kernel) const ::cle::timing::ScopedTimer cle_kernel_timer_(kernel)
+
+#else
+
+#define CLE_KERNEL_TIMER(kernel) static_cast<void>(0)
+
+#endif // CLE_KERNEL_TIMING
+
+#endif // __INCLUDE_KERNEL_TIMING_HPP
+"""
+    return re.sub(r"\t", "    ", _header_code)
+
+
+def generate_timing_wrapper_file() -> str:
+    """Generate the pybind11 bindings querying the kernel timings.
+
+    Notes: when `CLE_KERNEL_TIMING` is defined, `_kernel_timings()` returns a dictionary
+    `{kernel: (calls, seconds)}` and `_reset_kernel_timings()` clears it. Otherwise no
+    binding is defined, so Python can test for the instrumentation with `hasattr`.
+
+    Returns
+    -------
+    str
+        Pybind11 wrapper code.
+    """
+    _wrapper_file_code = """// this code is auto-generated, do not edit manually
+
+#include "pycle_wrapper.hpp"
+#include "kernel_timing.hpp"
+
+namespace py = pybind11;
+
+auto timing_(py::module &m) -> void {
+#ifdef CLE_KERNEL_TIMING
+\tm.def("_kernel_timings", []() {
+\t\tpy::dict table;
+\t\tfor (const auto & [kernel, timing] : cle::timing::snapshot()) {
+\t\t\ttable[py::str(kernel)] = py::make_tuple(timing.calls, timing.seconds);
+\t\t}
+\t\treturn table;
+\t},
+\t"Call count and cumulative wall time in seconds of each kernel called since the last reset.");
+
+\tm.def("_reset_kernel_timings", &cle::timing::reset, "Forget the kernel timings recorded so far.");
+#endif
+}
+"""
+    return re.sub(r"\t", "    ", _wrapper_file_code).strip()
+
+
+def generate_java_kernel_timing_class() -> str:
+    """Generate `KernelTiming.java`, the timing table of the Java kernel classes.
+
+    Notes: the instrumentation is enabled by starting the JVM with
+    `-Dnet.clesperanto.kernelTiming=true`. `ENABLED` is a static final constant, so the
+    JIT compiler removes the timing branch of every kernel when it is false.
+
+    Returns
+    -------
+    str
+        Java code of the class.
+    """
+    _java_code = """/**
+ * This file is autogenerated. Do not edit manually.
+ */
+package net.clesperanto.kernels;
+
+import java.util.Map;
+import java.util.TreeMap;
+import java.util.concurrent.ConcurrentHashMap;
+import java.util.concurrent.atomic.LongAdder;
+
+/**
+ * Call count and cumulative wall time of the kernels called from the Tier classes
+ */
+public final class KernelTiming {
+
+\t/**
+\t * True if the JVM was started with -Dnet.clesperanto.kernelTiming=true
+\t */
+\tpublic static final boolean ENABLED = Boolean.getBoolean("net.clesperanto.kernelTiming");
+
+\tprivate static final class Entry {
+\t\tfinal LongAdder calls = new LongAdder();
+\t\tfinal LongAdder nanos = new LongAdder();
+\t}
+
+\tprivate static final ConcurrentHashMap<String, Entry> TABLE = new ConcurrentHashMap<>();
+
+\tprivate KernelTiming() {
+\t}
+
+\t/**
+\t * Add a call of a kernel
+\t *
+\t * @param kernel name of the kernel, as tierN::name
+\t * @param nanos wall time of the call in nanoseconds
+\t */
+\tpublic static void record(String kernel, long nanos) {
+\t\tEntry entry = TABLE.computeIfAbsent(kernel, k -> new Entry());
+\t\tentry.calls.increment();
+\t\tentry.nanos.add(nanos);
+\t}
+
+\t/**
+\t * Call count and cumulative wall time of each kernel called since the last reset
+\t *
+\t * @return {calls, nanoseconds} by kernel name, sorted by name
+\t */
+\tpublic static Map<String, long[]> snapshot() {
+\t\tMap<String, long[]> table = new TreeMap<>();
+\t\tTABLE.forEach((kernel, entry) -> table.put(kernel, new long[] { entry.calls.sum(), entry.nanos.sum() }));
+\t\treturn table;
+\t}
+
+\t/**
+\t * Forget the timings recorded so far
+\t */
+\tpublic static void reset() {
+\t\tTABLE.clear();
+\t}
+}
+"""
+    return re.sub(r"\t", "    ", _java_code)
+
+
+# timed return of a Java function, the JIT compiler removes the branch if timing is disabled
+_java_timed_return_code = """if (KernelTiming.ENABLED) {{
+            final long start = System.nanoTime();
+            try {{
+                return {expression};
+            }} finally {{
+                KernelTiming.record("{key}", System.nanoTime() - start);
+            }}
+        }}
+        return {expression};"""
+
+
+def _java_return_statement(tier: int, name: str, expression: str, timing: bool = False) -> str:
+    """Return statement of a generated Java function, timed when `KernelTiming.ENABLED` with timing."""
+    if not timing:
+        return f"return {expression};"
+    return _java_timed_return_code.format(expression=expression, key=kernel_timing_key(tier, name))
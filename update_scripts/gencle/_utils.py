@@ -16,4 +16,4 @@ def clear_doxygen_blocks(code: str) -> str:
     str
         Code without doxygen blocks.
     """
-    return re.sub(r'/\*\*.*?\*/', '', code, flags=re.DOTALL)
\ No newline at end of file
+    return re.sub(r'/\*\*.*?\*/', '', code, flags=re.DOTALL)
@@ -0,0 +1,188 @@
+# This module is in charge of checking the generated code before it is written to disk.
+
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+_OPENING = {"(": ")", "[": "]", "{": "}"}
+_CLOSING = {")": "(", "]": "[", "}": "{"}
+
+
+class GeneratedCodeError(ValueError):
+    """Raised when generated code is malformed, holds the list of issues found."""
+
+    def __init__(self, issues: List[str]):
+        self.issues = issues
+        super().__init__(
+            f"{len(issues)} issue(s) found in generated code:\n" + "\n".join(issues)
+        )
+
+
+def validate_python_code(code: str, filename: str = "<generated>") -> List[str]:
+    """Check that generated Python code compiles.
+
+    Parameters
+    ----------
+    code : str
+        Python code.
+    filename : str, optional
+        Name used to locate the issues, by default '<generated>'.
+
+    Returns
+    -------
+    list
+        Issues found, as 'filename:line:column: message' strings.
+    """
+    try:
+        compile(code, filename, "exec", dont_inherit=True)
+    except SyntaxError as error:
+        return [f"{filename}:{error.lineno}:{error.offset}: {error.msg}"]
+    return []
+
+
+def validate_brace_code(code: str, filename: str = "<generated>") -> List[str]:
+    """Check brackets balance and parameter lists of generated C++ or Java code.
+
+    Notes: comments, string and character literals are skipped. Empty parameters
+    such as `f(a, )` or `f(, b)` are reported as malformed signatures.
+
+    Parameters
+    ----------
+    code : str
+        C++ or Java code.
+    filename : str, optional
+        Name used to locate the issues, by default '<generated>'.
+
+    Returns
+    -------
+    list
+        Issues found, as 'filename:line:column: message' strings.
+    """
+    issues = []
+    stack = []
+    # last significant character and its location, to detect empty parameters
+    previous = ("", 0, 0)
+    line, column = 1, 0
+    i, n = 0, len(code)
+    while i < n:
+        c = code[i]
+        column += 1
+        if c == "\n":
+            line, column = line + 1, 0
+            i += 1
+            continue
+        if c.isspace():
+            i += 1
+            continue
+        if code.startswith("//", i):
+            end = code.find("\n", i)
+            end = n if end == -1 else end
+            column += end - i - 1
+            i = end
+            continue
+        if code.startswith("/*", i):
+            end = code.find("*/", i + 2)
+            end = n if end == -1 else end + 2
+            comment = code[i:end]
+            newlines = comment.count("\n")
+            if newlines:
+                line += newlines
+                column = len(comment) - comment.rfind("\n") - 1
+            else:
+                column += len(comment) - 1
+            i = end
+            continue
+        if c in "\"'":
+            start_line, start_column = line, column
+            j = i + 1
+            while j < n and code[j] != c and code[j] != "\n":
+                j += 2 if code[j] == "\\" else 1
+            if j >= n or code[j] != c:
+                issues.append(f"{filename}:{start_line}:{start_column}: unterminated literal")
+                j = min(j, n - 1)
+            column += j - i
+            i = j + 1
+            previous = (c, line, column)
+            continue
+        if c in _OPENING:
+            stack.append((c, line, column))
+        elif c in _CLOSING:
+            if not stack:
+                issues.append(f"{filename}:{line}:{column}: unexpected '{c}'")
+            else:
+                opening, open_line, open_column = stack.pop()
+                if opening != _CLOSING[c]:
+                    issues.append(
+                        f"{filename}:{line}:{column}: '{c}' does not match "
+                        f"'{opening}' opened at {open_line}:{open_column}"
+                    )
+            if c == ")" and previous[0] == ",":
+                issues.append(f"{filename}:{previous[1]}:{previous[2]}: empty parameter before ')'")
+        elif c == "," and previous[0] in ("(", ","):
+            issues.append(f"{filename}:{line}:{column}: empty parameter before ','")
+        previous = (c, line, column)
+        i += 1
+
+    for opening, open_line, open_column in stack:
+        issues.append(f"{filename}:{open_line}:{open_column}: '{opening}' is never closed")
+    return issues
+
+
+def validate_file(filepath: str, content: str) -> List[str]:
+    """Check a generated file according to its extension.
+
+    Parameters
+    ----------
+    filepath : str
+        Path of the file, used to select the checks and to locate the issues.
+    content : str
+        Generated code.
+
+    Returns
+    -------
+    list
+        Issues found, empty if the file is valid or its type is not checked.
+    """
+    extension = os.path.splitext(filepath)[1]
+    if extension == ".py":
+        return validate_python_code(content, filepath)
+    if extension in (".cpp", ".hpp", ".h", ".java"):
+        return validate_brace_code(content, filepath)
+    return []
+
+
+def validate_generated_files(
+    files: Dict[str, str],
+    max_workers: Optional[int] = None,
+    executor: Optional[Executor] = None,
+) -> None:
+    """Check all generated files in a process pool and fail before anything is written.
+
+    Parameters
+    ----------
+    files : dict
+        Generated content indexed by file path.
+    max_workers : int, optional
+        Number of worker processes, by default one per cpu. Use 0 to check in-process.
+    executor : Executor, optional
+        Pool to run the checks in, instead of starting a new one.
+
+    Raises
+    ------
+    GeneratedCodeError
+        If any file is malformed, with the location of every issue.
+    """
+    paths = list(files)
+    contents = [files[p] for p in paths]
+    if executor is not None:
+        results = executor.map(validate_file, paths, contents)
+        issues = [issue for result in results for issue in result]
+    elif max_workers == 0 or len(paths) < 2:
+        results = map(validate_file, paths, contents)
+        issues = [issue for result in results for issue in result]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            results = executor.map(validate_file, paths, contents)
+            issues = [issue for result in results for issue in result]
+    if issues:
+        raise GeneratedCodeError(issues)
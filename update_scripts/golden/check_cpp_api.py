@@ -0,0 +1,76 @@
+# Golden-output check of the header-only C++ API generated by clesperanto_auto_update.py.
+#
+# usage: python golden/check_cpp_api.py [--update]
+#
+# The small tier files of golden/cpp_api are rendered through the update script into
+# memory, and each generated header is diffed against the expected one in
+# golden/cpp_api/expected. The two tiers both define `maximum_of_all_pixels`, so the
+# check also covers the names shared between tiers. With --update, the expected files
+# are replaced by the generated ones, review their diff before committing them.
+
+import os, sys, glob, difflib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import gencle
+import clesperanto_auto_update
+
+FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cpp_api")
+EXPECTED_FOLDER = os.path.join(FOLDER, "expected")
+
+
+def _read_tiers() -> list:
+    tiers = []
+    for path in glob.glob(os.path.join(FOLDER, "tier*.hpp")):
+        tier = int(os.path.basename(path)[len("tier"):-len(".hpp")])
+        tiers.append((tier, gencle.read_file(path)))
+    return sorted(tiers)
+
+
+def _generate() -> dict:
+    sink = gencle.MemorySink()
+    with sink:
+        clesperanto_auto_update.update_tier_code(
+            None, None, None, sink=sink, tier_source=_read_tiers()
+        )
+    return sink.files
+
+
+def _expected() -> dict:
+    files = {}
+    for path in glob.glob(os.path.join(EXPECTED_FOLDER, "**", "*.hpp"), recursive=True):
+        relative_path = os.path.relpath(path, EXPECTED_FOLDER).replace(os.sep, "/")
+        files[relative_path] = gencle.read_file(path)
+    return files
+
+
+def check() -> bool:
+    generated, expected = _generate(), _expected()
+    identical = True
+    for path in sorted(set(generated) | set(expected)):
+        diff = list(
+            difflib.unified_diff(
+                expected.get(path, "").splitlines(keepends=True),
+                generated.get(path, "").splitlines(keepends=True),
+                fromfile=f"expected/{path}",
+                tofile=f"generated/{path}",
+            )
+        )
+        if diff:
+            sys.stdout.writelines(diff)
+            identical = False
+    print("golden: C++ API " + ("identical" if identical else "differs from the expected files"))
+    return identical
+
+
+def update() -> None:
+    for path, content in _generate().items():
+        gencle.write_file(os.path.join(EXPECTED_FOLDER, path), content, overwrite=True)
+    print(f"golden: expected files written in {EXPECTED_FOLDER}")
+
+
+if __name__ == "__main__":
+    if "--update" in sys.argv[1:]:
+        update()
+    else:
+        sys.exit(0 if check() else 1)
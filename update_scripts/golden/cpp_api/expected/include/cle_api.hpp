@@ -0,0 +1,11 @@
+/*
+ * This file is autogenerated. Do not edit manually.
+ */
+#ifndef __INCLUDE_CLE_API_HPP
+#define __INCLUDE_CLE_API_HPP
+
+#include "cle_api_device.hpp"
+#include "cle_api_tier1.hpp"
+#include "cle_api_tier2.hpp"
+
+#endif // __INCLUDE_CLE_API_HPP
@@ -0,0 +1,41 @@
+/*
+ * This file is autogenerated. Do not edit manually.
+ */
+#ifndef __INCLUDE_CLE_API_DEVICE_HPP
+#define __INCLUDE_CLE_API_DEVICE_HPP
+
+#include "tier0.hpp"
+
+#include <utility>
+
+namespace cle::api
+{
+
+    inline auto
+    default_device_storage() -> Device::Pointer &
+    {
+        static Device::Pointer device = nullptr;
+        return device;
+    }
+
+    /**
+     * @brief Set the device used by the functions called without device.
+     */
+    inline auto
+    set_default_device(Device::Pointer device) -> void
+    {
+        default_device_storage() = std::move(device);
+    }
+
+    /**
+     * @brief Device used by the functions called without device.
+     */
+    inline auto
+    default_device() -> const Device::Pointer &
+    {
+        return default_device_storage();
+    }
+
+} // namespace cle::api
+
+#endif // __INCLUDE_CLE_API_DEVICE_HPP
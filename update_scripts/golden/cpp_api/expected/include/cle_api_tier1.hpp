@@ -0,0 +1,103 @@
+/*
+ * This file is autogenerated from CLIc 'cle::tier1.hpp' file. Do not edit manually.
+ */
+#ifndef __INCLUDE_CLE_API_TIER1_HPP
+#define __INCLUDE_CLE_API_TIER1_HPP
+
+#include "cle_api_device.hpp"
+#include "tier1.hpp"
+
+namespace cle::api
+{
+
+/**
+ * @brief Computes the absolute value of every individual pixel x in a given image.
+ *
+ * @param device Device to perform the operation on.
+ * @param src The input image to be processed.
+ * @param dst The output image where results are written into.
+ * @return Array::Pointer
+ */
+[[nodiscard]] inline auto
+absolute(const Device::Pointer & device, const Array::Pointer & src, Array::Pointer dst = nullptr) -> Array::Pointer
+{
+    return cle::tier1::absolute_func(device, src, std::move(dst));
+}
+
+/**
+ * @brief Computes the absolute value of every individual pixel x in a given image.
+ *
+ * @param src The input image to be processed.
+ * @param dst The output image where results are written into.
+ * @return Array::Pointer
+ * @note Runs on `default_device()`.
+ */
+[[nodiscard]] inline auto
+absolute(const Array::Pointer & src, Array::Pointer dst = nullptr) -> Array::Pointer
+{
+    return cle::tier1::absolute_func(default_device(), src, std::move(dst));
+}
+
+/**
+ * @brief Computes the Gaussian blurred image of an image given sigma values in X, Y and Z.
+ *
+ * @param device Device to perform the operation on.
+ * @param src The input image to process.
+ * @param dst The output image where results are written into.
+ * @param sigma_x Sigma value along the x axis.
+ * @param sigma_y Sigma value along the y axis.
+ * @param sigma_z Sigma value along the z axis.
+ * @return Array::Pointer
+ */
+[[nodiscard]] inline auto
+gaussian_blur(const Device::Pointer & device, const Array::Pointer & src, Array::Pointer dst = nullptr, float sigma_x = 0, float sigma_y = 0, float sigma_z = 0) -> Array::Pointer
+{
+    return cle::tier1::gaussian_blur_func(device, src, std::move(dst), sigma_x, sigma_y, sigma_z);
+}
+
+/**
+ * @brief Computes the Gaussian blurred image of an image given sigma values in X, Y and Z.
+ *
+ * @param src The input image to process.
+ * @param dst The output image where results are written into.
+ * @param sigma_x Sigma value along the x axis.
+ * @param sigma_y Sigma value along the y axis.
+ * @param sigma_z Sigma value along the z axis.
+ * @return Array::Pointer
+ * @note Runs on `default_device()`.
+ */
+[[nodiscard]] inline auto
+gaussian_blur(const Array::Pointer & src, Array::Pointer dst = nullptr, float sigma_x = 0, float sigma_y = 0, float sigma_z = 0) -> Array::Pointer
+{
+    return cle::tier1::gaussian_blur_func(default_device(), src, std::move(dst), sigma_x, sigma_y, sigma_z);
+}
+
+/**
+ * @brief Determines the maximum of all pixels in a given image.
+ *
+ * @param device Device to perform the operation on.
+ * @param src The image of which the maximum of all pixels or voxels will be determined.
+ * @return float
+ */
+[[nodiscard, deprecated("Use maximum_of_all_pixels from tier2 instead.")]] inline auto
+maximum_of_all_pixels(const Device::Pointer & device, const Array::Pointer & src) -> float
+{
+    return cle::tier1::maximum_of_all_pixels_func(device, src);
+}
+
+/**
+ * @brief Determines the maximum of all pixels in a given image.
+ *
+ * @param src The image of which the maximum of all pixels or voxels will be determined.
+ * @return float
+ * @note Runs on `default_device()`.
+ */
+[[nodiscard, deprecated("Use maximum_of_all_pixels from tier2 instead.")]] inline auto
+maximum_of_all_pixels(const Array::Pointer & src) -> float
+{
+    return cle::tier1::maximum_of_all_pixels_func(default_device(), src);
+}
+
+} // namespace cle::api
+
+#endif // __INCLUDE_CLE_API_TIER1_HPP
@@ -0,0 +1,82 @@
+/*
+ * This file is autogenerated from CLIc 'cle::tier2.hpp' file. Do not edit manually.
+ */
+#ifndef __INCLUDE_CLE_API_TIER2_HPP
+#define __INCLUDE_CLE_API_TIER2_HPP
+
+#include "cle_api_device.hpp"
+#include "tier2.hpp"
+
+namespace cle::api
+{
+
+/**
+ * @brief Applies a top-hat filter for background subtraction to the input image.
+ *
+ * @param device Device to perform the operation on.
+ * @param src The input image where the background is subtracted from.
+ * @param dst The output image where results are written into.
+ * @param radius_x Radius of the background determination region in X.
+ * @param radius_y Radius of the background determination region in Y.
+ * @param radius_z Radius of the background determination region in Z.
+ * @param connectivity Element shape, "box" or "sphere".
+ * @return Array::Pointer
+ */
+[[nodiscard]] inline auto
+top_hat_box(const Device::Pointer & device, const Array::Pointer & src, Array::Pointer dst = nullptr, int radius_x = 1, int radius_y = 1, int radius_z = 1, std::string connectivity = "box") -> Array::Pointer
+{
+    return cle::tier2::top_hat_box_func(device, src, std::move(dst), radius_x, radius_y, radius_z, std::move(connectivity));
+}
+
+/**
+ * @brief Applies a top-hat filter for background subtraction to the input image.
+ *
+ * @param src The input image where the background is subtracted from.
+ * @param dst The output image where results are written into.
+ * @param radius_x Radius of the background determination region in X.
+ * @param radius_y Radius of the background determination region in Y.
+ * @param radius_z Radius of the background determination region in Z.
+ * @param connectivity Element shape, "box" or "sphere".
+ * @return Array::Pointer
+ * @note Runs on `default_device()`.
+ */
+[[nodiscard]] inline auto
+top_hat_box(const Array::Pointer & src, Array::Pointer dst = nullptr, int radius_x = 1, int radius_y = 1, int radius_z = 1, std::string connectivity = "box") -> Array::Pointer
+{
+    return cle::tier2::top_hat_box_func(default_device(), src, std::move(dst), radius_x, radius_y, radius_z, std::move(connectivity));
+}
+
+namespace tier2
+{
+
+/**
+ * @brief Determines the maximum of all pixels in a given image.
+ *
+ * @param device Device to perform the operation on.
+ * @param src The image of which the maximum of all pixels or voxels will be determined.
+ * @return float
+ */
+[[nodiscard]] inline auto
+maximum_of_all_pixels(const Device::Pointer & device, const Array::Pointer & src) -> float
+{
+    return cle::tier2::maximum_of_all_pixels_func(device, src);
+}
+
+/**
+ * @brief Determines the maximum of all pixels in a given image.
+ *
+ * @param src The image of which the maximum of all pixels or voxels will be determined.
+ * @return float
+ * @note Runs on `default_device()`.
+ */
+[[nodiscard]] inline auto
+maximum_of_all_pixels(const Array::Pointer & src) -> float
+{
+    return cle::tier2::maximum_of_all_pixels_func(default_device(), src);
+}
+
+} // namespace tier2
+
+} // namespace cle::api
+
+#endif // __INCLUDE_CLE_API_TIER2_HPP
@@ -0,0 +1,56 @@
+#pragma once
+
+#include "tier0.hpp"
+
+/**
+ * @namespace cle::tier1
+ * @brief Namespace container for all the tier 1 functions
+ */
+namespace cle::tier1
+{
+
+/**
+ * @name absolute
+ * @brief Computes the absolute value of every individual pixel x in a given image.
+ *
+ * @param device Device to perform the operation on. [const Device::Pointer &]
+ * @param src The input image to be processed. [const Array::Pointer &]
+ * @param dst The output image where results are written into. [Array::Pointer ( = None )]
+ * @return Array::Pointer
+ * @note 'filter', 'in assistant'
+ * @see https://clij.github.io/clij2-docs/reference_absolute
+ */
+auto
+absolute_func(const Device::Pointer & device, const Array::Pointer & src, Array::Pointer dst) -> Array::Pointer;
+
+/**
+ * @name gaussian_blur
+ * @brief Computes the Gaussian blurred image of an image given sigma values in X, Y and Z.
+ *
+ * @param device Device to perform the operation on. [const Device::Pointer &]
+ * @param src The input image to process. [const Array::Pointer &]
+ * @param dst The output image where results are written into. [Array::Pointer ( = None )]
+ * @param sigma_x Sigma value along the x axis. [float ( = 0 )]
+ * @param sigma_y Sigma value along the y axis. [float ( = 0 )]
+ * @param sigma_z Sigma value along the z axis. [float ( = 0 )]
+ * @return Array::Pointer
+ * @note 'filter', 'denoise', 'in assistant'
+ * @see https://clij.github.io/clij2-docs/reference_gaussianBlur3D
+ */
+auto
+gaussian_blur_func(const Device::Pointer & device, const Array::Pointer & src, Array::Pointer dst, float sigma_x, float sigma_y, float sigma_z) -> Array::Pointer;
+
+/**
+ * @name maximum_of_all_pixels
+ * @brief Determines the maximum of all pixels in a given image.
+ *
+ * @param device Device to perform the operation on. [const Device::Pointer &]
+ * @param src The image of which the maximum of all pixels or voxels will be determined. [const Array::Pointer &]
+ * @return float
+ * @deprecated Use maximum_of_all_pixels from tier2 instead.
+ * @see https://clij.github.io/clij2-docs/reference_maximumOfAllPixels
+ */
+auto
+maximum_of_all_pixels_func(const Device::Pointer & device, const Array::Pointer & src) -> float;
+
+} // namespace cle::tier1
@@ -0,0 +1,43 @@
+#pragma once
+
+#include "tier1.hpp"
+
+/**
+ * @namespace cle::tier2
+ * @brief Namespace container for all the tier 2 functions
+ */
+namespace cle::tier2
+{
+
+/**
+ * @name maximum_of_all_pixels
+ * @brief Determines the maximum of all pixels in a given image.
+ *
+ * @param device Device to perform the operation on. [const Device::Pointer &]
+ * @param src The image of which the maximum of all pixels or voxels will be determined. [const Array::Pointer &]
+ * @return float
+ * @note 'combine'
+ * @see https://clij.github.io/clij2-docs/reference_maximumOfAllPixels
+ */
+auto
+maximum_of_all_pixels_func(const Device::Pointer & device, const Array::Pointer & src) -> float;
+
+/**
+ * @name top_hat_box
+ * @brief Applies a top-hat filter for background subtraction to the input image.
+ *
+ * @param device Device to perform the operation on. [const Device::Pointer &]
+ * @param src The input image where the background is subtracted from. [const Array::Pointer &]
+ * @param dst The output image where results are written into. [Array::Pointer ( = None )]
+ * @param radius_x Radius of the background determination region in X. [int ( = 1 )]
+ * @param radius_y Radius of the background determination region in Y. [int ( = 1 )]
+ * @param radius_z Radius of the background determination region in Z. [int ( = 1 )]
+ * @param connectivity Element shape, "box" or "sphere". [std::string ( = "box" )]
+ * @return Array::Pointer
+ * @note 'filter', 'background removal', 'in assistant'
+ * @see https://clij.github.io/clij2-docs/reference_topHatBox
+ */
+auto
+top_hat_box_func(const Device::Pointer & device, const Array::Pointer & src, Array::Pointer dst, int radius_x, int radius_y, int radius_z, std::string connectivity) -> Array::Pointer;
+
+} // namespace cle::tier2
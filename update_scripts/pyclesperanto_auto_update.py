@@ -1,15 +1,36 @@
 import gencle
-import os, sys
+import re, sys, argparse
+from contextlib import ExitStack
+from concurrent.futures import ProcessPoolExecutor
 
 # OUTPUT_REPO = sys.argv[1]
 # VERSION_TAG = sys.argv[2]
 # SOURCE_REPO = "clEsperanto/CLIc"
 
 
-def update_tier_code(dst_repo: str, src_repo: str, tag: str):
+def update_tier_code(
+    dst_repo: str,
+    src_repo: str,
+    tag: str,
+    executor=None,
+    sink=None,
+    timing=False,
+    benchmarks=False,
+    fast=False,
+    release_gil=False,
+    gil_opt_out=None,
+    trim_imports=False,
+    batch=False,
+    registration=False,
+    external_docstrings=False,
+):
     """
     Update the tier code in the OUTPUT_REPO by reading the tier files from the SOURCE_REPO
 
+    Notes: tiers go through a pipeline where tier N+1 is downloaded while tier N is parsed,
+    rendered and checked, and tier N-1 is written. Files are only published by the sink once
+    every tier was generated without error.
+
     Parameters
     ----------
     dst_repo : str
@@ -18,27 +39,166 @@ def update_tier_code(dst_repo: str, src_repo: str, tag: str):
         Path to the SOURCE_REPO folder.
     tag : str
         Version tag to be used in the OUTPUT_REPO.
+    executor : Executor, optional
+        Process pool used to parse the large tier files and check the generated code, a new
+        one is started if None.
+    sink : OutputSink, optional
+        Destination of the files, closed by the caller. By default the files are written
+        in the OUTPUT_REPO folder.
+    timing : bool, optional
+        If True, generate the kernel timing instrumentation, enabled by compiling the
+        extension with `CLE_KERNEL_TIMING` defined, and its bindings.
+    benchmarks : bool, optional
+        If True, also generate one pytest-benchmark module per tier, timing its kernels.
+    fast : bool, optional
+        If True, generate lower-overhead Python functions, see `gencle.generate_python_file`.
+    release_gil : bool, optional
+        If True, release the GIL during the kernel calls of the bindings.
+    gil_opt_out : list, optional
+        Names of the kernels keeping the GIL when `release_gil` is True.
+    trim_imports : bool, optional
+        If True, only import in the tier modules what their functions use.
+    batch : bool, optional
+        If True, also generate the batch bindings and functions, running a kernel over lists
+        of images in a single call.
+    registration : bool, optional
+        If True, replace the decorators of the Python functions by a registration table.
+    external_docstrings : bool, optional
+        If True, move the docstrings of the Python functions to a json file next to each
+        tier module.
 
     Returns
     -------
         None
     """
-    code_list, tier_list = gencle.read_clic_tier_from_github(repo=src_repo, branch=tag)
-    for tier, code in zip(tier_list, code_list):
-        functions_list = gencle.parse_doxygen_to_json(code)
-        wrapper_file = gencle.generate_wrapper_file(functions_list, tier)
-        python_file = gencle.generate_python_file(functions_list, tier)
-        wrapper_filepath = os.path.join(
-            os.path.join(dst_repo, "src/wrapper"), f"tier{tier}_.cpp"
+    function_lists = {}
+
+    def _render(item):
+        tier, code = item
+        functions_list = gencle.parse_doxygen_to_json(code, executor=executor)
+        function_lists[tier] = functions_list
+
+        def _render_tier():
+            files = {
+                f"src/wrapper/tier{tier}_.cpp": gencle.generate_wrapper_file(
+                    functions_list,
+                    tier,
+                    release_gil=release_gil,
+                    gil_opt_out=gil_opt_out,
+                    batch=batch,
+                    timing=timing,
+                ),
+                f"pyclesperanto/_tier{tier}.py": gencle.generate_python_file(
+                    functions_list,
+                    tier,
+                    fast=fast,
+                    trim_imports=trim_imports,
+                    batch=batch,
+                    registration=registration,
+                    external_docstrings=external_docstrings,
+                ),
+            }
+            if external_docstrings:
+                docstrings_path = f"pyclesperanto/_tier{tier}_docstrings.json"
+                files[docstrings_path] = gencle.generate_docstrings_json(functions_list)
+            if benchmarks:
+                files[f"benchmarks/test_tier{tier}.py"] = gencle.generate_pytest_benchmark_file(
+                    functions_list, tier
+                )
+            # fail before writing anything if the generated code is malformed
+            gencle.validate_generated_files(files, executor=executor)
+            return files
+
+        # files rendered from the same tier code by the same gencle sources are reused
+        return gencle.cached_render(
+            (
+                "pyclesperanto",
+                tier,
+                gencle.content_hash(code),
+                timing,
+                benchmarks,
+                fast,
+                release_gil,
+                tuple(gil_opt_out or ()),
+                trim_imports,
+                batch,
+                registration,
+                external_docstrings,
+            ),
+            _render_tier,
         )
-        python_filepath = os.path.join(
-            os.path.join(dst_repo, "pyclesperanto"), f"_tier{tier}.py"
+
+    def _write(files):
+        for path, content in files.items():
+            sink.write(path, content)
+
+    with ExitStack() as stack:
+        if sink is None:
+            sink = stack.enter_context(gencle.FileSystemSink(dst_repo))
+        if executor is None:
+            executor = stack.enter_context(ProcessPoolExecutor())
+        gencle.run_pipeline(
+            gencle.iter_clic_tier_from_github(repo=src_repo, branch=tag),
+            [_render, _write],
         )
-        gencle.write_file(wrapper_filepath, wrapper_file, overwrite=True)
-        gencle.write_file(python_filepath, python_file, overwrite=True)
+        # the index and registry gather all tiers, they can only be rendered once they are all parsed
+        registry = gencle.generate_kernel_registry(function_lists)
+        files = {
+            "pyclesperanto/_tier_index.py": gencle.generate_lazy_index_file(
+                function_lists, batch=batch
+            ),
+            "pyclesperanto/_kernel_registry.py": gencle.generate_registry_file(registry),
+            "pyclesperanto/_kernel_registry.json": gencle.generate_registry_json(registry),
+        }
+        if timing:
+            files["src/wrapper/kernel_timing.hpp"] = gencle.generate_kernel_timing_header()
+            files["src/wrapper/timing_.cpp"] = gencle.generate_timing_wrapper_file()
+        gencle.validate_generated_files(files, max_workers=0)
+        _write(files)
+        if timing:
+            register_timing_wrapper(dst_repo, sink=sink)
+
+
+def register_timing_wrapper(dst_repo: str, sink=None):
+    """
+    Declare and call the timing bindings next to the tier bindings of the extension module.
+
+    Notes: in each file, the last line declaring or calling a `tierN_` binding is copied
+    for `timing_`, unless the file already refers to it.
+
+    Parameters
+    ----------
+    dst_repo : str
+        Path to the OUTPUT_REPO folder.
+    sink : OutputSink, optional
+        Destination of the files, closed by the caller. By default the files are updated
+        in the OUTPUT_REPO folder.
+
+    Returns
+    -------
+        None
+    """
+    with ExitStack() as stack:
+        if sink is None:
+            sink = stack.enter_context(gencle.FileSystemSink(dst_repo))
+        for wrapper_path in ("src/wrapper/pycle_wrapper.hpp", "src/wrapper/pycle_wrapper.cpp"):
+            content = sink.read(wrapper_path)
+            if content is None:
+                print(f"gencle: Fail registering the timing bindings. Could not find {wrapper_path}")
+                continue
+            if re.search(r"\btiming_\(", content):
+                continue
+            data = content.splitlines(keepends=True)
+            tier_lines = [i for i, line in enumerate(data) if re.search(r"\btier\d+_\(", line)]
+            if not tier_lines:
+                print(f"gencle: Fail registering the timing bindings. No tier binding in {wrapper_path}")
+                continue
+            last = tier_lines[-1]
+            data.insert(last + 1, re.sub(r"\btier\d+_\(", "timing_(", data[last]))
+            sink.write(wrapper_path, "".join(data))
 
 
-def update_version_file(dst_repo: str, tag: str):
+def update_version_file(dst_repo: str, tag: str, sink=None):
     """
     Update the CLIc version tag.
 
@@ -48,45 +208,128 @@ def update_version_file(dst_repo: str, tag: str):
         Path to the OUTPUT_REPO folder.
     tag : str
         Version tag to be used in the OUTPUT_REPO.
+    sink : OutputSink, optional
+        Destination of the file, closed by the caller. By default the file is updated
+        in the OUTPUT_REPO folder.
 
     Returns
     -------
         None
     """
+    with ExitStack() as stack:
+        if sink is None:
+            sink = stack.enter_context(gencle.FileSystemSink(dst_repo))
+        version_path = "pyclesperanto/_version.py"
+        content = sink.read(version_path)
 
-    version_file = os.path.join(os.path.join(dst_repo, "pyclesperanto"), "_version.py")
-
-    # if file does not exist, return
-    if not os.path.exists(version_file):
-        print(f"gencle: Fail updating CLIc version. Could not find {version_file}")
-        return
+        # if file does not exist, return
+        if content is None:
+            print(f"gencle: Fail updating CLIc version. Could not find {version_path}")
+            return
 
-    with open(version_file, "r") as file:
-        data = file.readlines()
-    for i, line in enumerate(data):
-        if "CLIC_VERSION =" in line:
-            data[i] = f'CLIC_VERSION = "{tag}"\n'
-            break
-    with open(version_file, "w") as file:
-        file.writelines(data)
+        data = content.splitlines(keepends=True)
+        for i, line in enumerate(data):
+            if "CLIC_VERSION =" in line:
+                data[i] = f'CLIC_VERSION = "{tag}"\n'
+                break
+        sink.write(version_path, "".join(data))
 
 
 def main():
-    if len(sys.argv) != 3:
-        print("Usage: python pyclesperanto_auto_update.py <OUTPUT_PATH> <VERSION_TAG>")
-        print("Example: python pyclesperanto_auto_update.py /path/to/clesperantoj 1.2.3")
-        print("This script will update the pyclesperanto repository in the given path to version 1.2.3 of CLIc.")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(
+        description="Update the pyclesperanto repository in the given path to a version of CLIc.",
+        epilog="Example: python pyclesperanto_auto_update.py /path/to/pyclesperanto 1.2.3",
+    )
+    parser.add_argument("output_path", help="path to the pyclesperanto repository")
+    parser.add_argument("version_tag", help="CLIc tag to update to")
+    parser.add_argument(
+        "--git-branch",
+        default=None,
+        help="commit the update on this new branch of the repository instead of writing its files",
+    )
+    parser.add_argument(
+        "--timing",
+        action="store_true",
+        help="also generate the kernel timing instrumentation, built with CLE_KERNEL_TIMING defined",
+    )
+    parser.add_argument(
+        "--benchmarks",
+        action="store_true",
+        help="also generate pytest-benchmark modules timing the kernels of each tier",
+    )
+    parser.add_argument(
+        "--fast",
+        action="store_true",
+        help="generate undecorated Python functions reading the active backend without a call",
+    )
+    parser.add_argument(
+        "--release-gil",
+        action="store_true",
+        help="release the GIL during the kernel calls, so Python threads can run kernels in parallel",
+    )
+    parser.add_argument(
+        "--gil-opt-out",
+        action="append",
+        default=None,
+        metavar="KERNEL",
+        help="kernel keeping the GIL with --release-gil, can be repeated",
+    )
+    parser.add_argument(
+        "--trim-imports",
+        action="store_true",
+        help="only import in the tier modules what their functions use",
+    )
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="also generate <name>_batch functions running a kernel over lists of images in one call",
+    )
+    parser.add_argument(
+        "--registration",
+        action="store_true",
+        help="replace the decorators of the Python functions by a registration table",
+    )
+    parser.add_argument(
+        "--external-docstrings",
+        action="store_true",
+        help="move the docstrings of the Python functions to a json file next to each tier module",
+    )
+    args = parser.parse_args()
 
-    output_path = sys.argv[1]
-    version_tag = sys.argv[2]
+    output_path = args.output_path
+    version_tag = args.version_tag
     source_repo = "clEsperanto/CLIc"
 
     print("gencle: Updating pyclesperanto repo ...")
     print(f"gencle: Reading from {source_repo} at tag {version_tag}")
     print(f"gencle: Writing to {output_path}")
-    update_tier_code(output_path, source_repo, version_tag)
-    update_version_file(output_path, version_tag)
+    if args.git_branch:
+        sink = gencle.GitFastImportSink(
+            output_path, args.git_branch, message=f"Update to CLIc {version_tag}"
+        )
+    else:
+        sink = gencle.FileSystemSink(output_path)
+    try:
+        with sink:
+            update_tier_code(
+                output_path,
+                source_repo,
+                version_tag,
+                sink=sink,
+                timing=args.timing,
+                benchmarks=args.benchmarks,
+                fast=args.fast,
+                release_gil=args.release_gil,
+                gil_opt_out=args.gil_opt_out,
+                trim_imports=args.trim_imports,
+                batch=args.batch,
+                registration=args.registration,
+                external_docstrings=args.external_docstrings,
+            )
+            update_version_file(output_path, version_tag, sink=sink)
+    except (gencle.GeneratedCodeError, gencle.FetchError) as error:
+        print(f"gencle: Abort, nothing was written. {error}")
+        sys.exit(1)
     print("gencle: Done!")
 
 